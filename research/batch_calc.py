@@ -0,0 +1,278 @@
+"""
+Vectorized batch version of the app's cost / weight calculator.
+
+evaluate() is calculate() from app/src/lib/calcEngine.js over NumPy arrays:
+every input may be a scalar or an array, inputs broadcast against each
+other, and one call evaluates every scenario of a sensitivity sweep. The JS
+semantics are reproduced operation for operation (parseFloat coercion with
+`|| default` fallbacks, so a yield of 0 or "" means 100%; the same order of
+floating-point additions; the stable descending sort of price breaks), so
+results are bit-identical to calcEngine, not just close. A key missing from
+an input object is JS undefined, which NaN stands in for: Number() and
+parseFloat() of either are NaN and both are falsy. An explicit None is JS
+null, which Number() makes 0.
+
+evaluate_inputs() takes a list of calcEngine input objects (dicts with the
+same camelCase keys) and evaluates them as one batch.
+"""
+
+import math
+import re
+from collections import namedtuple
+
+import numpy as np
+
+# The prefix JS parseFloat() accepts after leading whitespace
+JS_FLOAT = re.compile(r"[+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+
+BatchResult = namedtuple("BatchResult", ["result", "applied_discount"])
+
+
+def _parse_float_scalar(value):
+    if value is None or isinstance(value, (bool, np.bool_)):
+        return math.nan
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    m = JS_FLOAT.match(str(value).lstrip())
+    return float(m.group(0)) if m else math.nan
+
+
+def parse_float(values):
+    """JS parseFloat() applied elementwise; unparseable values become NaN."""
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iuf":
+        return arr.astype(np.float64)
+    if arr.dtype.kind == "b":
+        return np.full(arr.shape, math.nan)
+    return np.vectorize(_parse_float_scalar, otypes=[np.float64])(arr)
+
+
+def _or(values, default):
+    # JS `x || default` for numbers: 0 and NaN are falsy
+    return np.where(np.isnan(values) | (values == 0), default, values)
+
+
+def _number_scalar(value):
+    # JS Number(): what `>=` and `-` coerce price-break fields with. Missing
+    # fields arrive as NaN (undefined), explicit nulls as None
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return 0.0
+        try:
+            return float(text)
+        except ValueError:
+            return math.nan
+    if value is None:
+        return 0.0
+    return float(value)
+
+
+def _to_number(values):
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iufb":
+        return arr.astype(np.float64)
+    return np.vectorize(_number_scalar, otypes=[np.float64])(arr)
+
+
+def truthy(values):
+    """JS truthiness applied elementwise."""
+    arr = np.asarray(values)
+    if arr.dtype.kind in "iufb":
+        arr = arr.astype(np.float64)
+        return (arr != 0) & ~np.isnan(arr)
+    if arr.dtype.kind in "US":
+        return np.char.str_len(arr) > 0
+    return np.vectorize(
+        lambda v: bool(v) and not (isinstance(v, float) and math.isnan(v)), otypes=[bool]
+    )(arr)
+
+
+def _labor_cost(processing_steps):
+    total = 0.0
+    for step in processing_steps:
+        time = _or(parse_float(step.get("timeMinutes")), 0)
+        rate = _or(parse_float(step.get("laborCostPerHour")), 0)
+        total = total + (time / 60) * rate
+    return total
+
+
+def _discount(quantity, price_breaks):
+    """The discount of the highest tier each quantity qualifies for (0 when none)."""
+    if not price_breaks:
+        return np.zeros(np.shape(quantity))
+    qty = _or(parse_float(quantity), 0)
+    columns = np.broadcast_arrays(
+        qty,
+        *(_to_number(pb.get("minQty", math.nan)) for pb in price_breaks),
+        *(_to_number(pb.get("discount", math.nan)) for pb in price_breaks),
+    )
+    qty, tiers = columns[0], len(price_breaks)
+    min_qty = np.stack(columns[1:1 + tiers], axis=-1)
+    discount = np.stack(columns[1 + tiers:], axis=-1)
+
+    # [...priceBreaks].sort((a, b) => b.minQty - a.minQty) is a stable sort,
+    # as long as no NaN minQty comes before a real one (trailing NaNs are
+    # where padded, absent breaks go, and sort last either way)
+    order = np.argsort(-min_qty, axis=-1, kind="stable")
+    missing = np.isnan(min_qty)
+    trailing = np.flip(np.logical_and.accumulate(np.flip(missing, axis=-1), axis=-1), axis=-1)
+    for index in map(tuple, np.argwhere((missing & ~trailing).any(axis=-1))):
+        order[index] = _js_sort_order(min_qty[index])
+    min_qty = np.take_along_axis(min_qty, order, axis=-1)
+    discount = np.take_along_axis(discount, order, axis=-1)
+
+    qualifies = qty[..., None] >= min_qty
+    first = np.argmax(qualifies, axis=-1)[..., None]
+    chosen = np.take_along_axis(discount, first, axis=-1)[..., 0]
+    return np.where(qualifies.any(axis=-1), chosen, 0.0)
+
+
+def _js_sort_order(min_qty):
+    """
+    Indices of the breaks in the order V8 sorts them by (a, b) => b.minQty - a.minQty.
+
+    With a NaN minQty the comparator returns NaN, which Array.prototype.sort
+    takes as "equal", so the result depends on the algorithm rather than
+    being a sort. V8 (array-sort.tq) sorts an array of under 64 elements as
+    one run: the ascending or strictly descending (then reversed) prefix,
+    extended by binary insertion. That is replayed here; price-break lists
+    are never long enough for its run merging.
+    """
+    def compare(x, y):
+        order = min_qty[y] - min_qty[x]
+        return 0 if math.isnan(order) else order
+
+    items = list(range(len(min_qty)))
+    if len(items) < 2:
+        return items
+    run = 2
+    descending = compare(items[1], items[0]) < 0
+    for i in range(2, len(items)):
+        order = compare(items[i], items[i - 1])
+        if (order >= 0) if descending else (order < 0):
+            break
+        run += 1
+    if descending:
+        items[:run] = items[:run][::-1]
+    for start in range(run, len(items)):
+        pivot = items[start]
+        left, right = 0, start
+        while left < right:
+            mid = left + ((right - left) >> 1)
+            if compare(pivot, items[mid]) < 0:
+                right = mid
+            else:
+                left = mid + 1
+        items[left + 1:start + 1] = items[left:start]
+        items[left] = pivot
+    return items
+
+
+def evaluate(
+    mode="cost",
+    yield_percent=None,
+    target_weight=0,
+    cost=0,
+    processing_cost=0,
+    weight_type="incoming",
+    cold_storage=0,
+    shipping=0,
+    show_time_tracking=False,
+    processing_steps=(),
+    show_economy_of_scale=False,
+    quantity="",
+    price_breaks=(),
+):
+    """
+    Evaluate calcEngine.calculate() over broadcast arrays of inputs.
+
+    processing_steps and price_breaks are lists of {"timeMinutes",
+    "laborCostPerHour"} / {"minQty", "discount"} dicts as in calcEngine,
+    whose values may themselves be arrays. Returns a BatchResult of float
+    arrays with the broadcast shape of the inputs.
+    """
+    y = _or(parse_float(yield_percent), 100) / 100
+
+    # ---------- weight mode ----------
+    target = _or(parse_float(target_weight), 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight_result = np.where(y > 0, target / y, 0.0)
+
+    # ---------- cost mode ----------
+    c = _or(parse_float(cost), 0)
+    proc = _or(parse_float(processing_cost), 0)
+    cold = _or(parse_float(cold_storage), 0)
+    ship = _or(parse_float(shipping), 0)
+
+    with np.errstate(invalid="ignore"):
+        base = c / y
+        base = np.where(np.asarray(weight_type) == "incoming", base + proc / y, base + proc)
+        base = base + (cold + ship)
+        if processing_steps:
+            base = np.where(truthy(show_time_tracking), base + _labor_cost(processing_steps), base)
+
+        applied = np.where(
+            truthy(show_economy_of_scale) & truthy(quantity),
+            _discount(quantity, price_breaks),
+            0.0,
+        )
+        base = np.where(applied > 0, base * (1 - applied / 100), base)
+
+    is_weight = np.asarray(mode) == "weight"
+    result = np.where(is_weight, weight_result, base)
+    applied = np.where(is_weight, 0.0, applied)
+    shape = np.broadcast_shapes(result.shape, applied.shape)
+    return BatchResult(np.broadcast_to(result, shape), np.broadcast_to(applied, shape))
+
+
+# calcEngine input key -> evaluate() argument, with calcEngine's defaults
+INPUT_KEYS = {
+    "mode": ("mode", None),
+    "yieldPercent": ("yield_percent", None),
+    "targetWeight": ("target_weight", 0),
+    "cost": ("cost", 0),
+    "processingCost": ("processing_cost", 0),
+    "weightType": ("weight_type", "incoming"),
+    "coldStorage": ("cold_storage", 0),
+    "shipping": ("shipping", 0),
+    "showTimeTracking": ("show_time_tracking", False),
+    "showEconomyOfScale": ("show_economy_of_scale", False),
+    "quantity": ("quantity", ""),
+}
+
+
+def _object_column(values):
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _padded(scenarios, key, fields):
+    # Ragged per-scenario lists -> one dict of columns per position. Missing
+    # steps contribute 0 labor; missing price breaks have a NaN minQty, which
+    # no quantity qualifies for and which sorts after every real tier. A
+    # field missing from a present item is undefined, so NaN too.
+    lists = [inputs.get(key) or [] for inputs in scenarios]
+    width = max((len(items) for items in lists), default=0)
+    padded = []
+    for i in range(width):
+        padded.append({
+            field: _object_column([items[i].get(field, math.nan) if i < len(items) else filler for items in lists])
+            for field, filler in fields.items()
+        })
+    return padded
+
+
+def evaluate_inputs(scenarios):
+    """Evaluate a list of calcEngine input dicts; returns a BatchResult of 1-D arrays."""
+    scenarios = list(scenarios)
+    columns = {
+        argument: _object_column([inputs.get(key, default) for inputs in scenarios])
+        for key, (argument, default) in INPUT_KEYS.items()
+    }
+    return evaluate(
+        processing_steps=_padded(scenarios, "processingSteps", {"timeMinutes": 0, "laborCostPerHour": 0}),
+        price_breaks=_padded(scenarios, "priceBreaks", {"minQty": math.nan, "discount": 0}),
+        **columns,
+    )
@@ -0,0 +1,266 @@
+"""
+Benchmarks for the research pipeline stages.
+
+Each benchmark builds its input with synthetic_corpus at a scale factor
+(1x = the real bulletin text / a sheet of the NHCS workbook's size), then
+times the stage (best of --repeat runs) and runs it once more under
+tracemalloc for the peak Python-heap memory. Results are compared with a
+stored baseline, and a throughput drop or memory growth beyond the tolerance
+is reported as a regression (exit status 1), so slowdowns show up here
+before they show up in a data refresh.
+
+    python benchmark.py                       # 10x and 100x, compare with baseline
+    python benchmark.py --scales 1000 --stages parse_pdf_content
+    python benchmark.py --update-baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import synthetic_corpus
+from js_data import FISH_DATA_V3_PATH, RESEARCH_DIR
+
+DEFAULT_BASELINE_PATH = os.path.join(RESEARCH_DIR, "benchmark_baseline.json")
+DEFAULT_SCALES = (10, 100)
+DEFAULT_TOLERANCE = 0.25
+EXCEL_PATH = os.path.join("datasets", "% Yields NHCS.xlsx")
+
+
+@contextlib.contextmanager
+def _quiet_in(directory):
+    # The stages print progress and use paths relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.chdir(cwd)
+
+
+def _fresh_store(workdir):
+    shutil.rmtree(os.path.join(workdir, "data"), ignore_errors=True)
+
+
+# Each setup builds the input in workdir and returns (run, count, unit);
+# run() performs one measured pass over `count` units.
+
+def setup_clean_ocr(scale, workdir):
+    from ocr_normalize import OcrNormalizer
+
+    with open(synthetic_corpus.PDF_CONTENT_PATH) as f:
+        lines = synthetic_corpus.scale_pdf_content(f.read(), scale).splitlines()
+
+    def run():
+        # A new normalizer per pass, so its line cache starts cold as in a real run
+        normalize = OcrNormalizer().normalize
+        for line in lines:
+            normalize(line)
+
+    return run, len(lines), "lines"
+
+
+def setup_parse_pdf_content(scale, workdir):
+    from parse_data import parse_pdf_content
+
+    path = os.path.join(workdir, "pdf_content.txt")
+    lines = synthetic_corpus.write_pdf_content(path, scale)
+
+    def run():
+        _fresh_store(workdir)
+        with _quiet_in(workdir):
+            parse_pdf_content(path)
+
+    return run, lines, "lines"
+
+
+def setup_update_data(scale, workdir):
+    from excel_ingest import DEFAULT_CACHE_DIR
+    from update_fish_data import update_data
+
+    rows = synthetic_corpus.write_nhcs_workbook(os.path.join(workdir, EXCEL_PATH), scale)
+
+    def run():
+        _fresh_store(workdir)
+        # Time the workbook parse, not a columnar cache hit
+        shutil.rmtree(os.path.join(workdir, DEFAULT_CACHE_DIR), ignore_errors=True)
+        with _quiet_in(workdir):
+            update_data()
+
+    return run, rows, "rows"
+
+
+def setup_profile_extraction(scale, workdir):
+    from scrape_profiles import extract_profile
+
+    pages = synthetic_corpus.synthetic_profile_pages(scale)
+
+    def run():
+        for page in pages:
+            extract_profile(page)
+
+    return run, len(pages), "pages"
+
+
+def setup_validation(scale, workdir):
+    from validate_fish_data import validate_data
+
+    path = os.path.join(workdir, "pdf_content.txt")
+    lines = synthetic_corpus.write_pdf_content(path, scale)
+
+    def run():
+        validate_data(FISH_DATA_V3_PATH, path)
+
+    return run, lines, "lines"
+
+
+def setup_species_lookup(scale, workdir):
+    from page_index import PageIndex
+
+    path = os.path.join(workdir, "pdf_content.txt")
+    synthetic_corpus.write_pdf_content(path, scale)
+
+    def run():
+        # A new index per pass, so nothing is served from its cache
+        with PageIndex(path) as index:
+            index.get_species("Lingcod")
+
+    return run, 1, "lookups"
+
+
+BENCHMARKS = {
+    "clean_ocr": setup_clean_ocr,
+    "parse_pdf_content": setup_parse_pdf_content,
+    "update_data": setup_update_data,
+    "profile_extraction": setup_profile_extraction,
+    "validation": setup_validation,
+    "species_lookup": setup_species_lookup,
+}
+
+
+def measure(run, count, unit, repeat=3):
+    best = min(_timed(run) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "count": count,
+        "unit": unit,
+        "seconds": round(best, 6),
+        "throughput": round(count / best, 1) if best > 0 else None,
+        "peak_bytes": peak,
+    }
+
+
+def _timed(run):
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def run_benchmarks(stages=None, scales=DEFAULT_SCALES, repeat=3):
+    """{stage: {scale: measurement}}; scales are stored as strings for JSON."""
+    results = {}
+    for name in stages or BENCHMARKS:
+        setup = BENCHMARKS[name]
+        for scale in scales:
+            with tempfile.TemporaryDirectory() as workdir:
+                run, count, unit = setup(scale, workdir)
+                results.setdefault(name, {})[str(scale)] = measure(run, count, unit, repeat)
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Regression messages for results that fall short of the baseline by more than tolerance."""
+    regressions = []
+    for name, scales in results.items():
+        for scale, current in scales.items():
+            previous = baseline.get(name, {}).get(scale)
+            if not previous:
+                continue
+            if previous["throughput"] and current["throughput"] is not None:
+                ratio = current["throughput"] / previous["throughput"]
+                if ratio < 1 - tolerance:
+                    regressions.append(
+                        f"{name} @ {scale}x: throughput {current['throughput']:.0f} {current['unit']}/s "
+                        f"is {1 - ratio:.0%} below baseline {previous['throughput']:.0f}"
+                    )
+            if previous["peak_bytes"] and current["peak_bytes"] > previous["peak_bytes"] * (1 + tolerance):
+                regressions.append(
+                    f"{name} @ {scale}x: peak memory {current['peak_bytes'] / 1e6:.1f} MB "
+                    f"is above baseline {previous['peak_bytes'] / 1e6:.1f} MB"
+                )
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{'stage':<20} {'scale':>6} {'throughput':>16} {'seconds':>9} {'peak MB':>9}"]
+    for name, scales in results.items():
+        for scale, m in scales.items():
+            lines.append(
+                f"{name:<20} {scale + 'x':>6} {m['throughput']:>10.0f} {m['unit'] + '/s':<5} "
+                f"{m['seconds']:>9.3f} {m['peak_bytes'] / 1e6:>9.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the research pipeline stages")
+    parser.add_argument("--stages", help=f"Comma-separated subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="Comma-separated scale factors, e.g. 10,100,1000")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", help="Also write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    stages = args.stages.split(",") if args.stages else None
+    unknown = set(stages or ()) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    results = run_benchmarks(stages, [int(s) for s in args.scales.split(",")], args.repeat)
+    print(format_results(results))
+
+    document = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    if args.update_baseline:
+        # Keep entries for stages and scales that weren't rerun
+        for name, scales in results.items():
+            baseline.setdefault(name, {}).update(scales)
+        document["results"] = baseline
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print("REGRESSION:", message)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
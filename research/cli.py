@@ -0,0 +1,176 @@
+"""
+One command line for the research tools.
+
+    python cli.py validate --no-pdf
+    python cli.py -C /path/to/checkout/research parse pdf_content.txt
+    python cli.py resolve "Cod, Pacific"
+    python cli.py startup                  # import-time benchmark
+
+Each subcommand runs one script's main() with the remaining arguments, so
+`python cli.py validate --species Lingcod` is `python validate_fish_data.py
+--species Lingcod`, and the scripts still run on their own. The script
+module is imported only when its subcommand runs. Heavy dependencies
+(pandas and numpy for the workbook, PyPDF2, requests) are imported inside
+the functions that use them, so quick commands like validate, species or
+resolve never load them and start in tens of milliseconds. That matters
+when they run from hooks and cron.
+
+-C DIR runs the command in DIR, for the scripts whose default paths are
+relative to the working directory (data/, pdf_content.txt, caches).
+
+`startup` measures every subcommand in fresh interpreters: its module's
+import time (python -X importtime), its wall time to print --help beyond a
+bare interpreter, and which heavy dependencies it loaded.
+"""
+
+import os
+import sys
+
+RESEARCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# subcommand -> (module whose main() runs it, summary)
+COMMANDS = {
+    "extract": ("extract_pdf", "Extract text from the bulletin PDF"),
+    "parse": ("parse_data", "Parse the extracted text into the fish data store"),
+    "merge": ("update_fish_data", "Merge the NHCS yields workbook into the fish data store"),
+    "scrape": ("scrape_profiles", "Scrape Sea Grant seafood profiles"),
+    "validate": ("validate_fish_data", "Validate fish_data_v3.js against the PDF text"),
+    "emit": ("emit_js", "Write FISH_DATA_V3 as per-category JS modules"),
+    "build-db": ("yield_db", "Build the indexed SQLite database of FISH_DATA_V3"),
+    "chain": ("yield_graph", "Precompute chained yields from fish_data_v3.js"),
+    "uncertainty": ("yield_uncertainty", "Monte Carlo yield-uncertainty costing"),
+    "export-delta": ("delta_export", "Export what changed since the last publish"),
+    "species": ("page_index", "Parse one species' records from the PDF text"),
+    "resolve": ("name_index", "Resolve species names to the dataset's names"),
+    "pipeline": ("pipeline", "Run the data pipeline incrementally"),
+    "serve": ("yield_service", "Serve yield lookups and batch calculations over HTTP"),
+    "load": ("yield_load", "Measure the service's latency and throughput"),
+    "benchmark": ("benchmark", "Benchmark the pipeline stages"),
+}
+
+# Modules that must never be imported just to start a quick command
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "PyPDF2", "requests")
+
+
+def _usage():
+    width = max(len(name) for name in COMMANDS) + 2
+    lines = ["usage: cli.py [-C DIR] <command> [args...]", "", "commands:"]
+    lines += [f"  {name:<{width}}{summary}" for name, (_, summary) in COMMANDS.items()]
+    lines.append(f"  {'startup':<{width}}Measure every command's import and startup time")
+    lines += ["", "Run `cli.py <command> --help` for a command's options."]
+    return "\n".join(lines)
+
+
+def run(command, argv, prog="cli.py"):
+    """Import the command's module and run its main(); returns its exit status."""
+    import importlib
+
+    module = importlib.import_module(COMMANDS[command][0])
+    try:
+        module.main(argv, prog=f"{prog} {command}")
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+
+# ---- import-time benchmark ----
+
+def _import_times(module):
+    """{imported module: cumulative microseconds} from python -X importtime in a fresh interpreter."""
+    import subprocess
+
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=RESEARCH_DIR, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in out.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def _best_wall(args, repeat):
+    import subprocess
+    import time
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=RESEARCH_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_startup(commands=None, repeat=5):
+    """{command: {"import_ms", "startup_ms", "heavy"}} for each command, best of repeat runs."""
+    interpreter = _best_wall([sys.executable, "-c", "pass"], repeat)
+    results = {}
+    for command in commands or COMMANDS:
+        module = COMMANDS[command][0]
+        times = _import_times(module)
+        wall = _best_wall([sys.executable, os.path.join(RESEARCH_DIR, "cli.py"), command, "--help"], repeat)
+        results[command] = {
+            "module": module,
+            "import_ms": round(times.get(module, 0) / 1000, 1),
+            "startup_ms": round(max(0.0, wall - interpreter) * 1000, 1),
+            "heavy": [name for name in HEAVY_MODULES if name in times],
+        }
+    return results
+
+
+def format_startup(results):
+    lines = [f"{'command':<14} {'module':<20} {'import':>9} {'startup':>9}  heavy imports"]
+    for command, m in results.items():
+        lines.append(
+            f"{command:<14} {m['module']:<20} {m['import_ms']:>6.1f} ms {m['startup_ms']:>6.1f} ms  "
+            + (", ".join(m["heavy"]) or "-")
+        )
+    lines.append("startup: wall time of `cli.py <command> --help` beyond a bare interpreter")
+    return "\n".join(lines)
+
+
+def startup_main(argv, prog):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(prog=prog, description="Measure each command's import and startup time")
+    parser.add_argument("commands", nargs="*", help="Commands to measure (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command (best is kept)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.commands) - set(COMMANDS)
+    if unknown:
+        parser.error(f"Unknown commands: {', '.join(sorted(unknown))}")
+    results = measure_startup(args.commands or None, args.repeat)
+    print(json.dumps(results, indent=2) if args.json else format_startup(results))
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if len(argv) >= 2 and argv[0] == "-C":
+        # The scripts import each other by name, so keep finding them after the chdir
+        if RESEARCH_DIR not in sys.path:
+            sys.path.insert(0, RESEARCH_DIR)
+        os.chdir(argv[1])
+        argv = argv[2:]
+    if not argv or argv[0] in ("-h", "--help"):
+        print(_usage())
+        return 0 if argv else 2
+
+    command, rest = argv[0], argv[1:]
+    if command == "startup":
+        startup_main(rest, "cli.py startup")
+        return 0
+    if command not in COMMANDS:
+        print(f"cli.py: unknown command {command!r}\n\n{_usage()}", file=sys.stderr)
+        return 2
+    return run(command, rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
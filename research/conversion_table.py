@@ -0,0 +1,210 @@
+"""
+Compact, array-backed conversion table for the Python tooling.
+
+The JS data and the Python dicts store every conversion as a nested dict
+keyed by strings like "Round → D/H-On", repeating the product-form names in
+every species. ConversionTable interns species and product-form names to
+small integer IDs and keeps the conversions as struct-of-arrays columns
+(array.array), so a conversion costs a few dozen bytes instead of several
+dicts. Lookups by (species, from, to) binary-search a sorted packed-key
+index, and tables round-trip to and from the FISH_DATA_V3 dict form.
+"""
+
+import json
+import math
+from array import array
+from bisect import bisect_left
+
+from js_data import FISH_DATA_V3_PATH, load_fish_data_v3, split_conversion_key
+
+ARROW = " → "
+
+
+class Interner:
+    """Maps names to dense integer IDs. Share one between tables to share IDs."""
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.id(name)
+
+    def id(self, name):
+        found = self.ids.get(name)
+        if found is None:
+            found = len(self.names)
+            if found > 0xFFFF:
+                raise OverflowError("More than 65536 interned names")
+            self.names.append(name)
+            self.ids[name] = found
+        return found
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _pack(species_id, from_id, to_id):
+    return (species_id << 32) | (from_id << 16) | to_id
+
+
+class ConversionTable:
+    def __init__(self, species=None, forms=None):
+        self.species = species if species is not None else Interner()
+        self.forms = forms if forms is not None else Interner()
+        # Per-species metadata, indexed by species ID, and the species in
+        # this table in first-seen order (the interner may be shared)
+        self.scientific_names = []
+        self.categories = []
+        self.species_order = array("H")
+        self._species_seen = set()
+        # One entry per conversion, in dataset order
+        self.species_ids = array("H")
+        self.from_ids = array("H")
+        self.to_ids = array("H")
+        self.yields = array("d")
+        self.range_low = array("d")   # NaN when the source has no range
+        self.range_high = array("d")
+        # Lookup index: packed (species, from, to) keys, sorted, and the row each belongs to
+        self._sorted_keys = array("Q")
+        self._sorted_rows = array("I")
+
+    def __len__(self):
+        return len(self.yields)
+
+    # ---- building ----
+
+    def _add_species(self, species_id):
+        if species_id not in self._species_seen:
+            self._species_seen.add(species_id)
+            self.species_order.append(species_id)
+
+    def _set_species_meta(self, species_id, scientific_name, category):
+        self._add_species(species_id)
+        while len(self.scientific_names) <= species_id:
+            self.scientific_names.append(None)
+            self.categories.append(None)
+        self.scientific_names[species_id] = scientific_name
+        self.categories[species_id] = category
+
+    def append(self, species, from_state, to_state, yield_value, range_value=None):
+        species_id = self.species.id(species)
+        self._add_species(species_id)
+        self.species_ids.append(species_id)
+        self.from_ids.append(self.forms.id(from_state))
+        self.to_ids.append(self.forms.id(to_state))
+        self.yields.append(float(yield_value))
+        if range_value:
+            self.range_low.append(float(range_value[0]))
+            self.range_high.append(float(range_value[1]))
+        else:
+            self.range_low.append(math.nan)
+            self.range_high.append(math.nan)
+
+    def build_index(self):
+        keys = sorted(
+            (_pack(s, f, t), row)
+            for row, (s, f, t) in enumerate(zip(self.species_ids, self.from_ids, self.to_ids))
+        )
+        self._sorted_keys = array("Q", (k for k, _ in keys))
+        self._sorted_rows = array("I", (r for _, r in keys))
+        return self
+
+    @classmethod
+    def from_v3(cls, fish_data, species=None, forms=None):
+        """
+        Build from a FISH_DATA_V3-style dict. Conversions may carry their own
+        "from"/"to" fields; otherwise they're taken from the "From → To" key.
+        """
+        table = cls(species, forms)
+        for name, data in fish_data.items():
+            species_id = table.species.id(name)
+            table._set_species_meta(species_id, data.get("scientific_name"), data.get("category"))
+            for label, conv in data.get("conversions", {}).items():
+                if "from" in conv and "to" in conv:
+                    from_state, to_state = conv["from"], conv["to"]
+                else:
+                    from_state, to_state = split_conversion_key(label)
+                table.append(name, from_state, to_state, conv["yield"], conv.get("range"))
+        return table.build_index()
+
+    @classmethod
+    def from_js(cls, path=FISH_DATA_V3_PATH, species=None, forms=None):
+        return cls.from_v3(load_fish_data_v3(path), species, forms)
+
+    # ---- reading ----
+
+    def _row(self, species, from_state, to_state):
+        try:
+            key = _pack(self.species.ids[species], self.forms.ids[from_state], self.forms.ids[to_state])
+        except KeyError:
+            return None
+        i = bisect_left(self._sorted_keys, key)
+        if i < len(self._sorted_keys) and self._sorted_keys[i] == key:
+            return self._sorted_rows[i]
+        return None
+
+    def _range(self, row):
+        low = self.range_low[row]
+        if math.isnan(low):
+            return None
+        return [_number(low), _number(self.range_high[row])]
+
+    def lookup(self, species, from_state, to_state):
+        """Return {"yield", "range"} for a conversion, or None."""
+        row = self._row(species, from_state, to_state)
+        if row is None:
+            return None
+        return {"yield": _number(self.yields[row]), "range": self._range(row)}
+
+    def rows(self):
+        """Yield (species, from, to, yield, range) for every conversion in dataset order."""
+        species_names, form_names = self.species.names, self.forms.names
+        for row in range(len(self)):
+            yield (
+                species_names[self.species_ids[row]],
+                form_names[self.from_ids[row]],
+                form_names[self.to_ids[row]],
+                _number(self.yields[row]),
+                self._range(row),
+            )
+
+    def to_v3(self, with_endpoints=False):
+        """Rebuild the FISH_DATA_V3 dict; with_endpoints adds "from"/"to" fields."""
+        fish_data = {}
+        for species_id in self.species_order:
+            entry = fish_data[self.species.names[species_id]] = {}
+            if species_id < len(self.scientific_names):
+                if self.scientific_names[species_id] is not None:
+                    entry["scientific_name"] = self.scientific_names[species_id]
+                if self.categories[species_id] is not None:
+                    entry["category"] = self.categories[species_id]
+            entry["conversions"] = {}
+        for species, from_state, to_state, yield_value, range_value in self.rows():
+            entry = fish_data[species]
+            conv = {"yield": yield_value, "range": range_value}
+            if with_endpoints:
+                conv["from"] = from_state
+                conv["to"] = to_state
+            entry["conversions"][from_state + ARROW + to_state] = conv
+        return fish_data
+
+    def to_js(self, name="FISH_DATA_V3"):
+        return f"export const {name} = " + json.dumps(self.to_v3(), indent=2, ensure_ascii=False) + ";\n"
+
+    def columns_as_numpy(self):
+        """Zero-copy NumPy views of the columns (requires numpy)."""
+        import numpy as np
+
+        return {
+            "species_id": np.frombuffer(self.species_ids, dtype=np.uint16),
+            "from_id": np.frombuffer(self.from_ids, dtype=np.uint16),
+            "to_id": np.frombuffer(self.to_ids, dtype=np.uint16),
+            "yield": np.frombuffer(self.yields, dtype=np.float64),
+            "range_low": np.frombuffer(self.range_low, dtype=np.float64),
+            "range_high": np.frombuffer(self.range_high, dtype=np.float64),
+        }
+
+
+def _number(value):
+    # Yields and ranges are whole percentages in the source data
+    return int(value) if value.is_integer() else value
@@ -0,0 +1,315 @@
+"""
+Delta export of FISH_DATA_V3 for the species / fish_yields tables.
+
+scripts/import-fish-data-to-neon.js upserts every species and conversion on
+every import. export() instead compares the dataset with the snapshot that
+was last published and writes only what changed, as COPY-ready CSVs plus a
+psql script that applies them:
+
+    species_upsert.csv       inserted and updated species rows
+    species_delete.csv       names of species that are gone
+    fish_yields_upsert.csv   inserted and updated conversions
+    fish_yields_delete.csv   (species, from_state, to_state) of removed ones
+    apply_delta.sql          \\copy the files into temp tables, then upsert / delete
+    species.csv, fish_yields.csv, load_all.sql   the full dataset, for a fresh database
+    delta.json               counts and keys of inserted / updated / deleted rows
+
+Yield rows are keyed like UNIQUE(species_id, from_state, to_state), with the
+species name standing in for species_id (names are unique and ids are
+assigned by the database); the SQL resolves ids by joining on species.name.
+In the CSVs NULL is an empty unquoted field, COPY's CSV default, so empty
+strings are exported as NULL.
+
+Once the delta has been loaded, record the dataset as published so the next
+export is relative to it:
+
+    python delta_export.py                     # writes data/publish/
+    cd data/publish && psql "$DATABASE_URL" -f apply_delta.sql
+    python delta_export.py --mark-published
+
+apply_sqlite() replays the same statements against a SQLite stand-in of the
+two tables, which --verify-sqlite uses to check that applying the delta to
+the published snapshot gives the same tables as loading the new dataset.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+from collections import namedtuple
+
+from fish_store import atomic_write
+from js_data import FISH_DATA_V3_PATH, load_fish_data_v3
+
+DEFAULT_OUTPUT_DIR = os.path.join("data", "publish")
+DEFAULT_SNAPSHOT_PATH = os.path.join("data", "published_snapshot.json")
+
+SPECIES_COLUMNS = ("name", "scientific_name", "category")
+YIELD_COLUMNS = ("species", "from_state", "to_state", "yield_percent", "range_min", "range_max")
+YIELD_KEY_COLUMNS = YIELD_COLUMNS[:3]
+
+# rows: {key: row tuple}; inserted / updated hold rows, deleted holds keys
+Delta = namedtuple("Delta", ["inserted", "updated", "deleted"])
+Snapshot = namedtuple("Snapshot", ["species", "yields"])
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS species (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    scientific_name TEXT,
+    category TEXT
+);
+CREATE TABLE IF NOT EXISTS fish_yields (
+    id INTEGER PRIMARY KEY,
+    species_id INTEGER REFERENCES species(id) ON DELETE CASCADE,
+    from_state TEXT NOT NULL,
+    to_state TEXT NOT NULL,
+    yield_percent DECIMAL(5,2) NOT NULL,
+    range_min DECIMAL(5,2),
+    range_max DECIMAL(5,2),
+    UNIQUE(species_id, from_state, to_state)
+);
+"""
+
+
+def _text(value):
+    return value if value else None
+
+
+def _number(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def dataset_rows(fish_data):
+    """The species and fish_yields rows of a FISH_DATA_V3 dict, as a Snapshot of {key: row}."""
+    species = {}
+    yields = {}
+    for name, data in fish_data.items():
+        species[name] = (name, _text(data.get("scientific_name")), _text(data.get("category")))
+        for key, conversion in data.get("conversions", {}).items():
+            parts = key.split(" → ")
+            if len(parts) != 2:
+                # As the JS importer does: it skips keys without exactly one arrow
+                continue
+            from_state, to_state = parts
+            rng = conversion.get("range") or (None, None)
+            yields[(name, from_state, to_state)] = (
+                name, from_state, to_state,
+                _number(conversion["yield"]), _number(rng[0]), _number(rng[1]),
+            )
+    return Snapshot(species, yields)
+
+
+def load_snapshot(path=DEFAULT_SNAPSHOT_PATH):
+    """The last published Snapshot, or an empty one if nothing has been published."""
+    if not os.path.exists(path):
+        return Snapshot({}, {})
+    with open(path, "r", encoding="utf-8") as f:
+        stored = json.load(f)
+    return Snapshot(
+        {row[0]: tuple(row) for row in stored["species"]},
+        {tuple(row[:3]): tuple(row) for row in stored["fish_yields"]},
+    )
+
+
+def write_snapshot(snapshot, path=DEFAULT_SNAPSHOT_PATH):
+    atomic_write(path, json.dumps({
+        "species": [list(row) for _, row in sorted(snapshot.species.items())],
+        "fish_yields": [list(row) for _, row in sorted(snapshot.yields.items())],
+    }, indent=1, ensure_ascii=False) + "\n")
+
+
+def diff(old, new):
+    """Delta between two {key: row} mappings, each part sorted by key."""
+    return Delta(
+        [new[key] for key in sorted(new.keys() - old.keys())],
+        [new[key] for key in sorted(new.keys() & old.keys()) if new[key] != old[key]],
+        sorted(old.keys() - new.keys()),
+    )
+
+
+def write_csv(path, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    """Rows of a CSV written by write_csv(), with empty fields as None."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [tuple(value if value != "" else None for value in row) for row in reader]
+
+
+def postgres_script(species_file, yields_file, species_delete_file=None, yields_delete_file=None):
+    """psql script that loads the CSVs (paths relative to where psql runs) in one transaction."""
+    parts = ["BEGIN;"]
+
+    def copy(table, columns, path):
+        parts.append(f"CREATE TEMP TABLE {table} ({columns}) ON COMMIT DROP;")
+        parts.append(f"\\copy {table} FROM '{path}' WITH (FORMAT csv, HEADER true)")
+
+    copy("species_upsert", "name text, scientific_name text, category text", species_file)
+    parts.append(
+        "INSERT INTO species (name, scientific_name, category)\n"
+        "SELECT name, scientific_name, category FROM species_upsert\n"
+        "ON CONFLICT (name) DO UPDATE SET\n"
+        "  scientific_name = EXCLUDED.scientific_name,\n"
+        "  category = EXCLUDED.category;"
+    )
+    if yields_delete_file:
+        copy("fish_yields_delete", "species text, from_state text, to_state text", yields_delete_file)
+        parts.append(
+            "DELETE FROM fish_yields y USING species s, fish_yields_delete d\n"
+            "WHERE y.species_id = s.id AND s.name = d.species\n"
+            "  AND y.from_state = d.from_state AND y.to_state = d.to_state;"
+        )
+    copy("fish_yields_upsert", "species text, from_state text, to_state text, "
+         "yield_percent numeric, range_min numeric, range_max numeric", yields_file)
+    parts.append(
+        "INSERT INTO fish_yields (species_id, from_state, to_state, yield_percent, range_min, range_max)\n"
+        "SELECT s.id, u.from_state, u.to_state, u.yield_percent, u.range_min, u.range_max\n"
+        "FROM fish_yields_upsert u JOIN species s ON s.name = u.species\n"
+        "ON CONFLICT (species_id, from_state, to_state) DO UPDATE SET\n"
+        "  yield_percent = EXCLUDED.yield_percent,\n"
+        "  range_min = EXCLUDED.range_min,\n"
+        "  range_max = EXCLUDED.range_max;"
+    )
+    if species_delete_file:
+        copy("species_delete", "name text", species_delete_file)
+        parts.append("DELETE FROM species WHERE name IN (SELECT name FROM species_delete);")
+    parts.append("COMMIT;")
+    return "\n".join(parts) + "\n"
+
+
+def export(fish_data, snapshot_path=DEFAULT_SNAPSHOT_PATH, output_dir=DEFAULT_OUTPUT_DIR):
+    """Write the delta and full load files; returns {"species": Delta, "fish_yields": Delta}."""
+    old = load_snapshot(snapshot_path)
+    new = dataset_rows(fish_data)
+    species, yields = diff(old.species, new.species), diff(old.yields, new.yields)
+
+    os.makedirs(output_dir, exist_ok=True)
+    write_csv(os.path.join(output_dir, "species_upsert.csv"), SPECIES_COLUMNS, species.inserted + species.updated)
+    write_csv(os.path.join(output_dir, "species_delete.csv"), ("name",), [(key,) for key in species.deleted])
+    write_csv(os.path.join(output_dir, "fish_yields_upsert.csv"), YIELD_COLUMNS, yields.inserted + yields.updated)
+    write_csv(os.path.join(output_dir, "fish_yields_delete.csv"), YIELD_KEY_COLUMNS, yields.deleted)
+    atomic_write(os.path.join(output_dir, "apply_delta.sql"), postgres_script(
+        "species_upsert.csv", "fish_yields_upsert.csv", "species_delete.csv", "fish_yields_delete.csv"))
+
+    write_csv(os.path.join(output_dir, "species.csv"), SPECIES_COLUMNS, sorted(new.species.values()))
+    write_csv(os.path.join(output_dir, "fish_yields.csv"), YIELD_COLUMNS, sorted(new.yields.values()))
+    atomic_write(os.path.join(output_dir, "load_all.sql"), postgres_script("species.csv", "fish_yields.csv"))
+
+    delta = {"species": species, "fish_yields": yields}
+    atomic_write(os.path.join(output_dir, "delta.json"), json.dumps({
+        table: {
+            "inserted": [list(row[:len(YIELD_KEY_COLUMNS) if table == "fish_yields" else 1]) for row in d.inserted],
+            "updated": [list(row[:len(YIELD_KEY_COLUMNS) if table == "fish_yields" else 1]) for row in d.updated],
+            "deleted": [list(key) if table == "fish_yields" else [key] for key in d.deleted],
+        }
+        for table, d in delta.items()
+    }, indent=1, ensure_ascii=False) + "\n")
+    return delta
+
+
+# ---- SQLite stand-in ----
+
+def apply_sqlite(conn, output_dir, full=False):
+    """Apply apply_delta.sql's statements (or load_all.sql's, if full) to a SQLite database."""
+    def rows(name):
+        return read_csv(os.path.join(output_dir, name))
+
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SQLITE_SCHEMA)
+    with conn:
+        conn.executemany(
+            "INSERT INTO species (name, scientific_name, category) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET scientific_name = excluded.scientific_name, "
+            "category = excluded.category",
+            rows("species.csv" if full else "species_upsert.csv"),
+        )
+        if not full:
+            conn.executemany(
+                "DELETE FROM fish_yields WHERE species_id = (SELECT id FROM species WHERE name = ?) "
+                "AND from_state = ? AND to_state = ?",
+                rows("fish_yields_delete.csv"),
+            )
+        conn.executemany(
+            "INSERT INTO fish_yields (species_id, from_state, to_state, yield_percent, range_min, range_max) "
+            "SELECT id, ?, ?, ?, ?, ? FROM species WHERE name = ? "
+            "ON CONFLICT (species_id, from_state, to_state) DO UPDATE SET "
+            "yield_percent = excluded.yield_percent, range_min = excluded.range_min, range_max = excluded.range_max",
+            [row[1:] + row[:1] for row in rows("fish_yields.csv" if full else "fish_yields_upsert.csv")],
+        )
+        if not full:
+            conn.executemany("DELETE FROM species WHERE name = ?", rows("species_delete.csv"))
+
+
+def table_contents(conn):
+    """Both tables with species ids replaced by names, for comparing databases."""
+    species = conn.execute("SELECT name, scientific_name, category FROM species ORDER BY name").fetchall()
+    yields = conn.execute(
+        "SELECT s.name, y.from_state, y.to_state, y.yield_percent, y.range_min, y.range_max "
+        "FROM fish_yields y JOIN species s ON s.id = y.species_id ORDER BY 1, 2, 3"
+    ).fetchall()
+    return species, yields
+
+
+def verify_sqlite(snapshot_path, output_dir):
+    """
+    True if loading the published snapshot and applying the delta gives the
+    same tables as loading the full export.
+    """
+    import tempfile
+
+    old = load_snapshot(snapshot_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_csv(os.path.join(tmp, "species.csv"), SPECIES_COLUMNS, sorted(old.species.values()))
+        write_csv(os.path.join(tmp, "fish_yields.csv"), YIELD_COLUMNS, sorted(old.yields.values()))
+        patched = sqlite3.connect(":memory:")
+        apply_sqlite(patched, tmp, full=True)
+    apply_sqlite(patched, output_dir)
+
+    fresh = sqlite3.connect(":memory:")
+    apply_sqlite(fresh, output_dir, full=True)
+    return table_contents(patched) == table_contents(fresh)
+
+
+def main(argv=None, prog=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog=prog, description="Export what changed in FISH_DATA_V3 since the last publish")
+    parser.add_argument("--dataset", default=FISH_DATA_V3_PATH)
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_PATH, help="Snapshot of the last published dataset")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--mark-published", action="store_true",
+                        help="Record this dataset as published once the delta has been loaded")
+    parser.add_argument("--verify-sqlite", action="store_true",
+                        help="Check the delta against a full load on an in-memory SQLite stand-in")
+    args = parser.parse_args(argv)
+
+    fish_data = load_fish_data_v3(args.dataset)
+    delta = export(fish_data, args.snapshot, args.output_dir)
+    for table, d in delta.items():
+        print(f"{table}: {len(d.inserted)} inserted, {len(d.updated)} updated, {len(d.deleted)} deleted")
+    print(f"Files written to {args.output_dir}")
+
+    if args.verify_sqlite:
+        if not verify_sqlite(args.snapshot, args.output_dir):
+            print("SQLite check failed: the delta doesn't reproduce the full load")
+            sys.exit(1)
+        print("SQLite check passed")
+    if args.mark_published:
+        write_snapshot(dataset_rows(fish_data), args.snapshot)
+        print(f"Published snapshot updated: {args.snapshot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Chunked, minified JS modules of the app's yield data.
+
+fish_data_v3.js is one large module that the app loads eagerly. emit() splits
+FISH_DATA_V3 into one ES module per category and writes a small entry module
+next to them:
+
+    index.js                 CATEGORIES {category: module file} and SEARCH_INDEX
+    salmon.1f0c9a3e.js       export default {species: data} for one category
+    ...
+
+The SEARCH_INDEX lets the app search species, scientific names and product
+forms before any category module is loaded:
+
+    {"categories": [...], "forms": [...],
+     "species": [[name, scientific name, category index, [form indexes]], ...]}
+
+Category modules are named after a hash of their content, so they can be
+served with immutable cache headers, and index.js changes whenever one of
+them does. Output is deterministic: the same data gives byte-identical files,
+including the .gz siblings (gzip with mtime 0). .br siblings are written when
+the brotli package is installed. Unchanged files aren't rewritten, and stale
+category modules from earlier runs are removed.
+
+    python emit_js.py --output-dir ../app/public/data
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+from extract_pdf import write_if_changed
+from js_data import FISH_DATA_V3_PATH, load_fish_data_v3, split_conversion_key
+
+DEFAULT_OUTPUT_DIR = os.path.join("data", "bundle")
+INDEX_NAME = "index.js"
+DEFAULT_CATEGORY = "Other"
+
+# Category modules emit() owns, and so may delete when they go stale
+CHUNK_NAME = re.compile(r"^[a-z0-9-]+\.[0-9a-f]{8}\.js(?:\.gz|\.br)?$")
+
+EmittedFile = namedtuple("EmittedFile", ["name", "size", "gzip_size", "brotli_size"])
+
+
+def minify(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def slugify(category):
+    return re.sub(r"[^a-z0-9]+", "-", category.lower()).strip("-") or "category"
+
+
+def split_by_category(fish_data):
+    """{category: {species: data}}, categories and species in first-seen order."""
+    chunks = {}
+    for species, data in fish_data.items():
+        chunks.setdefault(data.get("category") or DEFAULT_CATEGORY, {})[species] = data
+    return chunks
+
+
+def search_index(fish_data, categories):
+    """The compact SEARCH_INDEX for fish_data; categories fixes the category indexes."""
+    forms = sorted({
+        form
+        for data in fish_data.values()
+        for key in data.get("conversions", {})
+        for form in split_conversion_key(key)
+        if form
+    })
+    form_index = {form: i for i, form in enumerate(forms)}
+    category_index = {category: i for i, category in enumerate(categories)}
+    species = []
+    for name, data in fish_data.items():
+        species_forms = {
+            form_index[form]
+            for key in data.get("conversions", {})
+            for form in split_conversion_key(key)
+            if form
+        }
+        species.append([
+            name,
+            data.get("scientific_name") or "",
+            category_index[data.get("category") or DEFAULT_CATEGORY],
+            sorted(species_forms),
+        ])
+    return {"categories": list(categories), "forms": forms, "species": species}
+
+
+def render_modules(fish_data):
+    """{file name: module source} for the category modules and index.js."""
+    modules = {}
+    files = {}
+    chunks = split_by_category(fish_data)
+    for category, species in chunks.items():
+        source = f"export default {minify(species)};\n"
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:8]
+        name = f"{slugify(category)}.{digest}.js"
+        modules[name] = source
+        files[category] = name
+    modules[INDEX_NAME] = (
+        f"export const CATEGORIES={minify(files)};\n"
+        f"export const SEARCH_INDEX={minify(search_index(fish_data, list(chunks)))};\n"
+    )
+    return modules
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def emit(fish_data, output_dir=DEFAULT_OUTPUT_DIR, compress=True):
+    """Write the modules (and .gz/.br siblings) to output_dir; returns an EmittedFile per module."""
+    os.makedirs(output_dir, exist_ok=True)
+    brotli = _brotli() if compress else None
+    emitted = []
+    written = set()
+    for name, source in render_modules(fish_data).items():
+        data = source.encode("utf-8")
+        path = os.path.join(output_dir, name)
+        write_if_changed(path, data)
+        written.add(name)
+
+        gzip_size = brotli_size = None
+        if compress:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            write_if_changed(path + ".gz", compressed)
+            written.add(name + ".gz")
+            gzip_size = len(compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            write_if_changed(path + ".br", compressed)
+            written.add(name + ".br")
+            brotli_size = len(compressed)
+        emitted.append(EmittedFile(name, len(data), gzip_size, brotli_size))
+
+    for name in os.listdir(output_dir):
+        if name not in written and (CHUNK_NAME.match(name) or name.startswith(INDEX_NAME + ".")):
+            os.remove(os.path.join(output_dir, name))
+    return emitted
+
+
+def format_sizes(emitted, source_size=None):
+    def kb(size):
+        return "-" if size is None else f"{size / 1024:.1f} KB"
+
+    lines = [f"{'file':<28} {'raw':>10} {'gzip':>10} {'brotli':>10}"]
+    for f in emitted:
+        lines.append(f"{f.name:<28} {kb(f.size):>10} {kb(f.gzip_size):>10} {kb(f.brotli_size):>10}")
+    index = next(f for f in emitted if f.name == INDEX_NAME)
+    lines.append(f"first load (index.js): {kb(index.size)}, {kb(index.gzip_size)} gzipped")
+    if source_size is not None:
+        lines.append(f"source module: {kb(source_size)}")
+    return "\n".join(lines)
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Write FISH_DATA_V3 as minified per-category JS modules")
+    parser.add_argument("--source", default=FISH_DATA_V3_PATH, help="JS module that exports FISH_DATA_V3")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--no-compress", action="store_true", help="Skip the .gz/.br siblings")
+    args = parser.parse_args(argv)
+
+    emitted = emit(load_fish_data_v3(args.source), args.output_dir, compress=not args.no_compress)
+    print(format_sizes(emitted, os.path.getsize(args.source)))
+    if not args.no_compress and _brotli() is None:
+        print("brotli is not installed; no .br files were written")
+
+
+if __name__ == "__main__":
+    main()
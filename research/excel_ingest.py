@@ -0,0 +1,244 @@
+"""
+Shared, read-once ingestion of the NHCS yields workbook.
+
+read_workbook() opens an .xlsx once in openpyxl's read-only mode and streams
+every sheet's rows in a single pass. The rows go through the same cell
+conversion and pandas TextParser step as pd.read_excel, so the frames (and
+their dtypes) match what read_excel returns, except that column names have
+their whitespace normalized (" Common  name " -> "Common name").
+
+load_workbook() and load_sheet() put a columnar cache in front of that,
+keyed by the file's SHA-256: one uncompressed .npz per workbook, holding
+each column as numpy arrays, loaded without pickle. A workbook that hasn't
+changed is loaded from the cache in milliseconds instead of being parsed
+again, by every script that reads it:
+
+    from excel_ingest import load_sheet
+    df = load_sheet()                    # Sheet1 of datasets/% Yields NHCS.xlsx
+
+Object columns are stored cell by cell as a kind code plus a float and a
+text array. A workbook with a cell type the cache can't represent (other
+than numbers, bools, strings, dates and times) is read but not cached.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = ".excel_cache"
+NHCS_WORKBOOK = os.path.join("datasets", "% Yields NHCS.xlsx")
+
+# Bumped whenever the cache layout changes, so old files are never misread
+CACHE_VERSION = 1
+
+# Object column cell kinds
+MISSING, INT, FLOAT, BOOL, TEXT, DATETIME, TIME = range(7)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def normalize_column_name(name):
+    return " ".join(name.split()) if isinstance(name, str) else name
+
+
+def _sheet_rows(sheet):
+    # The same cell conversion and trimming pandas applies to openpyxl sheets
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    def convert(cell):
+        value = cell.value
+        if value is None:
+            return ""
+        if cell.data_type == TYPE_ERROR:
+            return np.nan
+        if cell.data_type == TYPE_NUMERIC:
+            whole = int(value)
+            return whole if whole == value else float(value)
+        return value
+
+    rows = []
+    last_with_data = -1
+    for number, row in enumerate(sheet.rows):
+        converted = [convert(cell) for cell in row]
+        while converted and converted[-1] == "":
+            converted.pop()
+        if converted:
+            last_with_data = number
+        rows.append(converted)
+    rows = rows[:last_with_data + 1]
+    if rows:
+        width = max(len(row) for row in rows)
+        rows = [row + [""] * (width - len(row)) for row in rows]
+    return rows
+
+
+def _frame(rows):
+    import pandas as pd
+    from pandas.errors import EmptyDataError
+    from pandas.io.parsers import TextParser
+
+    if not rows:
+        return pd.DataFrame()
+    try:
+        df = TextParser(rows, header=0, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+    names = []
+    for column in df.columns:
+        name = normalize_column_name(column)
+        base, n = name, 0
+        while name in names:
+            n += 1
+            name = f"{base}.{n}"
+        names.append(name)
+    df.columns = names
+    return df
+
+
+def read_workbook(path):
+    """{sheet name: DataFrame} for every worksheet, from one read-only pass over the file."""
+    from openpyxl import load_workbook as open_workbook
+
+    book = open_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        frames = {}
+        for sheet in book.worksheets:
+            sheet.reset_dimensions()
+            frames[sheet.title] = _frame(_sheet_rows(sheet))
+        return frames
+    finally:
+        book.close()
+
+
+def _encode_column(column):
+    """{array name: array} for one column; raises TypeError for cells the cache can't hold."""
+    if column.dtype.kind in "biufmM":
+        values = column.to_numpy()
+        # Never write object arrays; they would need pickle to load
+        if values.dtype != object:
+            return {"values": values}
+
+    n = len(column)
+    kind = np.zeros(n, dtype=np.int8)
+    number = np.full(n, np.nan)
+    text = [""] * n
+    for i, value in enumerate(column.tolist()):
+        if isinstance(value, bool):
+            kind[i], number[i] = BOOL, value
+        elif isinstance(value, int):
+            if not -2 ** 53 <= value <= 2 ** 53:
+                raise TypeError(f"integer {value} doesn't fit a float64")
+            kind[i], number[i] = INT, value
+        elif isinstance(value, float):
+            kind[i], number[i] = (MISSING, np.nan) if value != value else (FLOAT, value)
+        elif isinstance(value, str):
+            kind[i], text[i] = TEXT, value
+        elif isinstance(value, datetime.datetime):
+            kind[i], text[i] = DATETIME, value.isoformat()
+        elif isinstance(value, datetime.time):
+            kind[i], text[i] = TIME, value.isoformat()
+        elif value is not None:
+            raise TypeError(f"can't cache a {type(value).__name__} cell")
+    return {"kind": kind, "number": number, "text": np.array(text, dtype=str)}
+
+
+def _decode_column(arrays, dtype):
+    import pandas as pd
+
+    if "values" in arrays:
+        return pd.Series(arrays["values"])
+
+    kind, number, text = arrays["kind"], arrays["number"], arrays["text"]
+    values = np.full(len(kind), np.nan, dtype=object)
+    for code, convert in ((INT, int), (FLOAT, float), (BOOL, bool)):
+        mask = kind == code
+        if mask.any():
+            values[mask] = [convert(v) for v in number[mask].tolist()]
+    mask = kind == TEXT
+    if mask.any():
+        values[mask] = text[mask].tolist()
+    for code, parse in ((DATETIME, datetime.datetime.fromisoformat), (TIME, datetime.time.fromisoformat)):
+        mask = kind == code
+        if mask.any():
+            values[mask] = [parse(v) for v in text[mask].tolist()]
+    if dtype == "object":
+        return pd.Series(values, dtype=object)
+    return pd.Series(values, dtype=pd.api.types.pandas_dtype(dtype))
+
+
+def write_cache(path, frames):
+    """Store frames as an .npz at path; returns False if a cell type can't be stored."""
+    arrays = {}
+    manifest = {"version": CACHE_VERSION, "sheets": []}
+    try:
+        for s, (sheet, df) in enumerate(frames.items()):
+            columns = []
+            for c, name in enumerate(df.columns):
+                encoded = _encode_column(df[name])
+                for key, array in encoded.items():
+                    arrays[f"s{s}c{c}.{key}"] = array
+                columns.append([name, str(df[name].dtype), sorted(encoded)])
+            manifest["sheets"].append([sheet, len(df), columns])
+        arrays["manifest"] = np.array(json.dumps(manifest))
+    except TypeError:
+        return False
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return True
+
+
+def read_cache(path):
+    """The frames stored by write_cache(), or None if the file isn't a current cache."""
+    import pandas as pd
+
+    with np.load(path, allow_pickle=False) as stored:
+        manifest = json.loads(str(stored["manifest"]))
+        if manifest.get("version") != CACHE_VERSION:
+            return None
+        frames = {}
+        for s, (sheet, length, columns) in enumerate(manifest["sheets"]):
+            data = {}
+            for c, (name, dtype, keys) in enumerate(columns):
+                data[name] = _decode_column({key: stored[f"s{s}c{c}.{key}"] for key in keys}, dtype)
+            frames[sheet] = pd.DataFrame(data, index=pd.RangeIndex(length)) if columns else pd.DataFrame()
+        return frames
+
+
+def cache_path(path, cache_dir=DEFAULT_CACHE_DIR):
+    return os.path.join(cache_dir, file_hash(path) + ".npz")
+
+
+def load_workbook(path=NHCS_WORKBOOK, cache_dir=DEFAULT_CACHE_DIR):
+    """read_workbook(), served from the columnar cache when the file is unchanged."""
+    cached = cache_path(path, cache_dir) if cache_dir else None
+    if cached and os.path.exists(cached):
+        frames = read_cache(cached)
+        if frames is not None:
+            return frames
+    frames = read_workbook(path)
+    if cached:
+        write_cache(cached, frames)
+    return frames
+
+
+def load_sheet(path=NHCS_WORKBOOK, sheet="Sheet1", cache_dir=DEFAULT_CACHE_DIR):
+    frames = load_workbook(path, cache_dir)
+    if sheet not in frames:
+        raise ValueError(f"Worksheet named '{sheet}' not found")
+    return frames[sheet]
@@ -1,7 +1,15 @@
-import PyPDF2
-import sys
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import active, add_metrics_arguments, metrics_from_args
+
+DEFAULT_CACHE_DIR = ".extract_cache"
 
 def extract_text(pdf_path, output_path):
+    import PyPDF2
+
     try:
         with open(pdf_path, 'rb') as file:
             reader = PyPDF2.PdfReader(file)
@@ -16,8 +24,187 @@ def extract_text(pdf_path, output_path):
     except Exception as e:
         print(f"Error: {e}")
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python extract_pdf.py <pdf_path> <output_path>")
+def parse_page_range(spec, page_count):
+    """Turn a spec like "1-5,8,12-" into sorted 0-based page indices."""
+    if not spec:
+        return list(range(page_count))
+
+    indices = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            start = int(start) if start else 1
+            end = int(end) if end else page_count
+        else:
+            start = end = int(part)
+        if start < 1 or end > page_count or start > end:
+            raise ValueError(f"Page range '{part}' is outside 1-{page_count}")
+        indices.update(range(start - 1, end))
+    return sorted(indices)
+
+def page_fingerprint(pdf_hash, page):
+    # Key each page by its own content stream and resources so that an
+    # appended or edited page doesn't invalidate the rest of the bulletin.
+    # The text depends on the fonts (and their ToUnicode maps) as much as on
+    # the content stream, so the same stream in another bulletin with other
+    # fonts is another key. Pages without a content stream, or whose
+    # resources can't be read, fall back to the hash of the whole file.
+    contents = page.get_contents()
+    if contents is None:
+        return pdf_hash
+    h = hashlib.sha256(contents.get_data())
+    try:
+        _hash_pdf_object(h, page.raw_get("/Resources") if "/Resources" in page else None, set())
+    except Exception:
+        h.update(pdf_hash.encode())
+    return h.hexdigest()
+
+def _hash_pdf_object(h, obj, seen):
+    # Hash a PDF object by value, following references; object numbers
+    # differ between files, so they aren't part of the hash
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+    if isinstance(obj, IndirectObject):
+        if obj.idnum in seen:
+            h.update(b"<seen>")
+            return
+        seen.add(obj.idnum)
+        obj = obj.get_object()
+    if isinstance(obj, DictionaryObject):
+        h.update(b"<<")
+        for key in sorted(obj):
+            if key != "/Parent":
+                h.update(key.encode())
+                _hash_pdf_object(h, obj.raw_get(key), seen)
+        h.update(b">>")
+        if isinstance(obj, StreamObject):
+            # The stored (encoded) bytes: PyPDF2 can't decode every image filter
+            h.update(obj._data)
+    elif isinstance(obj, ArrayObject):
+        h.update(b"[")
+        for item in obj:
+            _hash_pdf_object(h, item, seen)
+        h.update(b"]")
     else:
-        extract_text(sys.argv[1], sys.argv[2])
+        h.update(repr(obj).encode())
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# Each worker process opens the PDF once and keeps the reader around;
+# PdfReader objects can't be pickled across the pool.
+_worker_reader = None
+
+def _init_worker(pdf_path):
+    import PyPDF2
+
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(pdf_path)
+
+def _extract_page(page_index):
+    return page_index, _worker_reader.pages[page_index].extract_text()
+
+def write_if_changed(path, content):
+    """Atomically write content (str or bytes) unless path already holds it; returns whether it wrote."""
+    mode = 'b' if isinstance(content, bytes) else ''
+    if os.path.exists(path):
+        with open(path, 'r' + mode) as f:
+            if f.read() == content:
+                return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w' + mode) as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+def extract_text_parallel(pdf_path, output_path, pages=None, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Extract pages across a process pool, reusing cached text for pages whose
+    content stream and resources haven't changed since the last run. The output keeps the
+    same "--- Page N ---" layout that parse_data.py reads, and the file is
+    only rewritten when its content actually changes.
+    """
+    import PyPDF2
+
+    with active().stage("extract"):
+        reader = PyPDF2.PdfReader(pdf_path)
+        indices = parse_page_range(pages, len(reader.pages))
+        pdf_hash = file_hash(pdf_path)
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        texts = {}
+        keys = {}
+        pending = []
+        for i in indices:
+            key = page_fingerprint(pdf_hash, reader.pages[i])
+            keys[i] = key
+            cached = os.path.join(cache_dir, key + ".txt") if cache_dir else None
+            if cached and os.path.exists(cached):
+                with open(cached, 'r') as f:
+                    texts[i] = f.read()
+            else:
+                pending.append(i)
+
+        if pending:
+            if workers == 1 or len(pending) == 1:
+                _init_worker(pdf_path)
+                results = list(map(_extract_page, pending))
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_path,)) as pool:
+                    results = list(pool.map(_extract_page, pending, chunksize=max(1, len(pending) // 32)))
+            for i, text in results:
+                texts[i] = text
+                if cache_dir:
+                    write_if_changed(os.path.join(cache_dir, keys[i] + ".txt"), text)
+
+        content = "".join(f"--- Page {i+1} ---\n{texts[i]}\n\n" for i in indices)
+        changed = write_if_changed(output_path, content)
+
+    active().add("extract", {
+        "pages": len(indices), "pages_extracted": len(pending), "pages_cached": len(indices) - len(pending),
+    })
+    print(f"Extracted {len(pending)} of {len(indices)} pages ({len(indices) - len(pending)} cached)")
+    if changed:
+        print(f"Successfully extracted text to {output_path}")
+    else:
+        print(f"{output_path} is already up to date")
+    return content
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Extract text from a yield bulletin PDF")
+    parser.add_argument("pdf_path")
+    parser.add_argument("output_path")
+    parser.add_argument("--pages", help="Page range to extract, e.g. 1-5,8,12-")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Per-page text cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and don't update the page cache")
+    parser.add_argument("--serial", action="store_true", help="Use the original single-process extractor")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with metrics_from_args(args):
+        if args.serial:
+            extract_text(args.pdf_path, args.output_path)
+        else:
+            try:
+                extract_text_parallel(
+                    args.pdf_path, args.output_path,
+                    pages=args.pages,
+                    workers=args.workers,
+                    cache_dir=None if args.no_cache else args.cache_dir,
+                )
+            except Exception as e:
+                print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Canonical on-disk store for the research yield data.
+
+The Python tools used to read data/fish_data.js, split it on the
+PROFILES_DATA declaration, json.loads the whole thing and write it back on
+every run. They now read and update a small SQLite file instead; each update
+is a single transaction, and the JS module is regenerated from the store
+only when its content has actually changed.
+
+Each row remembers which source last wrote it ("pdf", "nhcs"). A tool that
+re-reads a whole source writes it with replace_source(), which also drops
+that source's rows that are no longer in it, as rewriting the JS file used
+to. Rows seeded from a legacy JS file have no source until one writes them.
+"""
+
+import json
+import os
+import sqlite3
+
+DEFAULT_STORE_PATH = "data/fish_data.sqlite"
+DEFAULT_JS_PATH = "data/fish_data.js"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    species TEXT NOT NULL,
+    product TEXT NOT NULL,
+    yield TEXT,
+    range TEXT,
+    source TEXT,
+    PRIMARY KEY (species, product)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def split_legacy_js(content):
+    """Split an old-style fish_data.js into (fish_data dict, PROFILES_DATA js)."""
+    parts = content.split(";\nconst PROFILES_DATA")
+    profiles_js = "const PROFILES_DATA" + parts[1] if len(parts) > 1 else ""
+
+    json_str = parts[0].replace("const FISH_DATA = ", "").strip()
+    if json_str.endswith(";"):
+        json_str = json_str[:-1]
+    return json.loads(json_str), profiles_js
+
+
+def render_js(fish_data, profiles_js=""):
+    return "const FISH_DATA = " + json.dumps(fish_data, indent=4) + ";\n" + profiles_js
+
+
+def atomic_write(path, content):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class FishStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(products)")]
+        if "source" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE products ADD COLUMN source TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- metadata ----
+
+    def _get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    @property
+    def revision(self):
+        return int(self._get_meta("revision", 0))
+
+    def _bump_revision(self):
+        self._set_meta("revision", str(self.revision + 1))
+
+    # ---- products ----
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM products LIMIT 1").fetchone() is None
+
+    def _upsert(self, rows, source):
+        self.conn.executemany(
+            "INSERT INTO products (species, product, yield, range, source) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (species, product) DO UPDATE SET yield = excluded.yield, range = excluded.range, "
+            "source = coalesce(excluded.source, source) "
+            "WHERE yield IS NOT excluded.yield OR range IS NOT excluded.range "
+            "OR (excluded.source IS NOT NULL AND source IS NOT excluded.source)",
+            ((*row, source) for row in rows),
+        )
+
+    def upsert_products(self, rows, source=None):
+        """
+        Insert or update (species, product, yield, range) rows in one
+        transaction. Unchanged rows are left alone; returns the number of
+        rows that were inserted or changed.
+        """
+        with self.conn:
+            before = self.conn.total_changes
+            self._upsert(rows, source)
+            changed = self.conn.total_changes - before
+            if changed:
+                self._bump_revision()
+        return changed
+
+    def replace_source(self, source, rows):
+        """
+        Make rows the whole of source's data in one transaction: upsert them
+        and delete the rows source wrote before that aren't among them.
+        Returns the number of rows inserted, changed or deleted.
+        """
+        keys = set()
+
+        def tracked():
+            for row in rows:
+                keys.add((row[0], row[1]))
+                yield row
+
+        with self.conn:
+            before = self.conn.total_changes
+            self._upsert(tracked(), source)
+            stale = [
+                key for key in self.conn.execute(
+                    "SELECT species, product FROM products WHERE source = ?", (source,)
+                )
+                if key not in keys
+            ]
+            self.conn.executemany("DELETE FROM products WHERE species = ? AND product = ?", stale)
+            changed = self.conn.total_changes - before
+            if changed:
+                self._bump_revision()
+        return changed
+
+    def fish_data(self):
+        """The store as the nested {species: {product: {yield, range}}} dict."""
+        fish_data = {}
+        # rowid keeps first-insertion order, which upserts don't disturb
+        for species, product, yield_val, range_val in self.conn.execute(
+            "SELECT species, product, yield, range FROM products ORDER BY rowid"
+        ):
+            fish_data.setdefault(species, {})[product] = {"yield": yield_val, "range": range_val}
+        return fish_data
+
+    # ---- profiles ----
+
+    @property
+    def profiles_js(self):
+        return self._get_meta("profiles_js", "")
+
+    def set_profiles_js(self, profiles_js):
+        with self.conn:
+            if profiles_js != self.profiles_js:
+                self._set_meta("profiles_js", profiles_js)
+                self._bump_revision()
+
+    # ---- legacy JS ----
+
+    def import_js(self, js_path=DEFAULT_JS_PATH):
+        """Seed the store from an existing fish_data.js (one-time migration)."""
+        with open(js_path, "r") as f:
+            fish_data, profiles_js = split_legacy_js(f.read())
+        self.upsert_products(
+            (species, product, entry.get("yield"), entry.get("range"))
+            for species, products in fish_data.items()
+            for product, entry in products.items()
+        )
+        self.set_profiles_js(profiles_js)
+
+    def export_js(self, js_path=DEFAULT_JS_PATH):
+        """
+        Regenerate the JS module if the store changed since the last export
+        (or the file is missing). Returns True when the file was written.
+        """
+        revision = self.revision
+        if os.path.exists(js_path) and self._get_meta("js_revision") == str(revision):
+            return False
+        atomic_write(js_path, render_js(self.fish_data(), self.profiles_js))
+        with self.conn:
+            self._set_meta("js_revision", str(revision))
+        return True
+
+
+def open_store(path=DEFAULT_STORE_PATH, js_path=DEFAULT_JS_PATH):
+    """Open the store, seeding it from the legacy JS file on first use."""
+    store = FishStore(path)
+    if store.is_empty() and os.path.exists(js_path):
+        store.import_js(js_path)
+        with store.conn:
+            store._set_meta("js_revision", str(store.revision))
+    return store
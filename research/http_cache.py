@@ -0,0 +1,207 @@
+"""
+Persistent conditional-request cache for the profile scraper.
+
+Responses are stored on disk (SQLite) by URL together with their ETag and
+Last-Modified validators. Later fetches send If-None-Match /
+If-Modified-Since, and a 304 reuses both the stored body and whatever the
+caller parsed out of it last time, so unchanged pages cost one tiny request.
+Entries are evicted by age and by total size (least recently used first),
+and offline mode serves only from the cache.
+"""
+
+import codecs
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from metrics import active
+
+DEFAULT_CACHE_PATH = "data/http_cache.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body TEXT NOT NULL,
+    parsed TEXT,
+    size INTEGER NOT NULL,
+    validated_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+"""
+
+# text: response body; not_modified: served from cache after a 304 or in
+# offline mode; parsed: what set_parsed() stored for this body, if anything
+CachedResponse = namedtuple("CachedResponse", ["url", "text", "not_modified", "parsed"])
+
+
+def read_body(response, consume=None, chunk_size=8192, read_all=False):
+    """
+    Read a (streamed) response body. With consume, each decoded chunk is
+    passed to it and reading stops as soon as it returns True; the part
+    read so far is returned. With read_all the rest is still read (without
+    consume), for a caller that keeps the whole body.
+    """
+    if consume is None:
+        return response.text
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    parts = []
+    try:
+        chunks = response.iter_content(chunk_size)
+        for raw in chunks:
+            chunk = decoder.decode(raw)
+            parts.append(chunk)
+            if consume(chunk):
+                if read_all:
+                    parts.extend(decoder.decode(raw) for raw in chunks)
+                    parts.append(decoder.decode(b"", final=True))
+                break
+        else:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                parts.append(tail)
+                consume(tail)
+    finally:
+        response.close()
+    return "".join(parts)
+
+
+def record_request(start, size, not_modified=False):
+    """Count one HTTP request that started at perf_counter() `start` in the active metrics."""
+    metrics = active()
+    if metrics.enabled:
+        metrics.observe("http.latency", time.perf_counter() - start)
+        metrics.add("http", {"requests": 1, "bytes": size, "not_modified": int(not_modified)})
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL isn't in the cache."""
+
+
+class HttpCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age=None, max_bytes=None, offline=False):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Shared by the scraper's worker threads; access is serialized by _lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _lookup(self, url):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT etag, last_modified, body, parsed, validated_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _hit(self, url, validated):
+        now = time.time()
+        with self._lock, self.conn:
+            self.hits += 1
+            if validated:
+                self.conn.execute(
+                    "UPDATE responses SET validated_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+                )
+            else:
+                self.conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+
+    def get(self, session, url, timeout=30, before_request=None, consume=None):
+        """
+        Fetch url through the cache. before_request, if given, is called
+        right before any network request (used for rate limiting). consume
+        streams a freshly downloaded body, see read_body(); the rest of
+        the body is still downloaded, so the whole page is cached.
+        """
+        row = self._lookup(url)
+        if row and self.max_age is not None and time.time() - row[4] > self.max_age:
+            row = None
+
+        if self.offline:
+            if row is None:
+                raise CacheMiss(url)
+            self._hit(url, validated=False)
+            return CachedResponse(url, row[2], True, _loads(row[3]))
+
+        headers = {}
+        if row:
+            if row[0]:
+                headers["If-None-Match"] = row[0]
+            if row[1]:
+                headers["If-Modified-Since"] = row[1]
+
+        if before_request:
+            before_request(url)
+        start = time.perf_counter()
+        r = session.get(url, headers=headers, timeout=timeout, stream=consume is not None)
+
+        if r.status_code == 304 and row:
+            record_request(start, 0, not_modified=True)
+            self._hit(url, validated=True)
+            return CachedResponse(url, row[2], True, _loads(row[3]))
+
+        r.raise_for_status()
+        # Read to the end even once consume has what it needs: a cut-short
+        # body would be served as the page after a 304 or offline
+        body = read_body(r, consume, read_all=True)
+        record_request(start, len(body.encode()))
+        now = time.time()
+        with self._lock, self.conn:
+            self.misses += 1
+            self.conn.execute(
+                "INSERT INTO responses (url, etag, last_modified, body, parsed, size, validated_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                "body = excluded.body, parsed = NULL, size = excluded.size, "
+                "validated_at = excluded.validated_at, accessed_at = excluded.accessed_at",
+                (url, r.headers.get("ETag"), r.headers.get("Last-Modified"), body, len(body.encode()), now, now),
+            )
+        return CachedResponse(url, body, False, None)
+
+    def set_parsed(self, url, parsed):
+        """Remember what was parsed out of the cached body for url."""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE responses SET parsed = ? WHERE url = ?", (json.dumps(parsed), url))
+
+    def evict(self):
+        """Drop entries past max_age, then least recently used ones past max_bytes."""
+        removed = 0
+        with self._lock, self.conn:
+            if self.max_age is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM responses WHERE validated_at < ?", (time.time() - self.max_age,)
+                ).rowcount
+            if self.max_bytes is not None:
+                total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    stale = []
+                    for url, size in self.conn.execute("SELECT url, size FROM responses ORDER BY accessed_at"):
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((url,))
+                        total -= size
+                    self.conn.executemany("DELETE FROM responses WHERE url = ?", stale)
+                    removed += len(stale)
+        return removed
+
+
+def _loads(parsed):
+    return json.loads(parsed) if parsed is not None else None
@@ -1,11 +1,10 @@
-import pandas as pd
+from excel_ingest import NHCS_WORKBOOK, load_workbook
 
 try:
-    xl = pd.ExcelFile("datasets/% Yields NHCS.xlsx")
-    print("Sheet names:", xl.sheet_names)
-    for sheet in xl.sheet_names:
+    sheets = load_workbook(NHCS_WORKBOOK)
+    print("Sheet names:", list(sheets))
+    for sheet, df in sheets.items():
         print(f"--- {sheet} ---")
-        df = pd.read_excel("datasets/% Yields NHCS.xlsx", sheet_name=sheet)
         print(df.head().to_string())
 except Exception as e:
     print(e)
@@ -0,0 +1,167 @@
+"""
+Read the app's JS data modules from Python.
+
+app/src/data/fish_data_v3.js is hand-maintained JavaScript, not JSON: it has
+comments, unquoted keys and trailing commas. load_js_exports() finds each
+`export const NAME = <literal>` and parses the object/array literal with a
+small recursive-descent reader. Exports that are built by code rather than
+written as literals (the legacy FISH_DATA, the default export) are skipped.
+"""
+
+import json
+import os
+import re
+
+RESEARCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FISH_DATA_V3_PATH = os.path.join(RESEARCH_DIR, "..", "app", "src", "data", "fish_data_v3.js")
+
+EXPORT_PATTERN = re.compile(r'export\s+const\s+([A-Za-z_$][\w$]*)\s*=\s*')
+IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+NUMBER = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+KEYWORDS = {"null": None, "true": True, "false": False}
+
+
+class JsParseError(ValueError):
+    pass
+
+
+class _Reader:
+    def __init__(self, text, pos):
+        self.text = text
+        self.pos = pos
+
+    def skip(self):
+        text = self.text
+        while self.pos < len(text):
+            ch = text[self.pos]
+            if ch.isspace():
+                self.pos += 1
+            elif text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = len(text) if end < 0 else end + 1
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                if end < 0:
+                    raise JsParseError("Unterminated comment")
+                self.pos = end + 2
+            else:
+                break
+
+    def error(self, message):
+        line = self.text.count("\n", 0, self.pos) + 1
+        return JsParseError(f"{message} at line {line}")
+
+    def value(self):
+        self.skip()
+        ch = self.text[self.pos:self.pos + 1]
+        if ch == "{":
+            return self.object()
+        if ch == "[":
+            return self.array()
+        if ch in ("'", '"'):
+            return self.string()
+        m = NUMBER.match(self.text, self.pos)
+        if m:
+            self.pos = m.end()
+            literal = m.group(0)
+            return float(literal) if any(c in literal for c in ".eE") else int(literal)
+        m = IDENTIFIER.match(self.text, self.pos)
+        if m and m.group(0) in KEYWORDS:
+            self.pos = m.end()
+            return KEYWORDS[m.group(0)]
+        raise self.error("Unsupported JS value")
+
+    def string(self):
+        quote = self.text[self.pos]
+        end = self.pos + 1
+        while True:
+            end = self.text.find(quote, end)
+            if end < 0:
+                raise self.error("Unterminated string")
+            backslashes = 0
+            while self.text[end - 1 - backslashes] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                break
+            end += 1
+        raw = self.text[self.pos + 1:end]
+        self.pos = end + 1
+        if quote == "'":
+            raw = raw.replace("\\'", "'").replace('"', '\\"')
+        return json.loads('"' + raw + '"')
+
+    def key(self):
+        self.skip()
+        if self.text[self.pos] in ("'", '"'):
+            return self.string()
+        m = IDENTIFIER.match(self.text, self.pos) or NUMBER.match(self.text, self.pos)
+        if not m:
+            raise self.error("Expected object key")
+        self.pos = m.end()
+        return m.group(0)
+
+    def expect(self, ch):
+        self.skip()
+        if self.text[self.pos:self.pos + 1] != ch:
+            raise self.error(f"Expected '{ch}'")
+        self.pos += 1
+
+    def _closes(self, ch):
+        self.skip()
+        if self.text[self.pos:self.pos + 1] == ch:
+            self.pos += 1
+            return True
+        return False
+
+    def object(self):
+        self.expect("{")
+        result = {}
+        while not self._closes("}"):
+            key = self.key()
+            self.expect(":")
+            result[key] = self.value()
+            if not self._closes(","):
+                self.expect("}")
+                break
+        return result
+
+    def array(self):
+        self.expect("[")
+        result = []
+        while not self._closes("]"):
+            result.append(self.value())
+            if not self._closes(","):
+                self.expect("]")
+                break
+        return result
+
+
+def parse_js_literal(text, pos=0):
+    """Parse one JS object/array/scalar literal starting at pos."""
+    return _Reader(text, pos).value()
+
+
+def load_js_exports(path, names=None):
+    """Return {export name: value} for the literal `export const` declarations in a JS file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    exports = {}
+    for m in EXPORT_PATTERN.finditer(text):
+        name = m.group(1)
+        if names is not None and name not in names:
+            continue
+        if text[m.end():m.end() + 1] not in ("{", "[", "'", '"') and not text[m.end()].isdigit():
+            continue
+        exports[name] = parse_js_literal(text, m.end())
+    return exports
+
+
+def load_fish_data_v3(path=FISH_DATA_V3_PATH):
+    return load_js_exports(path, {"FISH_DATA_V3"})["FISH_DATA_V3"]
+
+
+def split_conversion_key(key):
+    """"Round → D/H-On" -> ("Round", "D/H-On")"""
+    from_state, _, to_state = key.partition(" → ")
+    return from_state, to_state
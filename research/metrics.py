@@ -0,0 +1,271 @@
+"""
+Run metrics for the ingestion scripts.
+
+Instrumented code asks for the active Metrics with active(). By default that
+is DISABLED, whose methods do nothing, and the per-line parse loop isn't
+touched at all: parse_data only wraps its generator stages in counting
+generators when metrics are enabled. Collection is switched on for a block
+of code with collect():
+
+    with collect(Metrics(profile=True)) as metrics:
+        parse_pdf_content("pdf_content.txt")
+    metrics.write("metrics.json")
+
+Metrics holds named counters ("parse.two_column"), observations summarized
+as count / total / min / max ("http.latency"), and per-stage wall time.
+With profile=True each outermost stage runs under cProfile and keeps its
+top functions by cumulative time; with trace_memory=True each stage records
+its tracemalloc peak and top allocation sites. tracemalloc is process-wide,
+so a stage's peak is the process's peak while it ran, including what
+overlapping stages (pipeline runs stages on threads) allocated meanwhile.
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+TOP_ENTRIES = 15
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self, profile=False, trace_memory=False, profile_dir=None):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.counters = Counter()
+        self.observations = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def add(self, prefix, counts):
+        """Add a mapping of counts under prefix ("ocr", {"hyphen": 3}) -> ocr.hyphen."""
+        with self._lock:
+            for key, n in counts.items():
+                self.counters[f"{prefix}.{key}"] += n
+
+    def observe(self, name, value):
+        with self._lock:
+            summary = self.observations.get(name)
+            if summary is None:
+                self.observations[name] = {"count": 1, "total": value, "min": value, "max": value}
+            else:
+                summary["count"] += 1
+                summary["total"] += value
+                summary["min"] = min(summary["min"], value)
+                summary["max"] = max(summary["max"], value)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block of work, profiling it too when it isn't nested in another stage."""
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        profiler = cProfile.Profile() if self.profile and depth == 0 else None
+        memory = _MEMORY.enter() if self.trace_memory else None
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+            self._local.depth = depth
+            record = {"seconds": elapsed}
+            if memory is not None:
+                peak, snapshot = _MEMORY.exit(memory)
+                if snapshot is not None:
+                    record["peak_bytes"] = peak
+                    record["top_allocations"] = _top_allocations(snapshot)
+            if profiler:
+                record["profile"] = _top_functions(profiler)
+                if self.profile_dir:
+                    profiler.dump_stats(f"{self.profile_dir}/{name}.prof")
+            with self._lock:
+                entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+                entry["calls"] += 1
+                entry["seconds"] += record.pop("seconds")
+                entry.update(record)
+
+    def as_dict(self):
+        with self._lock:
+            observations = {
+                name: {**summary, "mean": summary["total"] / summary["count"]}
+                for name, summary in self.observations.items()
+            }
+            return {
+                "counters": dict(sorted(self.counters.items())),
+                "observations": observations,
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+    def write(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json() + "\n")
+
+
+class _MemoryTracker:
+    """tracemalloc shared by every stage that traces memory, on any thread.
+
+    Tracing starts with the first open stage and stops after the last one
+    (unless it was already on). Peaks are kept per open stage: whenever a
+    stage opens or closes, the process peak since the last such event is
+    folded into every open stage before tracemalloc's peak is reset, so
+    one stage's reset never loses another's peak.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = {}  # token -> peak bytes so far
+        self._started = False
+
+    def _fold(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        for token, seen in self._open.items():
+            self._open[token] = max(seen, peak)
+        tracemalloc.reset_peak()
+
+    def enter(self):
+        """Open a stage; returns the token for exit()."""
+        token = object()
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+            self._fold()
+            self._open[token] = tracemalloc.get_traced_memory()[0]
+        return token
+
+    def exit(self, token):
+        """Close a stage: (its peak bytes, a snapshot), or (None, None) if tracing was stopped elsewhere."""
+        with self._lock:
+            peak, snapshot = None, None
+            if tracemalloc.is_tracing():
+                self._fold()
+                peak = self._open[token]
+                snapshot = tracemalloc.take_snapshot()
+            del self._open[token]
+            if not self._open and self._started:
+                tracemalloc.stop()
+                self._started = False
+            return peak, snapshot
+
+
+# tracemalloc is process-wide, so there is one tracker for every Metrics
+_MEMORY = _MemoryTracker()
+
+
+class _DisabledMetrics(Metrics):
+    enabled = False
+
+    def __init__(self):
+        super().__init__()
+
+    def incr(self, name, n=1):
+        pass
+
+    def add(self, prefix, counts):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        yield self
+
+
+DISABLED = _DisabledMetrics()
+_active = DISABLED
+
+
+def active():
+    return _active
+
+
+@contextlib.contextmanager
+def collect(metrics=None):
+    """Make metrics (a new Metrics by default) the active one for the block."""
+    global _active
+    previous = _active
+    _active = metrics if metrics is not None else Metrics()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def staged(name):
+    """Decorator: run every call of the function as stage `name` of the active metrics."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _active.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _top_functions(profiler):
+    # pstats alone doubles this module's import time, and is only needed with --profile
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_ENTRIES]
+    return [
+        {
+            "function": f"{filename}:{line}({function})",
+            "calls": calls,
+            "total_seconds": round(total, 6),
+            "cumulative_seconds": round(cumulative, 6),
+        }
+        for (filename, line, function), (_, calls, total, cumulative, _) in rows
+    ]
+
+
+def _top_allocations(snapshot):
+    return [
+        {"location": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+        for stat in snapshot.statistics("lineno")[:TOP_ENTRIES]
+    ]
+
+
+def add_metrics_arguments(parser):
+    """The --metrics / --profile / --trace-memory options shared by the scripts."""
+    parser.add_argument("--metrics", metavar="PATH", help="Write run metrics as JSON to PATH")
+    parser.add_argument("--profile", action="store_true", help="Include cProfile top functions per stage")
+    parser.add_argument("--trace-memory", action="store_true", help="Include tracemalloc peaks per stage")
+    parser.add_argument("--profile-dir", help="Also dump each stage's cProfile stats to DIR/<stage>.prof")
+
+
+@contextlib.contextmanager
+def metrics_from_args(args):
+    """collect() as configured by add_metrics_arguments() options; writes the JSON on exit."""
+    if not (args.metrics or args.profile or args.trace_memory or args.profile_dir):
+        yield DISABLED
+        return
+    metrics = Metrics(args.profile or bool(args.profile_dir), args.trace_memory, args.profile_dir)
+    with collect(metrics):
+        try:
+            yield metrics
+        finally:
+            if args.metrics:
+                metrics.write(args.metrics)
+            else:
+                print(metrics.to_json(), file=sys.stderr)
@@ -0,0 +1,325 @@
+"""
+Species-name resolution for merging external sources into the dataset.
+
+Every source spells species its own way: the bulletin has "Cod, Pacific"
+and bare column headers like "Chinook", the NHCS workbook has whatever was
+typed into "Common name", profile pages have URL slugs. fish_data_v3.js
+calls the same fish "Pacific Cod". NameIndex maps incoming names onto the
+dataset's canonical names, so merges stop creating near-duplicate species.
+
+The index holds the canonical names, scientific names and ALIASES, each
+normalized (case, accents, punctuation, "Family, Qualifier" order). A name
+resolves by, in order:
+
+    exact normalized match            confidence 1.0
+    same words in another order       confidence TOKEN_ORDER_CONFIDENCE
+    character trigram similarity      confidence up to 1.0
+
+Only the first two are trusted to merge data: canonical() maps a name onto
+the dataset only on an exact, scientific, alias or reordered match. A
+trigram match is just a suggestion (suggest()), since near spellings are
+often different species: "Atlantic Mackerel" is not "Atka Mackerel", nor
+"Sea Scallop" the dataset's "Scallops". Names that are known to be the
+same species but spelled differently go in ALIASES.
+
+Trigrams go through an inverted index, so a lookup only scores the entries
+that share a trigram with the name. The trigram score averages how much of
+the name the entry covers with the Dice coefficient of the two trigram
+sets. It is scaled down when the runner-up (a different species) scores
+almost as well, so "Chinook" suggests "Chinook Salmon" but a bare
+"Salmon" or "Rockfish" doesn't suggest any one of them.
+
+load_index() caches the built index as JSON under .name_index_cache, keyed
+by the SHA-256 of the dataset and the aliases, so a cache hit doesn't parse
+the JS module at all:
+
+    from name_index import default_index
+    default_index().canonical("Cod, Pacific")     # "Pacific Cod"
+    default_index().canonical("Atlantic Mackerel")  # "Atlantic Mackerel", unchanged
+    default_index().suggest("Atlantic Mackerel")    # Match("Atka Mackerel", 0.6, ...)
+
+    python name_index.py "Cod, Pacific" Chinook
+    python name_index.py --stdin < upload_names.txt
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+from fish_store import atomic_write
+from js_data import FISH_DATA_V3_PATH, load_fish_data_v3
+
+DEFAULT_CACHE_DIR = ".name_index_cache"
+
+# Bumped whenever normalization or the cache layout changes
+INDEX_VERSION = 1
+
+# Trigram matches below this aren't worth suggesting
+DEFAULT_MIN_CONFIDENCE = 0.6
+TOKEN_ORDER_CONFIDENCE = 0.95
+# Runner-up trigram scores within this of the best make a match ambiguous
+AMBIGUITY_MARGIN = 0.1
+
+# Trade and regional names that normalization and trigrams can't work out
+ALIASES = {
+    "Black Cod": "Sablefish",
+    "Alaska Pollock": "Walleye Pollock",
+    "Pollock": "Walleye Pollock",
+    "King Salmon": "Chinook Salmon",
+    "Red Salmon": "Sockeye Salmon",
+    "Blueback Salmon": "Sockeye Salmon",
+    "Silver Salmon": "Coho Salmon",
+    "Dog Salmon": "Chum Salmon",
+    "Keta Salmon": "Chum Salmon",
+    "Humpback Salmon": "Pink Salmon",
+    "Greenland Halibut": "Greenland Turbot",
+    "Sanddab": "Dabs",
+    "Dogfish": "Spiny Dogfish",
+    "Red King Crab": "King Crab (Red/Brown/Golden)",
+    "Brown King Crab": "King Crab (Red/Brown/Golden)",
+    "Golden King Crab": "King Crab (Red/Brown/Golden)",
+    "Snow Crab": "Tanner Crab",
+    "Pacific Whiting": "Pacific Hake",
+    "POP": "Pacific Ocean Perch",
+    "Tope": "Soupfin Shark",
+    # MAB-37 headers that are a qualifier printed under their family's header
+    "Pink": "Pink Salmon",
+    "Chinook": "Chinook Salmon",
+    "Sockeye": "Sockeye Salmon",
+    "Coho": "Coho Salmon",
+    "Chum": "Chum Salmon",
+    "Dungeness": "Dungeness Crab",
+    "Tanner": "Tanner Crab",
+    "Arrowtooth": "Arrowtooth Flounder",
+    "Starry": "Starry Flounder",
+}
+
+# One resolution; matched is the index entry's text, via "name", "scientific" or "alias"
+Match = namedtuple("Match", ["name", "confidence", "matched", "via"])
+
+
+def normalize_name(name):
+    """"Cod, Pacific", "PACIFIC  cod" and "Pacific Cod." all become "pacific cod"."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = " ".join(name.split())
+    if ", " in name:
+        family, _, qualifier = name.partition(", ")
+        name = f"{qualifier} {family}"
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name.lower()).split())
+
+
+def token_key(normalized):
+    return " ".join(sorted(normalized.split()))
+
+
+def trigrams(normalized):
+    """Character trigrams of each word, padded so word starts and ends count."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"${word}$"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    def __init__(self, entries):
+        """entries: (text, canonical name, via) triples; on a collision the first entry wins."""
+        self.entries = []
+        self._exact = {}
+        self._tokens = {}
+        self._postings = {}
+        self._sizes = []
+        self._memo = {}
+        for text, canonical, via in entries:
+            key = normalize_name(text)
+            if not key:
+                continue
+            i = len(self.entries)
+            self.entries.append((text, canonical, via))
+            self._exact.setdefault(key, i)
+            self._tokens.setdefault(token_key(key), i)
+            grams = trigrams(key)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+    @classmethod
+    def from_dataset(cls, fish_data, aliases=ALIASES):
+        """Index a FISH_DATA_V3 dict's names and scientific names, plus the aliases of its species."""
+        entries = [(name, name, "name") for name in fish_data]
+        entries += [
+            (data["scientific_name"], name, "scientific")
+            for name, data in fish_data.items()
+            if data.get("scientific_name")
+        ]
+        entries += [(alias, name, "alias") for alias, name in aliases.items() if name in fish_data]
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def state(self):
+        """JSON-able contents, for from_state()."""
+        return {
+            "entries": self.entries,
+            "exact": self._exact,
+            "tokens": self._tokens,
+            "postings": self._postings,
+            "sizes": self._sizes,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls(())
+        index.entries = [tuple(entry) for entry in state["entries"]]
+        index._exact = state["exact"]
+        index._tokens = state["tokens"]
+        index._postings = state["postings"]
+        index._sizes = state["sizes"]
+        return index
+
+    def _match(self, i, confidence):
+        text, canonical, via = self.entries[i]
+        return Match(canonical, round(confidence, 3), text, via)
+
+    def resolve(self, name, fuzzy=True):
+        """The best Match for name, or None if nothing matches.
+
+        With fuzzy=False only exact and reordered matches count, not trigrams.
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        i = self._exact.get(key)
+        if i is not None:
+            return self._match(i, 1.0)
+        i = self._tokens.get(token_key(key))
+        if i is not None:
+            return self._match(i, TOKEN_ORDER_CONFIDENCE)
+        if not fuzzy:
+            return None
+
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                shared[i] += 1
+        # Best scoring entry per canonical name
+        best = {}
+        for i, n in shared.items():
+            score = (n / len(grams) + 2 * n / (len(grams) + self._sizes[i])) / 2
+            canonical = self.entries[i][1]
+            if canonical not in best or score > best[canonical][0]:
+                best[canonical] = (score, i)
+        if not best:
+            return None
+        ranked = sorted(best.values(), key=lambda item: (-item[0], item[1]))
+        score, i = ranked[0]
+        confidence = score
+        if len(ranked) > 1:
+            confidence *= min(1.0, (score - ranked[1][0]) / AMBIGUITY_MARGIN)
+        return self._match(i, confidence)
+
+    def canonical(self, name):
+        """The canonical name for name if it matches exactly, else name unchanged."""
+        if name not in self._memo:
+            match = self.resolve(name, fuzzy=False)
+            self._memo[name] = match.name if match else name
+        return self._memo[name]
+
+    def suggest(self, name, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        """The trigram Match worth reviewing for a name canonical() leaves unchanged, or None."""
+        if self.resolve(name, fuzzy=False) is not None:
+            return None
+        match = self.resolve(name)
+        return match if match and match.confidence >= min_confidence else None
+
+    def suggestions(self, names, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        """{name: Match} for the distinct names that were kept as given but look like a dataset species."""
+        found = {}
+        for name in dict.fromkeys(names):
+            match = self.suggest(name, min_confidence)
+            if match:
+                found[name] = match
+        return found
+
+
+def report_suggestions(index, names):
+    """Print the names kept as given that look like a dataset species, for review; returns them."""
+    suggestions = index.suggestions(names)
+    if suggestions:
+        print(f"{len(suggestions)} species names were kept as given but look like dataset species "
+              "(add them to name_index.ALIASES if they're the same fish):")
+        for name, match in suggestions.items():
+            print(f"  {name} -> {match.name}? ({match.confidence:.2f})")
+    return suggestions
+
+
+def index_key(dataset_path, aliases=ALIASES):
+    digest = hashlib.sha256(f"v{INDEX_VERSION}\n".encode())
+    digest.update(json.dumps(aliases, sort_keys=True).encode("utf-8"))
+    with open(dataset_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_index(dataset_path=FISH_DATA_V3_PATH, aliases=ALIASES, cache_dir=DEFAULT_CACHE_DIR):
+    """NameIndex for a dataset, from the disk cache when the dataset and aliases are unchanged."""
+    cached = os.path.join(cache_dir, index_key(dataset_path, aliases) + ".json") if cache_dir else None
+    if cached and os.path.exists(cached):
+        try:
+            with open(cached, "r", encoding="utf-8") as f:
+                return NameIndex.from_state(json.load(f))
+        except (ValueError, KeyError):
+            pass
+    index = NameIndex.from_dataset(load_fish_data_v3(dataset_path), aliases)
+    if cached:
+        atomic_write(cached, json.dumps(index.state(), ensure_ascii=False))
+    return index
+
+
+@lru_cache(maxsize=4)
+def _open_index(dataset_path, size, mtime_ns):
+    return load_index(dataset_path)
+
+
+def default_index(dataset_path=FISH_DATA_V3_PATH):
+    """The shared NameIndex for dataset_path, reloaded if the file changes."""
+    stat = os.stat(dataset_path)
+    return _open_index(dataset_path, stat.st_size, stat.st_mtime_ns)
+
+
+def main(argv=None, prog=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog=prog, description="Resolve species names against the dataset's canonical names")
+    parser.add_argument("names", nargs="*")
+    parser.add_argument("--stdin", action="store_true", help="Also resolve one name per line from stdin")
+    parser.add_argument("--dataset", default=FISH_DATA_V3_PATH)
+    parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE,
+                        help="Lowest trigram match to suggest for an unresolved name")
+    args = parser.parse_args(argv)
+
+    index = load_index(args.dataset)
+    names = list(args.names)
+    if args.stdin:
+        names.extend(line.strip() for line in sys.stdin if line.strip())
+    for name in names:
+        match = index.resolve(name, fuzzy=False)
+        if match:
+            print(f"{name}\t{match.name}\t{match.confidence:.2f}\t{match.via}")
+            continue
+        suggestion = index.suggest(name, args.min_confidence)
+        hint = f"(suggest: {suggestion.name} {suggestion.confidence:.2f})" if suggestion else ""
+        print(f"{name}\t\t0.00\tunresolved {hint}".rstrip())
+
+
+if __name__ == "__main__":
+    main()
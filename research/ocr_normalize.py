@@ -0,0 +1,91 @@
+"""
+Table-driven OCR correction for the MAB-37 text extraction.
+
+Every known OCR misread is one row in OCR_RULES. The whole table is compiled
+into a single regex alternation, so each line is corrected in one pass no
+matter how many rules there are. Page headers and footers repeat on every
+page, so results are memoized per line, and each normalizer keeps a count of
+the corrections it applied by kind.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+# (OCR text, correction, kind)
+#
+# A correction must not turn a product into one its species already prints:
+# the store keeps one row per (species, product), so the later row would
+# replace the earlier. OIH, DIH and Ofl read for D/H and Off do exactly that
+# in MAB-37 (Lingcod "DIH-Off", Perch "Round DIH-On", Salmon "Round OIH-On"
+# and "D/H-On D/H-Ofl") and are left uncorrected.
+OCR_RULES = [
+    # Dressed/Head-On and Dressed/Head-Off prefixes
+    ("O/H", "D/H", "dressed_head"),
+    ("DJH", "D/H", "dressed_head"),
+    ("0/", "D/", "dressed_head"),
+    # "Off" suffix
+    ("Ofi", "Off", "head_off"),
+    ("QfI", "Off", "head_off"),
+    # Skinless/Boneless
+    ("SI B", "S/B", "skinless_boneless"),
+    # Hyphens read as middle dots ("Skin·On", "D/H·Off")
+    ("·", "-", "hyphen"),
+]
+
+
+class OcrNormalizer:
+    def __init__(self, rules=OCR_RULES, cache_size=4096):
+        self.rules = list(rules)
+        self._replacement = {}
+        self._kind = {}
+        for wrong, right, kind in self.rules:
+            self._replacement[wrong] = right
+            self._kind[wrong] = kind
+
+        # Longest first so that the alternation prefers the longest rule
+        # starting at a given position.
+        wrong_texts = sorted(self._replacement, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(w) for w in wrong_texts)) if wrong_texts else None
+        self._normalize_cached = lru_cache(maxsize=cache_size)(self._apply)
+        self.stats = Counter()
+
+    def _apply(self, text):
+        if self._pattern is None:
+            return text, ()
+        hits = Counter()
+
+        def replace(m):
+            wrong = m.group(0)
+            hits[self._kind[wrong]] += 1
+            return self._replacement[wrong]
+
+        return self._pattern.sub(replace, text), tuple(hits.items())
+
+    def normalize(self, text):
+        fixed, hits = self._normalize_cached(text)
+        for kind, count in hits:
+            self.stats[kind] += count
+        return fixed
+
+    def reset_stats(self):
+        self.stats.clear()
+
+    def variants(self, term):
+        """OCR spellings of a term, one rule substitution at a time."""
+        found = []
+        for wrong, right, _ in self.rules:
+            if right in term:
+                variant = term.replace(right, wrong)
+                if variant != term and variant not in found:
+                    found.append(variant)
+        return found
+
+
+DEFAULT_NORMALIZER = OcrNormalizer()
+
+def clean_ocr(text):
+    return DEFAULT_NORMALIZER.normalize(text)
+
+def ocr_variants(term):
+    return DEFAULT_NORMALIZER.variants(term)
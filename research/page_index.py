@@ -0,0 +1,228 @@
+"""
+Page index over the extracted MAB-37 text, for parsing one species at a time.
+
+PageIndex memory-maps pdf_content.txt and records the byte range of every
+"--- Page N ---" page, so any page can be sliced out without reading the
+rest of the file. A species' pages are found by searching the map for its
+name (and the OCR spellings of it) and mapping each hit to its page.
+get_species() then runs the parse_data chain over just those pages:
+
+    from page_index import get_species
+    get_species("Cod, Pacific")      # (Record(page=5, species="Cod, Pacific", ...), ...)
+
+The records are the same ones a full iter_records() pass attributes to the
+species. A species can only become a column's current species on a header
+line naming it, so a page that doesn't mention it can only continue a run
+that the previous page ended with it still current. Each run is parsed
+from the first page that mentions the species and stops at the first page
+boundary where the species is no longer current and the next page doesn't
+mention it.
+
+Results are kept in an LRU cache per index; the module-level get_species()
+keeps one index per path and rebuilds it when the file changes.
+
+The table of contents (TOC) is parsed too, into {name: (first, last)}. Its
+page numbers are the bulletin's own printed numbers, two to a PDF page
+with OCR damage, so they are kept for reference rather than used to locate
+species.
+"""
+
+import io
+import mmap
+import os
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+
+from ocr_normalize import DEFAULT_NORMALIZER
+from parse_data import SPECIES_MATCHER, classify_lines, clean_lines, emit_records, split_columns, split_pages
+
+PDF_CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_content.txt")
+
+PAGE_MARKER_BYTES = re.compile(rb"--- Page (\d+) ---")
+
+# "Sablefish 11", "Pink 11-12", possibly several per OCR'd TOC line
+TOC_ENTRY = re.compile(r"([A-Z][A-Za-z ,()'-]*?[A-Za-z)])\s*\.*\s+(\d{1,3})(?:-(\d{1,3}))?(?=\s|$)")
+
+# One page of the text file: its marker number (0 before the first marker)
+# and its [start, end) byte range, marker line included
+Page = namedtuple("Page", ["number", "start", "end"])
+
+
+def parse_toc(text):
+    """{name: (first page, last page)} for the TOC entries that kept their page numbers."""
+    toc = {}
+    for line in text.splitlines():
+        # Page markers and running heads aren't entries
+        if "--- Page" in line or "Recoveries" in line:
+            continue
+        for m in TOC_ENTRY.finditer(line.strip()):
+            first = int(m.group(2))
+            last = int(m.group(3)) if m.group(3) else first
+            toc.setdefault(m.group(1).strip(), (first, last))
+    return toc
+
+
+class PageIndex:
+    def __init__(self, path=PDF_CONTENT_PATH, matcher=SPECIES_MATCHER, cache_size=128):
+        self.path = path
+        self.matcher = matcher
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self.signature = (stat.st_size, stat.st_mtime_ns)
+        # mmap can't map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self.pages = self._index_pages()
+        self._starts = [page.start for page in self.pages]
+        self._toc = None
+        self._get_species_cached = lru_cache(maxsize=cache_size)(self._get_species)
+
+    def _index_pages(self):
+        data = self._map
+        starts = [(0, 0)]
+        for m in PAGE_MARKER_BYTES.finditer(data):
+            # Pages start at the beginning of the marker's line, which
+            # split_pages drops as a whole
+            line_start = data.rfind(b"\n", 0, m.start()) + 1
+            starts.append((int(m.group(1)), line_start))
+        if len(starts) > 1 and starts[1][1] == 0:
+            starts.pop(0)
+        ends = [start for _, start in starts[1:]] + [len(data)]
+        return [Page(number, start, end) for (number, start), end in zip(starts, ends)]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def page_text(self, slot):
+        page = self.pages[slot]
+        return self._map[page.start:page.end].decode("utf-8")
+
+    def page_lines(self, slot):
+        # newline=None translates line endings the way open() does for read_lines
+        return io.StringIO(self.page_text(slot), newline=None)
+
+    def find_pages(self, text):
+        """Sorted page slots whose bytes contain text or one of its OCR spellings."""
+        slots = set()
+        for term in [text] + DEFAULT_NORMALIZER.variants(text):
+            needle = term.encode("utf-8")
+            pos = self._map.find(needle)
+            while pos != -1:
+                slots.add(bisect_right(self._starts, pos) - 1)
+                pos = self._map.find(needle, pos + len(needle))
+        return sorted(slots)
+
+    @property
+    def toc(self):
+        if self._toc is None:
+            self._toc = {}
+            for slot in self.find_pages("Table of Contents"):
+                text = self.page_text(slot)
+                text = text[text.find("Table of Contents"):]
+                for name, pages in parse_toc(text).items():
+                    self._toc.setdefault(name, pages)
+        return self._toc
+
+    def get_species(self, name):
+        """The parse_data Records for one species, parsing only the pages it spans."""
+        return self._get_species_cached(name)
+
+    def cache_info(self):
+        return self._get_species_cached.cache_info()
+
+    def _get_species(self, name):
+        mentions = self.find_pages(name)
+        records = []
+        covered = -1
+        for start in mentions:
+            if start <= covered:
+                continue
+            holding = [False]
+            run = _Run(self, start, set(mentions), holding)
+            events = _watch_headers(split_columns(classify_lines(clean_lines(split_pages(run)), self.matcher)), name, holding)
+            records.extend(record for record in emit_records(events) if record.species == name)
+            covered = run.last
+        return tuple(records)
+
+
+class _Run:
+    """Lines of consecutive pages from `start` while the species stays current or is mentioned."""
+
+    def __init__(self, index, start, mentions, holding):
+        self.index = index
+        self.start = start
+        self.mentions = mentions
+        self.holding = holding
+        self.last = start
+
+    def __iter__(self):
+        slot = self.start
+        while True:
+            self.last = slot
+            yield from self.index.page_lines(slot)
+            # Every event of this page has been seen by the time the chain
+            # asks for the next page's first line
+            slot += 1
+            if slot >= len(self.index.pages) or not (self.holding[0] or slot in self.mentions):
+                return
+
+
+def _watch_headers(events, name, holding):
+    for page, event in events:
+        if event[0] == "header":
+            holding[0] = name in event[1:]
+        yield page, event
+
+
+_indexes = {}
+
+
+def open_index(path=PDF_CONTENT_PATH):
+    """The shared PageIndex for path, rebuilt if the file has changed since it was built."""
+    key = os.path.abspath(path)
+    index = _indexes.get(key)
+    if index is not None:
+        stat = os.stat(key)
+        if index.signature == (stat.st_size, stat.st_mtime_ns):
+            return index
+        index.close()
+    index = _indexes[key] = PageIndex(key)
+    return index
+
+
+def get_species(name, path=PDF_CONTENT_PATH):
+    return open_index(path).get_species(name)
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Parse one or more species from the extracted MAB-37 text")
+    parser.add_argument("species", nargs="*", help='Species names as the parser reports them, e.g. "Cod, Pacific"')
+    parser.add_argument("--pdf", default=PDF_CONTENT_PATH)
+    parser.add_argument("--toc", action="store_true", help="List the table of contents entries")
+    args = parser.parse_args(argv)
+
+    with PageIndex(args.pdf) as index:
+        if args.toc:
+            for name, (first, last) in index.toc.items():
+                print(f"{name:<40} {first}" + (f"-{last}" if last != first else ""))
+        for name in args.species:
+            records = index.get_species(name)
+            pages = sorted({record.page for record in records})
+            print(f"{name}: {len(records)} records on pages {', '.join(map(str, pages)) or '-'}")
+            for record in records:
+                print(f"  p{record.page:<4} {record.product:<40} {record.average:>4} {record.range or ''}")
+
+
+if __name__ == "__main__":
+    main()
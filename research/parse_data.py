@@ -1,151 +1,213 @@
 import re
-import json
+from collections import Counter, namedtuple
+from fish_store import open_store
+from metrics import active, add_metrics_arguments, metrics_from_args
+from ocr_normalize import DEFAULT_NORMALIZER, clean_ocr
+from species_matcher import SpeciesMatcher
 
-def clean_ocr(text):
-    text = text.replace("O/H", "D/H").replace("0/", "D/").replace("Ofi", "Off").replace("SI B", "S/B")
-    return text
+# List of known species matching the user's HTML and likely PDF content
+SPECIES_LIST = [
+    "Abalone", "Capelin", "Clams", "Cockles", "Cod, Pacific", "Crab", "Dungeness", "King", "Tanner",
+    "Flounders", "Arrowtooth", "Starry", "Halibut, Pacific", "Herring, Pacific", "Lingcod",
+    "Mackerel", "Mussels", "Octopus", "Oysters", "Perch", "Pollock", "Rockfish", "Sablefish",
+    "Salmon", "Pink", "Chum", "Sockeye", "Coho", "Chinook", "Scallops", "Shark", "Shrimp",
+    "Sole", "Squid", "Tuna", "Turbot"
+]
 
-def parse_pdf_content(filepath):
+# Built once and shared by every parse; finds all species hits in one scan per line
+SPECIES_MATCHER = SpeciesMatcher(SPECIES_LIST)
+
+# This bulletin's rows in the fish data store; each parse replaces them all
+SOURCE = "pdf"
+
+PAGE_MARKER = re.compile(r'--- Page (\d+) ---')
+
+# Regex for a data entry: (Description) (Avg) (Range)
+# (?P<desc>[A-Za-z0-9 /\(\)-]+?) (?P<avg>\d{1,3}) (?P<range>\d+-\d+)?
+
+# Aggressive Regex for 2-column data
+# "Item1 99 88-99 Item2 55 44-66"
+# Item cannot start with a number.
+TWO_COL_PATTERN = re.compile(r'^(?P<d1>.+?)\s+(?P<a1>\d+)\s+(?P<r1>\d+-\d+)?\s+(?P<d2>.+?)\s+(?P<a2>\d+)\s+(?P<r2>\d+-\d+)?$')
+ONE_COL_PATTERN = re.compile(r'^(?P<d1>.+?)\s+(?P<a1>\d+)\s+(?P<r1>\d+-\d+)?$')
+
+# One parsed "Product ... Avg ... Range" entry, attributed to a species column
+Record = namedtuple("Record", ["page", "species", "product", "average", "range"])
+
+# The parse is a chain of lazy stages, each consuming the previous one:
+#   read_lines -> split_pages -> clean_lines -> classify_lines -> split_columns -> emit_records
+# Nothing holds more than the current line, so concatenated bulletins of any
+# size stream through in constant memory.
+
+def read_lines(filepath):
     with open(filepath, 'r') as f:
-        lines = f.readlines()
+        for line in f:
+            yield line
 
-    fish_data = {}
-    
-    # We'll use a manually curated list of major species to look for unique headers
-    # and then try to capture following lines.
-    # Note: Because of 2-column layout, we might capture data from the other column.
-    # However, if we look for the specific lines for "Cod", we might find them.
-    
-    # Let's try to extract all "Product ... Avg ... Range" lines
-    # and just put them in a big list, then we can categorize them?
-    # No, product names are generic ("Round", "Fillet"). Context is needed.
-    
-    # Regex for a data entry: (Description) (Avg) (Range)
-    # (?P<desc>[A-Za-z0-9 /\(\)-]+?) (?P<avg>\d{1,3}) (?P<range>\d+-\d+)?
-    
-    data_pattern = re.compile(r'(?P<desc>[A-Za-z0-9 /\(\)-]+?)\s+(?P<avg>\d{1,3})\s+(?P<range>\d+-\d+)?')
-    
-    # Let's try to iterate and see if we can identify headers.
-    # Headers usually don't match the data pattern (no number).
-    
-    # We will assume that if we find a line with "SpeciesName ... SpeciesName", it sets left/right context.
-    # If "SpeciesName ... <data>", it sets left, and other is data?
-    
-    # Improved heuristic:
-    # 1. Identify text chunks.
-    # 2. Assign to columns.
-    
-    # List of known species matching the user's HTML and likely PDF content
-    species_list = [
-        "Abalone", "Capelin", "Clams", "Cockles", "Cod, Pacific", "Crab", "Dungeness", "King", "Tanner",
-        "Flounders", "Arrowtooth", "Starry", "Halibut, Pacific", "Herring, Pacific", "Lingcod",
-        "Mackerel", "Mussels", "Octopus", "Oysters", "Perch", "Pollock", "Rockfish", "Sablefish",
-        "Salmon", "Pink", "Chum", "Sockeye", "Coho", "Chinook", "Scallops", "Shark", "Shrimp",
-        "Sole", "Squid", "Tuna", "Turbot"
-    ]
-    
-    current_left = "Unknown"
-    current_right = "Unknown"
-    
+def split_pages(lines):
+    """Drop the "--- Page N ---" markers and tag every line with its page."""
+    page = 0
     for line in lines:
+        if "--- Page" in line:
+            m = PAGE_MARKER.search(line)
+            if m:
+                page = int(m.group(1))
+            continue
+        yield page, line
+
+def clean_lines(paged_lines):
+    for page, line in paged_lines:
         line = clean_ocr(line.strip())
-        if not line or "--- Page" in line or "Recoveries" in line:
+        if not line or "Recoveries" in line:
             continue
-            
-        # Check if line contains species names
-        # Very rough check
-        found_species = []
-        for s in species_list:
-            if s in line:
-                found_species.append(s)
-        
-        # If we found species, it might be a header line
-        # But "Pink" is a species and also a color/shrimp. "Pink Shrimp".
-        # "Cod, Pacific" is distinct.
-        
-        # Let's try to split the line into two halves based on a wide gap (if preserved)
-        # or just try to regex two data items.
-        
-        # Aggressive Regex for 2-column data
-        # "Item1 99 88-99 Item2 55 44-66"
-        # Item cannot start with a number.
-        two_col_match = re.search(r'^(?P<d1>.+?)\s+(?P<a1>\d+)\s+(?P<r1>\d+-\d+)?\s+(?P<d2>.+?)\s+(?P<a2>\d+)\s+(?P<r2>\d+-\d+)?$', line)
-        
+        yield page, line
+
+def classify_lines(paged_lines, matcher=SPECIES_MATCHER):
+    """
+    Yield (page, kind, line, detail) where kind is one of "two_column",
+    "header", "one_column" or "other". Checks run in that order, so a line
+    of two data entries is never mistaken for a header.
+    """
+    for page, line in paged_lines:
+        two_col_match = TWO_COL_PATTERN.search(line)
         if two_col_match:
-            # Found 2 columns of data
-            if current_left not in fish_data: fish_data[current_left] = {}
-            if current_right not in fish_data: fish_data[current_right] = {}
-            
-            d1, a1, r1 = two_col_match.group('d1'), two_col_match.group('a1'), two_col_match.group('r1')
-            d2, a2, r2 = two_col_match.group('d2'), two_col_match.group('a2'), two_col_match.group('r2')
-            
-            fish_data[current_left][d1.strip()] = {"yield": a1, "range": r1}
-            fish_data[current_right][d2.strip()] = {"yield": a2, "range": r2}
+            yield page, "two_column", line, two_col_match
             continue
-            
-        # If not 2-column data, maybe 1-column data?
-        # But which column?
-        # If line is short, maybe it belongs to left?
-        # Or maybe it's a header?
-        
+
         # If line looks like "Name ... Name", it resets headers.
         # Heuristic: if we found 2 species names in the line, update headers.
-        if len(found_species) >= 2:
-            # Likely "Species1 ... Species2"
-            # We need to determine which is which. Assumed order left-right matching position?
-            # Regex to find them?
-            # Just take the first two found as Left/Right order in string (found_species order depends on list iteration? No, scan line).
-            
-            # Find indices
-            matches = []
-            for s in species_list:
-                for m in re.finditer(re.escape(s), line):
-                    matches.append((m.start(), s))
-            matches.sort()
-            
-            if len(matches) >= 2:
-                # Update headers
-                current_left = matches[0][1]
-                current_right = matches[1][1]
-                
-                # "Salmon ... Pink" -> Main Header "Salmon", Sub Header "Pink"?
-                # In PDF: "Salmon" (section) "Pink" (subsection).
-                # Page 9: "Salmon" (Left col top). "Pink" (Left col sub).
-                # This suggests hierarchy. 
-                # Our simple left/right logic might fail for hierarchy.
-                
-                # However, for "Cod, Pacific", it's distinct.
-                continue
-                
-        # One col match?
-        one_col_match = re.search(r'^(?P<d1>.+?)\s+(?P<a1>\d+)\s+(?P<r1>\d+-\d+)?$', line)
+        # Hits come back sorted by their position in the line.
+        matches = matcher.find_all(line)
+        if len({name for _, name in matches}) >= 2:
+            yield page, "header", line, matches
+            continue
+
+        one_col_match = ONE_COL_PATTERN.search(line)
         if one_col_match:
-            # Belongs to... ?
-            # If "Salmon" is current_left, add to it?
+            yield page, "one_column", line, one_col_match
+        else:
+            yield page, "other", line, None
+
+def split_columns(classified):
+    """
+    Turn classified lines into per-column events: ("header", left, right)
+    when a header line resets the species context, and
+    ("cell", column, desc, avg, range) for each data entry.
+    """
+    for page, kind, line, detail in classified:
+        if kind == "two_column":
+            yield page, ("cell", "left", detail.group('d1'), detail.group('a1'), detail.group('r1'))
+            yield page, ("cell", "right", detail.group('d2'), detail.group('a2'), detail.group('r2'))
+        elif kind == "header":
+            # "Salmon ... Pink" -> Main Header "Salmon", Sub Header "Pink"?
+            # Our simple left/right logic might fail for hierarchy, but for
+            # "Cod, Pacific" it's distinct.
+            yield page, ("header", detail[0][1], detail[1][1])
+        elif kind == "one_column":
             # Hard to know if it's left or right column data without x-pos.
-            # But "Recoveries..." PDF usually fills Left then Right? 
-            # Or aligns specific items?
-            # In the snippet 29, line 200: "Whole... Round..." (filled both).
-            # Line 204: "SIB Fillets... " (Left only, right empty?) -> NO, line 204 ends with "33".
-            # Then line 205: "Blackcod... 38"
-            
             # Risk: We assign data to wrong fish.
             # Mitigation: Only capture high confidence lines.
-            
-            # For the purpose of the calculator, we specifically need:
-            # Salmon (Pink, Sockeye, Coho, Chinook), Cod, Tuna, Rockfish.
-            
-            if current_left != "Unknown" and len(line) < 40: # Short line -> likely Left?
-                 d1, a1, r1 = one_col_match.group('d1'), one_col_match.group('a1'), one_col_match.group('r1')
-                 if current_left not in fish_data: fish_data[current_left] = {}
-                 fish_data[current_left][d1.strip()] = {"yield": a1, "range": r1}
-    
-    # Output to JS
-    js_content = "const FISH_DATA = " + json.dumps(fish_data, indent=4) + ";"
-    with open('data/fish_data.js', 'w') as f:
-        f.write(js_content)
-    
-    print("Parsed data written to data/fish_data.js")
+            if len(line) < 40: # Short line -> likely Left?
+                yield page, ("cell", "left_only", detail.group('d1'), detail.group('a1'), detail.group('r1'))
+
+def emit_records(events):
+    current_left = "Unknown"
+    current_right = "Unknown"
+    for page, event in events:
+        if event[0] == "header":
+            _, current_left, current_right = event
+            continue
+
+        _, column, desc, avg, rng = event
+        if column == "right":
+            species = current_right
+        elif column == "left_only" and current_left == "Unknown":
+            continue
+        else:
+            species = current_left
+        yield Record(page, species, desc.strip(), avg, rng)
+
+def iter_records(filepath, matcher=SPECIES_MATCHER):
+    """Lazily parse a bulletin text file into Record tuples."""
+    return iter_records_from_lines(read_lines(filepath), matcher)
+
+def iter_records_from_lines(lines, matcher=SPECIES_MATCHER):
+    if active().enabled:
+        return _instrumented_records(lines, matcher)
+    pages = split_pages(lines)
+    cleaned = clean_lines(pages)
+    classified = classify_lines(cleaned, matcher)
+    return emit_records(split_columns(classified))
+
+def _tallied(items, tally, key, key_of=None):
+    for item in items:
+        if key_of:
+            key = key_of(item)
+        if key:
+            tally[key] += 1
+        yield item
+
+def _instrumented_records(lines, matcher):
+    # The same chain with a tally between each stage; the differences
+    # between neighbouring counts are what each stage dropped.
+    metrics = active()
+    tally = Counter()
+    ocr_before = DEFAULT_NORMALIZER.stats.copy()
+    pages = _tallied(split_pages(_tallied(lines, tally, "lines_read")), tally, "body_lines")
+    cleaned = _tallied(clean_lines(pages), tally, "lines_kept")
+    classified = _tallied(classify_lines(cleaned, matcher), tally, None, lambda item: item[1])
+    events = _tallied(split_columns(classified), tally, None, lambda item: "cells." + item[1][1] if item[1][0] == "cell" else None)
+    try:
+        yield from _tallied(emit_records(events), tally, "records")
+    finally:
+        tally["page_markers"] = tally["lines_read"] - tally["body_lines"]
+        tally["lines_dropped"] = tally["body_lines"] - tally["lines_kept"]
+        tally["one_column_dropped"] = tally["one_column"] - tally["cells.left_only"]
+        cells = tally["cells.left"] + tally["cells.right"] + tally["cells.left_only"]
+        tally["cells_unattributed"] = cells - tally["records"]
+        metrics.add("parse", tally)
+        metrics.add("ocr", DEFAULT_NORMALIZER.stats - ocr_before)
+
+def parse_pdf_content(filepath, matcher=SPECIES_MATCHER):
+    # We'll use a manually curated list of major species to look for unique headers
+    # and then try to capture following lines.
+    # Note: Because of 2-column layout, we might capture data from the other column.
+    # For the purpose of the calculator, we specifically need:
+    # Salmon (Pink, Sockeye, Coho, Chinook), Cod, Tuna, Rockfish.
+    # Headers that name one dataset species ("Cod, Pacific") are stored under
+    # its name; the rest ("Salmon", "Mackerel") are kept as printed.
+    from name_index import default_index, report_suggestions
+
+    names = default_index()
+    printed = set()
+
+    def rows():
+        for record in iter_records(filepath, matcher):
+            printed.add(record.species)
+            yield names.canonical(record.species), record.product, record.average, record.range
+
+    with active().stage("parse"), open_store() as store:
+        changed = store.replace_source(SOURCE, rows())
+        written = store.export_js()
+    active().incr("parse.rows_changed", changed)
+    report_suggestions(names, sorted(printed))
+
+    if written:
+        print("Parsed data written to data/fish_data.js")
+    else:
+        print("data/fish_data.js is already up to date")
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Parse the extracted MAB-37 text into the fish data store")
+    parser.add_argument("path", nargs="?", default="pdf_content.txt")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with metrics_from_args(args):
+        parse_pdf_content(args.path)
+
 
 if __name__ == "__main__":
-    parse_pdf_content("pdf_content.txt")
+    main()
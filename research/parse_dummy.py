@@ -1,5 +1,7 @@
 import re
 import json
+from ocr_normalize import clean_ocr
+from parse_data import read_lines, split_pages
 
 def parse_line(line):
     # Try to split line into two columns
@@ -10,8 +12,8 @@ def parse_line(line):
     # Look for "Number [A-Z]" indicating start of second column description?
     # Or "Range [A-Z]"
     
-    # Common OCR issues: "O/H" -> "D/H", "SI B" -> "S/B", "0/" -> "D/"
-    line = line.replace("O/H", "D/H").replace("0/", "D/").replace("Ofi", "Off").replace("SI B", "S/B")
+    # Common OCR issues: "O/H" -> "D/H", "SI B" -> "S/B", "0/" -> "D/" (see ocr_normalize.OCR_RULES)
+    line = clean_ocr(line)
     
     # Regex to find potential column split in data lines
     # Look for: (Number or Range) (Space) (Text)
@@ -31,10 +33,14 @@ def parse_line(line):
     
     pass
 
-def process_file(filepath):
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
+def content_lines(filepath):
+    # Stream stripped, non-empty body lines; page markers are dropped by split_pages
+    for _, line in split_pages(read_lines(filepath)):
+        line = line.strip()
+        if line and "Recoveries and Yields" not in line:
+            yield line
 
+def process_file(filepath):
     fish_data = {}
     current_species_left = None
     current_species_right = None
@@ -43,7 +49,6 @@ def process_file(filepath):
     # They generally don't have yield numbers.
     # Scientific names often present.
     
-    full_text = "".join(lines)
     # Split by pages to reset assumptions? No, flows continuous.
     
     # New strategy:
@@ -54,8 +59,6 @@ def process_file(filepath):
     
     entries = [] 
     
-    lines = [l.strip() for l in lines if l.strip() and "--- Page" not in l and "Recoveries and Yields" not in l]
-    
     # We will try a very specific regex for the "Dual Column Data Line"
     # Matches: (Desc1) (Avg1) (Range1?) (Desc2) (Avg2) (Range2?)
     # Desc can be multiple words.
@@ -105,8 +108,7 @@ def process_file(filepath):
     
     data_lines_start = 0
     
-    for i, line in enumerate(lines):
-        if "Recoveries and Yields" in line: continue
+    for i, line in enumerate(content_lines(filepath)):
         # Try to parse TOC items
         # Removing dots "..."
         clean_line = line.replace(".", "")
@@ -133,17 +135,10 @@ def process_file(filepath):
     # Line 199: "Abalone, Pinto ... Cod, Pacific ..."
     # This line contains TWO species headers.
     
-    current_left = None
-    current_right = None
-    
-    for line in lines:
-        if "Table of Contents" in line: continue
-        
-        # Check for headers
-        # Split line by large space or detect known species
-        # This is heuristics-heavy.
-        pass
-        
+    # Check for headers
+    # Split line by large space or detect known species
+    # This is heuristics-heavy.
+    
     print("This approach is too fragile for a simple regex script without spatial layout.")
     print("Creating a simplified JSON with some hardcoded/extracted samples for the demo if parsing fails.")
 
@@ -0,0 +1,395 @@
+"""
+Incremental runner for the research data pipeline.
+
+The research scripts are modelled as a DAG of stages, each declaring the
+files it reads and writes (as keys into a paths dict, so every location can
+be overridden) and the source files its behaviour depends on:
+
+    extract_pdf  bulletin PDF         -> pdf_content.txt
+    parse_pdf    pdf_content.txt      -> pdf_records.json
+    read_excel   NHCS yields workbook -> excel_yields.json
+    merge        both record files    -> fish_data.sqlite, fish_data.js
+                 (species names resolved against fish_data_v3.js)
+    scrape       (network)            -> profiles_data.json
+    validate     fish_data_v3.js, pdf_content.txt -> validation-report.json
+    build_db     fish_data_v3.js      -> fish_yields.sqlite
+
+Before running a stage its inputs are fingerprinted (SHA-256, reusing the
+recorded hash when size and mtime are unchanged) and compared with the
+state recorded after its last successful run; stages whose inputs, code and
+outputs are all unchanged are skipped, so a no-op rebuild only stats files.
+Stages without file inputs (scrape) run when their outputs are missing or
+when forced. Independent stages run in parallel on a thread pool; the PDF,
+Excel and scrape branches share nothing until merge.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from fish_store import atomic_write
+from js_data import FISH_DATA_V3_PATH, RESEARCH_DIR
+from metrics import active, add_metrics_arguments, metrics_from_args
+
+BUILD_DIR = os.path.join(RESEARCH_DIR, ".pipeline")
+DATA_DIR = os.path.join(RESEARCH_DIR, "data")
+
+DEFAULT_PATHS = {
+    "pdf": os.path.join(RESEARCH_DIR, "MAB-37PDF-Recoveries and Yields fro.pdf"),
+    "pdf_content": os.path.join(RESEARCH_DIR, "pdf_content.txt"),
+    "extract_cache": os.path.join(RESEARCH_DIR, ".extract_cache"),
+    "excel": os.path.join(RESEARCH_DIR, "datasets", "% Yields NHCS.xlsx"),
+    "pdf_records": os.path.join(BUILD_DIR, "pdf_records.json"),
+    "excel_yields": os.path.join(BUILD_DIR, "excel_yields.json"),
+    "store": os.path.join(DATA_DIR, "fish_data.sqlite"),
+    "fish_data_js": os.path.join(DATA_DIR, "fish_data.js"),
+    "profiles": os.path.join(DATA_DIR, "profiles_data.json"),
+    "http_cache": os.path.join(DATA_DIR, "http_cache.sqlite"),
+    "dataset_v3": FISH_DATA_V3_PATH,
+    "validation_report": os.path.join(BUILD_DIR, "validation-report.json"),
+    "yield_db": os.path.join(DATA_DIR, "fish_yields.sqlite"),
+}
+DEFAULT_STATE_PATH = os.path.join(BUILD_DIR, "state.json")
+
+# inputs / outputs: keys into the paths dict; code: research/ modules whose
+# changes invalidate the stage (everything it imports, at any depth, bar
+# metrics); run: callable(paths)
+Stage = namedtuple("Stage", ["name", "inputs", "outputs", "code", "run"])
+
+
+class PipelineError(Exception):
+    pass
+
+
+# ---- stage implementations ----
+# Imports are deferred so that running one branch doesn't need the
+# dependencies (PyPDF2, pandas, requests) of the others.
+
+def _write_json(path, value):
+    atomic_write(path, json.dumps(value, indent=1, ensure_ascii=False) + "\n")
+
+
+def run_extract_pdf(paths):
+    from extract_pdf import extract_text_parallel
+
+    extract_text_parallel(paths["pdf"], paths["pdf_content"], cache_dir=paths["extract_cache"])
+
+
+def run_parse_pdf(paths):
+    from parse_data import iter_records
+
+    _write_json(paths["pdf_records"], [
+        [record.species, record.product, record.average, record.range]
+        for record in iter_records(paths["pdf_content"])
+    ])
+
+
+def run_read_excel(paths):
+    from excel_ingest import load_sheet
+    from update_fish_data import normalize_yields
+
+    yields, rejects = normalize_yields(load_sheet(paths["excel"], "Sheet1"))
+    if len(rejects):
+        print(f"Skipping {len(rejects)} rows with invalid yields:")
+        print(rejects.to_string())
+    _write_json(paths["excel_yields"], [
+        [name, label, str(yield_value), range_value]
+        for name, label, yield_value, range_value in zip(
+            yields["name"], yields["label"], yields["yield"], yields["range"]
+        )
+    ])
+
+
+def run_merge(paths):
+    from fish_store import open_store
+    from name_index import default_index, report_suggestions
+    from parse_data import SOURCE as PDF_SOURCE
+    from update_fish_data import SOURCE as NHCS_SOURCE
+
+    # Same order as running parse_data.py and then update_fish_data.py
+    names = default_index(paths["dataset_v3"])
+    sources = []
+    for key, source in (("pdf_records", PDF_SOURCE), ("excel_yields", NHCS_SOURCE)):
+        with open(paths[key], "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        report_suggestions(names, (species for species, *_ in rows))
+        sources.append((source, [[names.canonical(species), *rest] for species, *rest in rows]))
+    changed = 0
+    with open_store(paths["store"], paths["fish_data_js"]) as store:
+        for source, rows in sources:
+            changed += store.replace_source(source, rows)
+        store.export_js(paths["fish_data_js"])
+    print(f"Merged {sum(len(rows) for _, rows in sources)} rows ({changed} changed)")
+
+
+def run_scrape(paths):
+    from scrape_profiles import scrape_profiles
+
+    if scrape_profiles(output_path=paths["profiles"], cache_path=paths["http_cache"]) is None:
+        raise PipelineError("Failed to fetch the profile index")
+
+
+def run_validate(paths):
+    from validate_fish_data import validate_data
+
+    report = validate_data(paths["dataset_v3"], paths["pdf_content"])
+    _write_json(paths["validation_report"], report)
+    summary = report["summary"]
+    if summary["errors"]:
+        raise PipelineError(f"Validation found {summary['errors']} errors")
+
+
+def run_build_db(paths):
+    from js_data import load_js_exports
+    from yield_db import build
+
+    exports = load_js_exports(paths["dataset_v3"], {"FISH_DATA_V3", "PROFILES_DATA", "ACRONYMS"})
+    counts = build(exports["FISH_DATA_V3"], paths["yield_db"], exports.get("PROFILES_DATA"), exports.get("ACRONYMS"))
+    print(f"Built {paths['yield_db']} ({counts['species']} species, {counts['fish_yields']} yields)")
+
+
+STAGES = [
+    Stage("extract_pdf", ["pdf"], ["pdf_content"], ["extract_pdf.py"], run_extract_pdf),
+    Stage("parse_pdf", ["pdf_content"], ["pdf_records"],
+          ["parse_data.py", "parse_dummy.py", "ocr_normalize.py", "species_matcher.py",
+           "name_index.py", "js_data.py", "fish_store.py"], run_parse_pdf),
+    Stage("read_excel", ["excel"], ["excel_yields"],
+          ["update_fish_data.py", "excel_ingest.py", "name_index.py", "js_data.py", "fish_store.py"], run_read_excel),
+    Stage("merge", ["pdf_records", "excel_yields", "dataset_v3"], ["store", "fish_data_js"],
+          ["fish_store.py", "name_index.py", "js_data.py", "parse_data.py", "ocr_normalize.py",
+           "species_matcher.py", "update_fish_data.py", "excel_ingest.py"], run_merge),
+    Stage("scrape", [], ["profiles"], [], run_scrape),
+    Stage("validate", ["dataset_v3", "pdf_content"], ["validation_report"],
+          ["validate_fish_data.py", "js_data.py", "parse_data.py", "ocr_normalize.py", "name_index.py",
+           "species_matcher.py", "page_index.py", "fish_store.py"], run_validate),
+    Stage("build_db", ["dataset_v3"], ["yield_db"], ["yield_db.py", "js_data.py"], run_build_db),
+]
+
+
+# ---- fingerprints ----
+
+class Fingerprints:
+    """
+    SHA-256 of files, reusing a previously recorded hash while the file's
+    size and mtime are unchanged (like git's index).
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            known = self.known.get(path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self.known[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+
+class Pipeline:
+    def __init__(self, stages=STAGES, paths=None, state_path=DEFAULT_STATE_PATH, jobs=None, code_dir=RESEARCH_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.paths = {**DEFAULT_PATHS, **(paths or {})}
+        self.state_path = state_path
+        self.jobs = jobs
+        self.code_dir = code_dir
+        self.producers = {}
+        for stage in stages:
+            for key in stage.outputs:
+                if key in self.producers:
+                    raise PipelineError(f"{key!r} is produced by both {self.producers[key]} and {stage.name}")
+                self.producers[key] = stage.name
+        self.deps = {
+            stage.name: sorted({self.producers[key] for key in stage.inputs if key in self.producers})
+            for stage in stages
+        }
+        self._check_acyclic()
+
+        self.state = {"files": {}, "stages": {}}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, "r") as f:
+                self.state = json.load(f)
+        self.fingerprint = Fingerprints(self.state.get("files"))
+        self._lock = threading.Lock()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise PipelineError(f"Stage dependency cycle through {name}")
+            visiting.add(name)
+            for dep in self.deps[name]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def plan(self, targets=None):
+        """The targets and every stage upstream of them, in dependency order."""
+        order, seen = [], set()
+
+        def visit(name):
+            if name not in self.stages:
+                raise PipelineError(f"Unknown stage {name!r}")
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.deps[name]:
+                visit(dep)
+            order.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return order
+
+    def _signature(self, stage):
+        inputs = {key: self.fingerprint(self.paths[key]) for key in stage.inputs}
+        code = {name: self.fingerprint(os.path.join(self.code_dir, name)) for name in stage.code}
+        return inputs, code
+
+    def is_up_to_date(self, stage):
+        recorded = self.state["stages"].get(stage.name)
+        if not recorded:
+            return False
+        inputs, code = self._signature(stage)
+        if recorded["inputs"] != inputs or recorded["code"] != code:
+            return False
+        return all(
+            self.fingerprint(self.paths[key]) == digest for key, digest in recorded["outputs"].items()
+        )
+
+    def _record(self, stage):
+        inputs, code = self._signature(stage)
+        outputs = {key: self.fingerprint(self.paths[key]) for key in stage.outputs}
+        with self._lock:
+            self.state["stages"][stage.name] = {"inputs": inputs, "code": code, "outputs": outputs}
+            self.save()
+
+    def save(self):
+        if self.state_path:
+            self.state["files"] = self.fingerprint.known
+            atomic_write(self.state_path, json.dumps(self.state, indent=1, sort_keys=True))
+
+    def _execute(self, stage, force):
+        start = time.perf_counter()
+        if not force and self.is_up_to_date(stage):
+            return "skipped", time.perf_counter() - start, None
+        missing = [key for key in stage.inputs if not os.path.exists(self.paths[key])]
+        if missing:
+            return "failed", time.perf_counter() - start, "missing input " + ", ".join(self.paths[k] for k in missing)
+        try:
+            with active().stage(stage.name):
+                stage.run(self.paths)
+            missing = [key for key in stage.outputs if not os.path.exists(self.paths[key])]
+            if missing:
+                raise PipelineError("did not write " + ", ".join(self.paths[k] for k in missing))
+        except Exception as e:
+            return "failed", time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        self._record(stage)
+        return "ran", time.perf_counter() - start, None
+
+    def run(self, targets=None, force=(), dry_run=False):
+        """
+        Run the targets (default: every stage) and whatever they depend on.
+        force names stages to rerun regardless of fingerprints ("all" for
+        every stage). Returns {stage: (status, seconds, error)} where status
+        is ran, skipped, failed, blocked (an upstream stage failed) or, for
+        dry runs, stale / up-to-date.
+        """
+        order = self.plan(targets)
+        forced = set(order) if "all" in force else set(force)
+        if dry_run:
+            # Staleness of downstream stages can only be known once upstream
+            # ones have run, so anything below a stale stage is reported stale
+            results = {}
+            for name in order:
+                stale = (
+                    name in forced
+                    or any(results[dep][0] == "stale" for dep in self.deps[name])
+                    or not self.is_up_to_date(self.stages[name])
+                )
+                results[name] = ("stale" if stale else "up-to-date", 0.0, None)
+            return results
+
+        results = {}
+        pending = list(order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = [results.get(dep) for dep in self.deps[name] if dep in order]
+                    if any(dep is None for dep in deps):
+                        continue
+                    pending.remove(name)
+                    if any(dep[0] in ("failed", "blocked") for dep in deps):
+                        results[name] = ("blocked", 0.0, None)
+                        continue
+                    running[pool.submit(self._execute, self.stages[name], name in forced)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[running.pop(future)] = future.result()
+        self.save()
+        return {name: results[name] for name in order}
+
+
+def format_results(results):
+    lines = []
+    for name, (status, seconds, error) in results.items():
+        line = f"{name:<12} {status:<10} {seconds:7.2f}s"
+        if error:
+            line += f"  {error}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run the research data pipeline incrementally")
+    parser.add_argument("targets", nargs="*", help=f"Stages to bring up to date (default: all of {', '.join(s.name for s in STAGES)})")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="Rerun this stage even if it is up to date; 'all' forces every stage")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages are stale")
+    parser.add_argument("--jobs", type=int, help="Stages to run at once (default: thread pool default)")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH)
+    add_metrics_arguments(parser)
+    for key, default in DEFAULT_PATHS.items():
+        parser.add_argument("--" + key.replace("_", "-"), dest="path_" + key, default=default,
+                            help=f"(default: {os.path.relpath(default)})")
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(
+        paths={key: getattr(args, "path_" + key) for key in DEFAULT_PATHS},
+        state_path=args.state,
+        jobs=args.jobs,
+    )
+    with metrics_from_args(args):
+        results = pipeline.run(args.targets or None, force=args.force, dry_run=args.dry_run)
+    print(format_results(results))
+    sys.exit(1 if any(status in ("failed", "blocked") for status, _, _ in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Incremental section extractor for Sea Grant seafood profile pages.
+
+ProfileSectionParser is an html.parser.HTMLParser that is fed the page in
+chunks and collects the text under each requested heading ("Description of
+meat", "Culinary uses", ...) in a single pass. A section ends at the next
+heading of any level, and once every requested section has ended the parser
+reports that it is done so the caller can stop reading the response.
+"""
+
+import re
+from html.parser import HTMLParser
+
+# Output key -> heading text on the profile page
+PROFILE_SECTIONS = {
+    "description": "Description of meat",
+    "culinary_uses": "Culinary uses",
+    "edible_portions": "Edible portions",
+}
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+SKIPPED_TAGS = {"script", "style"}
+
+
+def normalize_heading(text):
+    return re.sub(r"\s+", " ", text).strip().rstrip(":").lower()
+
+
+class ProfileSectionParser(HTMLParser):
+    def __init__(self, sections=PROFILE_SECTIONS):
+        super().__init__(convert_charrefs=True)
+        self._wanted = {normalize_heading(title): key for key, title in sections.items()}
+        self.sections = {key: "" for key in sections}
+        self.done = not self._wanted
+        self._found = set()
+        self._heading = None
+        self._current = None
+        self._parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HEADING_TAGS:
+            self._close_section()
+            self._heading = []
+        elif tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in HEADING_TAGS and self._heading is not None:
+            key = self._wanted.get(normalize_heading("".join(self._heading)))
+            self._heading = None
+            if key and key not in self._found:
+                self._current = key
+                self._parts = []
+        elif tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        elif self._current is not None:
+            self._parts.append(data)
+
+    def _close_section(self):
+        if self._current is None:
+            return
+        self.sections[self._current] = "".join(self._parts).strip()
+        self._found.add(self._current)
+        self._current = None
+        self._parts = []
+        if len(self._found) == len(self._wanted):
+            self.done = True
+
+    def feed_chunk(self, chunk):
+        """Feed one chunk of the page; returns True once every section is complete."""
+        if not self.done:
+            self.feed(chunk)
+        return self.done
+
+    def result(self):
+        # A section still open at the end of the page runs to the end of it
+        if not self.done:
+            self.close()
+            self._close_section()
+        return dict(self.sections)
+
+
+def extract_sections(chunks, sections=PROFILE_SECTIONS):
+    """Extract sections from an iterable of HTML chunks, stopping early when possible."""
+    parser = ProfileSectionParser(sections)
+    for chunk in chunks:
+        if parser.feed_chunk(chunk):
+            break
+    return parser.result()
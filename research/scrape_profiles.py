@@ -1,90 +1,211 @@
-import requests
+import argparse
 import re
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from http_cache import DEFAULT_CACHE_PATH, CacheMiss, CachedResponse, HttpCache, read_body, record_request
+from metrics import add_metrics_arguments, metrics_from_args, staged
+from name_index import default_index
+from profile_sections import ProfileSectionParser
+
+SITE_ROOT = "https://caseagrant.ucsd.edu"
+BASE_URL = SITE_ROOT + "/seafood-profiles"
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 10.0     # requests per second, per host
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5   # seconds; doubles on every retry
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host to at most `rate` per second."""
+
+    def __init__(self, rate=DEFAULT_RATE):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def make_session(pool_size=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    # One pooled session shared by every worker, so profiles reuse
+    # connections instead of opening a fresh one per request.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def find_profile_links(html, site_root=SITE_ROOT):
+    # Pattern to find links to seafood profiles
+    # We look for hrefs that contain 'seafood-profiles/' but are not the index page itself
+    # They might be absolute or relative.
+    links = re.findall(r'href="((?:' + re.escape(site_root) + r')?/seafood-profiles/[^"]+)"', html)
+
+    # Filter duplicates and extract names
+    # We need to clean the hrefs to be always full URLs
+    clean_links = set()
+    for l in links:
+        if "page=" in l: continue # Skip pagination
+        if l.endswith("/seafood-profiles"): continue
+        if "http" not in l:
+            l = site_root + l
+
+        # Name extraction is harder from just href if regex failed.
+        # We will fetch name from the page or guess from slug.
+        slug = l.split("/")[-1].replace("-", " ").title()
+        clean_links.add((l, slug))
+    return sorted(clean_links)
+
+
+def extract_profile(p_text):
+    # Extract the profile sections in one pass over the page
+    parser = ProfileSectionParser()
+    parser.feed_chunk(p_text)
+    return parser.result()
+
+
+def fetch(session, url, limiter, cache=None, timeout=30, consume=None):
+    if cache is not None:
+        return cache.get(session, url, timeout=timeout, before_request=limiter.wait, consume=consume)
+    limiter.wait(url)
+    start = time.perf_counter()
+    r = session.get(url, timeout=timeout, stream=consume is not None)
+    r.raise_for_status()
+    body = read_body(r, consume)
+    record_request(start, len(body.encode()))
+    return CachedResponse(url, body, False, None)
+
+
+def fetch_parsed(session, url, limiter, parse, cache=None, stream_parser=None):
+    # A 304 (or an offline hit) reuses what we parsed from the cached body
+    # last time, so unchanged pages are neither downloaded nor re-parsed.
+    # A stream_parser reads fresh bodies chunk by chunk and stops parsing
+    # (and, without a cache, downloading) once it has every section; cached
+    # bodies go through parse() instead.
+    consume = stream_parser.feed_chunk if stream_parser is not None else None
+    response = fetch(session, url, limiter, cache, consume=consume)
+    if response.not_modified and response.parsed is not None:
+        return response.parsed
+    if stream_parser is not None and not response.not_modified:
+        parsed = stream_parser.result()
+    else:
+        parsed = parse(response.text)
+    if cache is not None:
+        cache.set_parsed(url, parsed)
+    return parsed
+
+
+@staged("scrape")
+def scrape_profiles(base_url=BASE_URL, output_path='data/profiles_data.json',
+                    concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                    retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                    cache_path=DEFAULT_CACHE_PATH, offline=False, max_age=None, max_bytes=None):
+    import requests
+
+    site_root = "{0.scheme}://{0.netloc}".format(urlsplit(base_url))
+    session = make_session(concurrency, retries, backoff)
+    limiter = HostRateLimiter(rate)
+    cache = HttpCache(cache_path, max_age=max_age, max_bytes=max_bytes, offline=offline) if cache_path else None
 
-def scrape_profiles():
-    base_url = "https://caseagrant.ucsd.edu/seafood-profiles"
-    
     # Fetch main list
     print(f"Fetching {base_url}...")
     try:
-        r = requests.get(base_url)
-        if r.status_code != 200:
+        try:
+            links = fetch_parsed(session, base_url, limiter, lambda html: find_profile_links(html, site_root), cache)
+        except (requests.RequestException, CacheMiss):
             print("Failed to fetch main page")
             return
-            
-        html = r.text
-        # Pattern to find links to seafood profiles
-        # We look for hrefs that contain 'seafood-profiles/' but are not the index page itself
-        # They might be absolute or relative.
-        links = re.findall(r'href="((?:https://caseagrant\.ucsd\.edu)?/seafood-profiles/[^"]+)"', html)
-        
-        # Filter duplicates and extract names
-        # We need to clean the hrefs to be always full URLs
-        clean_links = []
-        for l in links:
-            if "page=" in l: continue # Skip pagination
-            if l.endswith("/seafood-profiles"): continue
-            if "http" not in l:
-                l = "https://caseagrant.ucsd.edu" + l
-            
-            # Name extraction is harder from just href if regex failed.
-            # We will fetch name from the page or guess from slug.
-            slug = l.split("/")[-1].replace("-", " ").title()
-            clean_links.append((l, slug))
-            
-        clean_links = list(set(clean_links))
-        links = clean_links # override
 
+        links = [tuple(link) for link in links]
         print(f"Found {len(links)} profiles.")
-        
-        profiles = {}
-        
-        # Limit to 5 for test/demo speed, or do all?
-        # User said "Include data from this".
-        # I'll try 10 key species.
-        
-        count = 0
-        for href, name in links:
-            if count > 15: break # Safety limit for now
-            
-            full_url = href # href is already cleaned to be full URL
-            print(f"Scraping {name}...")
-
-            
+
+        def scrape_one(link):
+            full_url, name = link # href is already cleaned to be full URL
             try:
-                pr = requests.get(full_url)
-                p_text = pr.text
-                
-                # Extract sections
-                # Simple region extraction
-                desc_match = re.search(r'Description of meat</h3>(.*?)<h3', p_text, re.DOTALL)
-                uses_match = re.search(r'Culinary uses</h3>(.*?)<h3', p_text, re.DOTALL)
-                edible_match = re.search(r'Edible portions</h3>(.*?)<h3', p_text, re.DOTALL)
-                
-                def clean_html(t):
-                    if not t: return ""
-                    return re.sub(r'<[^>]+>', '', t).strip()
-                
-                profiles[name] = {
-                    "description": clean_html(desc_match.group(1)) if desc_match else "",
-                    "culinary_uses": clean_html(uses_match.group(1)) if uses_match else "",
-                    "edible_portions": clean_html(edible_match.group(1)) if edible_match else "",
-                    "url": full_url
-                }
-                
-                count += 1
+                profile = dict(fetch_parsed(
+                    session, full_url, limiter, extract_profile, cache,
+                    stream_parser=ProfileSectionParser(),
+                ))
+                profile["url"] = full_url
+                return name, profile
             except Exception as e:
                 print(f"Error scraping {name}: {e}")
-                
+                return name, None
+
+        # Bounded concurrency: at most `concurrency` profiles in flight, all
+        # sharing the pooled session and the per-host rate limit.
+        # Profiles of dataset species are keyed by the dataset's name for them.
+        names = default_index()
+        profiles = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name, profile in pool.map(scrape_one, links):
+                if profile is not None:
+                    profiles[names.canonical(name)] = profile
+
         # Save to JSON
-        with open('data/profiles_data.json', 'w') as f:
-            json.dump(profiles, f, indent=4)
-            
-        print("Scraping complete.")
-        
+        if output_path:
+            with open(output_path, 'w') as f:
+                json.dump(profiles, f, indent=4)
+
+        print(f"Scraping complete ({len(profiles)} of {len(links)} profiles).")
+        if cache is not None:
+            print(f"HTTP cache: {cache.hits} unchanged, {cache.misses} downloaded.")
+            if not offline:
+                cache.evict()
+        return profiles
+
     except Exception as e:
         print(f"Fatal error: {e}")
+    finally:
+        session.close()
+        if cache is not None:
+            cache.close()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Scrape Sea Grant seafood profiles")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Requests per second per host")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="HTTP cache file")
+    parser.add_argument("--no-cache", action="store_true", help="Always download every page")
+    parser.add_argument("--offline", action="store_true", help="Serve only from the HTTP cache")
+    parser.add_argument("--max-age", type=float, help="Evict cache entries older than this many seconds")
+    parser.add_argument("--max-bytes", type=int, help="Evict least recently used entries above this size")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with metrics_from_args(args):
+        scrape_profiles(
+            concurrency=args.concurrency, rate=args.rate,
+            cache_path=None if args.no_cache else args.cache,
+            offline=args.offline, max_age=args.max_age, max_bytes=args.max_bytes,
+        )
+
 
 if __name__ == "__main__":
-    scrape_profiles()
+    main()
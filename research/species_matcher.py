@@ -0,0 +1,74 @@
+"""
+Single-pass multi-pattern matcher for species headers.
+
+Builds an Aho-Corasick automaton over the species names once, then reports
+every occurrence of every name in a line with one left-to-right scan. The
+cost per line no longer depends on how many names are being looked for, so
+the species list can grow to hundreds of TOC and spreadsheet names.
+"""
+
+from collections import deque
+
+
+class SpeciesMatcher:
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(names))
+
+        # Trie stored as parallel lists indexed by state number
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for name in self.names:
+            if not name:
+                continue
+            state = 0
+            for ch in name:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] = self._out[state] + (name,)
+
+        # Breadth-first pass to fill in failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, line):
+        """
+        Return every (start, name) hit in the line, sorted by position then
+        name. Each name's own hits don't overlap, matching re.finditer.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        last_end = {}
+        state = 0
+        for i, ch in enumerate(line):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for name in out[state]:
+                    start = i - len(name) + 1
+                    if start >= last_end.get(name, 0):
+                        hits.append((start, name))
+                        last_end[name] = i + 1
+        hits.sort()
+        return hits
+
+    def names_in(self, line):
+        """Return the set of distinct names that occur in the line."""
+        return {name for _, name in self.find_all(line)}
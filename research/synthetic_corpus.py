@@ -0,0 +1,162 @@
+"""
+Synthetic, scaled-up inputs for the research benchmarks.
+
+scale_pdf_content() repeats the MAB-37 text extraction `factor` times with
+renumbered pages. The first copy is the real text; every further copy keeps
+its two-column table layout but jitters the yields and ranges and puts back
+the OCR misreads that ocr_normalize corrects, so the parser and the
+normalizer see fresh lines instead of cache hits. synthetic_nhcs_sheet()
+builds a "% Yields NHCS" style sheet with the real sheet's mix of fractions,
+percentages, ranges and junk cells, and synthetic_profile_page() a Sea Grant
+profile page with navigation and scripts around the sections.
+"""
+
+import os
+import random
+import re
+
+from ocr_normalize import OCR_RULES
+from parse_data import ONE_COL_PATTERN, PAGE_MARKER, SPECIES_LIST, TWO_COL_PATTERN
+
+PDF_CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_content.txt")
+
+# Correct text -> the OCR misreads of it
+MISREADS = {}
+for _wrong, _right, _ in OCR_RULES:
+    MISREADS.setdefault(_right, []).append(_wrong)
+MISREAD_PATTERN = re.compile("|".join(re.escape(right) for right in sorted(MISREADS, key=len, reverse=True)))
+
+# An average followed by an optional range, as they appear in table rows
+YIELD_PATTERN = re.compile(r"(?<![\w/-])(\d{1,2})(?: (\d{1,2})-(\d{1,2}))?(?![\w/-])")
+
+
+def _jitter(m, rng):
+    delta = rng.randint(-3, 3)
+    average = min(99, max(1, int(m.group(1)) + delta))
+    if m.group(2) is None:
+        return str(average)
+    low = min(average, max(1, int(m.group(2)) + delta))
+    high = max(average, min(99, int(m.group(3)) + delta))
+    return f"{average} {low}-{high}"
+
+
+def add_ocr_noise(line, rng, rate):
+    """Re-introduce known OCR misreads at roughly `rate` of the places they can occur."""
+    return MISREAD_PATTERN.sub(
+        lambda m: rng.choice(MISREADS[m.group(0)]) if rng.random() < rate else m.group(0), line
+    )
+
+
+def _perturb_line(line, rng, noise):
+    if TWO_COL_PATTERN.search(line) or ONE_COL_PATTERN.search(line):
+        line = YIELD_PATTERN.sub(lambda m: _jitter(m, rng), line)
+    return add_ocr_noise(line, rng, noise)
+
+
+def scale_pdf_content(text, factor, seed=0, noise=0.3):
+    """The extraction text repeated `factor` times with renumbered pages."""
+    rng = random.Random(seed)
+    pages = PAGE_MARKER.split(text)
+    # split() with a group gives [preamble, number, body, number, body, ...]
+    preamble, bodies = pages[0], pages[2::2]
+    parts = [preamble]
+    page = 0
+    for copy in range(factor):
+        for body in bodies:
+            page += 1
+            if copy:
+                body = "".join(_perturb_line(line, rng, noise) for line in body.splitlines(keepends=True))
+            parts.append(f"--- Page {page} ---{body}")
+    return "".join(parts)
+
+
+def write_pdf_content(path, factor, seed=0, source=PDF_CONTENT_PATH):
+    with open(source, "r") as f:
+        text = f.read()
+    content = scale_pdf_content(text, factor, seed)
+    with open(path, "w") as f:
+        f.write(content)
+    return content.count("\n")
+
+
+def _yield_cell(rng):
+    value = rng.randint(15, 92)
+    kind = rng.random()
+    if kind < 0.35:
+        return round(value / 100, 3)
+    if kind < 0.55:
+        return value
+    if kind < 0.7:
+        return f"{value}%"
+    if kind < 0.9:
+        spread = rng.randint(2, 8)
+        return rng.choice(["{}-{}%", "{}-{}", " {} - {} % "]).format(value - spread, value + spread)
+    return rng.choice(["", "n/a", "see notes", "30-", None])
+
+
+def synthetic_nhcs_sheet(factor=1, seed=0, base_rows=120):
+    """A DataFrame shaped like Sheet1 of "% Yields NHCS.xlsx" (requires pandas)."""
+    import pandas as pd
+
+    rng = random.Random(seed)
+    notes = [None, None, None, "fillet", "skin on", "skinless", "  headed and gutted ", ""]
+    rows = base_rows * factor
+    names = []
+    for i in range(rows):
+        name = SPECIES_LIST[i % len(SPECIES_LIST)]
+        names.append(name if i < len(SPECIES_LIST) else f"{name} {i // len(SPECIES_LIST)}")
+    return pd.DataFrame({
+        "Common name": [None if rng.random() < 0.02 else name for name in names],
+        "% Yield": [_yield_cell(rng) for _ in range(rows)],
+        "Notes": [rng.choice(notes) for _ in range(rows)],
+    })
+
+
+def write_nhcs_workbook(path, factor=1, seed=0):
+    """Write the synthetic sheet as an .xlsx workbook (requires pandas and openpyxl)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    sheet = synthetic_nhcs_sheet(factor, seed)
+    sheet.to_excel(path, sheet_name="Sheet1", index=False)
+    return len(sheet)
+
+
+PROFILE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{title} | Seafood Profiles</title>
+<script>window.dataLayer = window.dataLayer || []; {script}</script>
+<style>.profile {{ margin: 0 auto; }}</style></head>
+<body><nav><ul>{nav}</ul></nav>
+<main class="profile"><h1>{title}</h1>
+<h2>Description of meat</h2><p>{description}</p>
+<h2>Culinary uses</h2><p>{culinary}</p>
+<h2>Edible portions</h2><p>{edible}</p>
+<h2>Sources</h2><p>{filler}</p>
+</main><footer>{filler}</footer></body></html>
+"""
+
+WORDS = (
+    "firm mild flaky white lean rich sweet delicate moist coarse fine texture flavor fillet steak "
+    "grill bake broil poach smoke sear roast fry cure oil fat season harvest coastal"
+).split()
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_profile_page(title, rng, paragraph_words=60):
+    return PROFILE_TEMPLATE.format(
+        title=title,
+        script="var x = '<h2>not a heading</h2>';" * 20,
+        nav="".join(f'<li><a href="/seafood-profiles/{w}">{w}</a></li>' for w in WORDS),
+        description=_sentence(rng, paragraph_words),
+        culinary=_sentence(rng, paragraph_words),
+        edible=_sentence(rng, paragraph_words // 4),
+        filler=" ".join(_sentence(rng, 20) for _ in range(10)),
+    )
+
+
+def synthetic_profile_pages(factor=1, seed=0, base_pages=24):
+    rng = random.Random(seed)
+    return [synthetic_profile_page(f"Species {i}", rng) for i in range(base_pages * factor)]
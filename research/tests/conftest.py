@@ -0,0 +1,88 @@
+import os
+import sys
+
+# The research scripts are run from inside research/ and import each other
+# as top-level modules, so mirror that for the tests.
+RESEARCH_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RESEARCH_DIR not in sys.path:
+    sys.path.insert(0, RESEARCH_DIR)
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+PROFILE_PAGE = """<html><body><h1>{title}</h1>
+<h3>Description of meat</h3><p>{title} meat is <b>firm</b> and mild.</p>
+<h3>Culinary uses</h3><p>Grill or bake {title}.</p>
+<h3>Edible portions</h3><p>Fillets.</p>
+<h3>Sources</h3><p>Sea Grant</p>
+</body></html>"""
+
+
+class FixtureSite:
+    """A local stand-in for the Sea Grant seafood profile pages."""
+
+    def __init__(self, slugs):
+        self.slugs = list(slugs)
+        self.pages = {"/seafood-profiles": self._index()}
+        for slug in self.slugs:
+            self.pages["/seafood-profiles/" + slug] = PROFILE_PAGE.format(title=slug.replace("-", " ").title())
+        self.requests = []
+        self.failures = {}  # path -> number of 503s to serve before succeeding
+        self.lock = threading.Lock()
+
+    def _index(self):
+        links = "".join(f'<a href="/seafood-profiles/{slug}">{slug}</a>' for slug in self.slugs)
+        links += '<a href="/seafood-profiles?page=2">next</a>'
+        return f"<html><body>{links}</body></html>"
+
+
+@pytest.fixture
+def profile_site():
+    site = FixtureSite(f"fish-{i:02d}" for i in range(24))
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with site.lock:
+                site.requests.append((self.path, dict(self.headers)))
+                failures = site.failures.get(self.path, 0)
+                if failures:
+                    site.failures[self.path] = failures - 1
+            if failures:
+                self._send(503, b"busy")
+                return
+            body = site.pages.get(self.path)
+            if body is None:
+                self._send(404, b"not found")
+                return
+            # Validators: ETag from the body, a fixed Last-Modified
+            etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", {"ETag": etag})
+                return
+            self._send(200, body.encode(), {"ETag": etag, "Last-Modified": "Mon, 05 Jan 2026 00:00:00 GMT"})
+
+        def _send(self, status, body, headers=None):
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    site.url = f"http://127.0.0.1:{server.server_port}"
+    site.handler = Handler
+    yield site
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,175 @@
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_calc import evaluate, evaluate_inputs, parse_float
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "app")
+
+DEFAULT_PRICE_BREAKS = [
+    {"minQty": 100, "discount": 5},
+    {"minQty": 500, "discount": 10},
+    {"minQty": 1000, "discount": 15},
+]
+COST = {"mode": "cost", "yieldPercent": 50, "cost": 2}
+EOS = {**COST, "showEconomyOfScale": True, "priceBreaks": DEFAULT_PRICE_BREAKS}
+
+# (inputs, result, appliedDiscount) from app/src/lib/calcEngine.test.js
+VECTORS = [
+    ({"mode": "cost", "yieldPercent": 42, "cost": 2}, 4.761904761904762, 0),
+    ({"mode": "cost", "yieldPercent": 100, "cost": 3.5}, 3.5, 0),
+    ({"mode": "cost", "yieldPercent": 91, "cost": 2}, 2 / 0.91, 0),
+    ({"mode": "weight", "yieldPercent": 42, "targetWeight": 100}, 238.0952380952381, 0),
+    ({"mode": "weight", "yieldPercent": 91, "targetWeight": 50}, 54.94505494505494, 0),
+    ({"mode": "weight", "yieldPercent": 100, "targetWeight": 100}, 100, 0),
+    ({"mode": "weight", "yieldPercent": 42, "targetWeight": 100, "showEconomyOfScale": True,
+      "quantity": "1200", "priceBreaks": DEFAULT_PRICE_BREAKS}, 238.0952380952381, 0),
+    ({**COST, "processingCost": 0.5, "weightType": "incoming"}, 5, 0),
+    ({**COST, "processingCost": 0.5, "weightType": "outgoing"}, 4.5, 0),
+    ({**COST, "processingCost": 0.5}, 5, 0),
+    ({**COST, "coldStorage": 0.1}, 4.1, 0),
+    ({**COST, "shipping": 0.2}, 4.2, 0),
+    ({**COST, "coldStorage": 0.1, "shipping": 0.2}, 4.3, 0),
+    ({**COST, "showTimeTracking": True, "processingSteps": [{"timeMinutes": 2, "laborCostPerHour": 30}]}, 5.0, 0),
+    ({**COST, "showTimeTracking": True, "processingSteps": [
+        {"timeMinutes": 1, "laborCostPerHour": 30}, {"timeMinutes": 3, "laborCostPerHour": 20}]}, 5.5, 0),
+    ({**COST, "showTimeTracking": False, "processingSteps": [{"timeMinutes": 60, "laborCostPerHour": 100}]}, 4, 0),
+    ({**EOS, "quantity": "50"}, 4, 0),
+    ({**EOS, "quantity": "100"}, 4 * 0.95, 5),
+    ({**EOS, "quantity": "150"}, 3.8, 5),
+    ({**EOS, "quantity": "500"}, 4 * 0.90, 10),
+    ({**EOS, "quantity": "600"}, 3.6, 10),
+    ({**EOS, "quantity": "1000"}, 4 * 0.85, 15),
+    ({**EOS, "quantity": "1200"}, 3.4, 15),
+    ({**EOS, "showEconomyOfScale": False, "quantity": "1200"}, 4, 0),
+    ({**EOS, "quantity": ""}, 4, 0),
+    ({"mode": "cost", "yieldPercent": 41, "cost": 2}, 2 / 0.41, 0),
+    ({"mode": "cost", "yieldPercent": 46, "cost": 2}, 2 / 0.46, 0),
+    ({"mode": "cost", "yieldPercent": 0, "cost": 3}, 3, 0),
+    ({"mode": "weight", "yieldPercent": 0, "targetWeight": 100}, 100, 0),
+    ({"mode": "cost", "yieldPercent": "", "cost": 3}, 3, 0),
+    ({"mode": "cost", "cost": 3}, 3, 0),
+    ({"mode": "cost", "yieldPercent": 1, "cost": 2}, 200, 0),
+    ({"mode": "cost", "yieldPercent": 50, "cost": 2, "processingCost": 0.5, "weightType": "incoming",
+      "coldStorage": 0.1, "shipping": 0.2, "showTimeTracking": True,
+      "processingSteps": [{"timeMinutes": 2, "laborCostPerHour": 30}],
+      "showEconomyOfScale": True, "quantity": "600", "priceBreaks": DEFAULT_PRICE_BREAKS}, 5.67, 10),
+]
+
+
+def test_matches_calc_engine_test_vectors():
+    batch = evaluate_inputs(inputs for inputs, _, _ in VECTORS)
+    for (inputs, result, discount), actual, applied in zip(VECTORS, batch.result, batch.applied_discount):
+        assert actual == pytest.approx(result, abs=1e-10), inputs
+        assert applied == discount, inputs
+
+
+def test_parse_float_follows_js():
+    values = ["42", " 42.5kg", "1e2", "1e", ".5", "-0", "abc", "", None, True, "Infinity", 7]
+    parsed = parse_float(np.array(values, dtype=object))
+    expected = [42, 42.5, 100, 1, 0.5, -0.0, math.nan, math.nan, math.nan, math.nan, math.inf, 7]
+    np.testing.assert_array_equal(parsed, expected)
+
+
+def test_broadcasts_a_sweep():
+    costs = np.linspace(1, 5, 5)[:, None]
+    yields = np.array([0, 25, 50, 100])[None, :]
+    batch = evaluate(cost=costs, yield_percent=yields, processing_cost=0.5, weight_type="outgoing")
+    assert batch.result.shape == (5, 4)
+    # yield 0 falls back to 100%
+    np.testing.assert_allclose(batch.result[:, 0], costs[:, 0] + 0.5)
+    np.testing.assert_allclose(batch.result[:, 2], costs[:, 0] / 0.5 + 0.5)
+
+
+def test_per_scenario_price_break_arrays():
+    quantity = np.array([50, 150, 600, 2000])
+    tier = {"minQty": np.array([100, 100, 1000, 1000]), "discount": 20}
+    batch = evaluate(cost=2, yield_percent=50, show_economy_of_scale=True, quantity=quantity,
+                     price_breaks=[{"minQty": 500, "discount": 10}, tier])
+    np.testing.assert_array_equal(batch.applied_discount, [0, 20, 10, 20])
+
+
+def test_ragged_lists_across_scenarios():
+    batch = evaluate_inputs([
+        {**EOS, "quantity": "600", "priceBreaks": [{"minQty": 100, "discount": 5}]},
+        {**EOS, "quantity": "600"},
+        {**COST, "showTimeTracking": True, "processingSteps": [{"timeMinutes": 2, "laborCostPerHour": 30}]},
+        COST,
+    ])
+    np.testing.assert_array_equal(batch.applied_discount, [5, 10, 0, 0])
+    np.testing.assert_allclose(batch.result, [3.8, 3.6, 5, 4])
+
+
+# A key left out of the input object (JS undefined, not null)
+MISSING = object()
+
+
+def _random_scenario(rng):
+    def number():
+        return rng.choice([0, 0.0, 1, 2.5, 42, 91, 100, 150, -3, "", "12", " 7.5lb", "abc", None, "0"])
+
+    inputs = {"mode": rng.choice(["cost", "weight", "other"])}
+    for key in ["yieldPercent", "targetWeight", "cost", "processingCost", "coldStorage", "shipping", "quantity"]:
+        if rng.random() < 0.8:
+            inputs[key] = number()
+    if rng.random() < 0.8:
+        inputs["weightType"] = rng.choice(["incoming", "outgoing", None])
+    inputs["showTimeTracking"] = rng.random() < 0.5
+    inputs["showEconomyOfScale"] = rng.random() < 0.5
+    inputs["processingSteps"] = [
+        {"timeMinutes": number(), "laborCostPerHour": number()} for _ in range(rng.randrange(3))
+    ]
+    inputs["priceBreaks"] = []
+    for _ in range(rng.randrange(4)):
+        price_break = {"minQty": rng.choice([0, 10, 100, 100, 500, None, "abc", MISSING]),
+                       "discount": rng.choice([0, 5, 10, -5, None, MISSING])}
+        inputs["priceBreaks"].append({k: v for k, v in price_break.items() if v is not MISSING})
+    return inputs
+
+
+# Price breaks with no minQty (undefined: no quantity qualifies, and the
+# sort comparator returns NaN) or a null one (Number(null) is 0)
+UNDEFINED_MIN_QTY = [
+    {**EOS, "quantity": "500", "priceBreaks": [{"discount": 5}]},
+    {**EOS, "quantity": "500", "priceBreaks": [{"minQty": None, "discount": 5}]},
+    {**EOS, "quantity": "500", "priceBreaks": [
+        {"minQty": 100, "discount": 5}, {"discount": 1}, {"minQty": 400, "discount": 10}]},
+    {**EOS, "quantity": "500", "priceBreaks": [
+        {"minQty": 100, "discount": 5}, {"minQty": 400, "discount": 10}, {"discount": 1}]},
+    {**EOS, "quantity": "500", "priceBreaks": [{"minQty": 400}, {"minQty": 100, "discount": 5}]},
+]
+
+
+def test_undefined_and_null_price_break_fields():
+    batch = evaluate_inputs(UNDEFINED_MIN_QTY)
+    # The unsorted [100, undefined, 400] is what V8's sort leaves it as
+    np.testing.assert_array_equal(batch.applied_discount, [0, 5, 5, 10, math.nan])
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_bit_identical_to_calc_engine(tmp_path):
+    rng = random.Random(13)
+    scenarios = UNDEFINED_MIN_QTY + [_random_scenario(rng) for _ in range(2000)]
+    script = tmp_path / "run.mjs"
+    script.write_text(
+        "import { readFileSync } from 'node:fs';\n"
+        f"import {{ calculate }} from {json.dumps('file://' + os.path.join(APP_DIR, 'src', 'lib', 'calcEngine.js'))};\n"
+        "const scenarios = JSON.parse(readFileSync(0, 'utf8'));\n"
+        "console.log(JSON.stringify(scenarios.map(s => { const r = calculate(s);"
+        " return [r.result, Number(r.appliedDiscount)]; })));\n"
+    )
+    out = subprocess.run(["node", str(script)], input=json.dumps(scenarios), capture_output=True, text=True, check=True)
+    expected = json.loads(out.stdout)
+
+    batch = evaluate_inputs(scenarios)
+    for inputs, (result, discount), actual, applied in zip(scenarios, expected, batch.result, batch.applied_discount):
+        # JSON.stringify writes NaN as null
+        assert actual == result or (result is None and math.isnan(actual)), inputs
+        assert applied == discount or (discount is None and math.isnan(applied)), inputs
@@ -0,0 +1,28 @@
+import benchmark
+
+
+def measurement(throughput, peak):
+    return {"count": 100, "unit": "lines", "seconds": 100 / throughput, "throughput": throughput, "peak_bytes": peak}
+
+
+def test_compare_flags_slowdowns_and_memory_growth():
+    baseline = {"clean_ocr": {"10": measurement(1000, 1_000_000), "100": measurement(1000, 1_000_000)}}
+    results = {
+        "clean_ocr": {
+            "10": measurement(800, 1_100_000),    # within 25%
+            "100": measurement(500, 2_000_000),   # both regressed
+        },
+        "validation": {"10": measurement(1, 1)},  # not in the baseline
+    }
+    regressions = benchmark.compare(results, baseline)
+    assert len(regressions) == 2
+    assert all(message.startswith("clean_ocr @ 100x") for message in regressions)
+    assert benchmark.compare(results, baseline, tolerance=1.0) == []
+
+
+def test_runs_benchmarks_at_a_small_scale():
+    results = benchmark.run_benchmarks(["clean_ocr", "profile_extraction"], scales=[1], repeat=1)
+    assert set(results) == {"clean_ocr", "profile_extraction"}
+    for scales in results.values():
+        m = scales["1"]
+        assert m["count"] > 0 and m["throughput"] > 0 and m["peak_bytes"] > 0
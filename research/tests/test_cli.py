@@ -0,0 +1,51 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+import cli
+
+RESEARCH_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_every_command_module_has_main():
+    for module, _ in cli.COMMANDS.values():
+        assert callable(importlib.import_module(module).main)
+
+
+def test_dispatch_runs_the_command_with_its_arguments(tmp_path, capsys):
+    report = tmp_path / "report.json"
+    assert cli.main(["validate", "--no-pdf", "--report", str(report)]) == 0
+    assert json.loads(report.read_text(encoding="utf-8"))
+
+    assert cli.main(["-C", str(tmp_path), "resolve", "Cod, Pacific"]) == 0
+    assert capsys.readouterr().out.splitlines()[-1].split("\t")[:2] == ["Cod, Pacific", "Pacific Cod"]
+
+    assert cli.main(["validate", "--help"]) == 0
+    assert "cli.py validate" in capsys.readouterr().out
+    assert cli.main(["no-such-command"]) == 2
+
+
+def test_quick_commands_dont_import_heavy_modules(tmp_path):
+    code = (
+        "import sys, cli\n"
+        "cli.main(['validate', '--no-pdf', '--report', sys.argv[1] + '/report.json'])\n"
+        "cli.main(['-C', sys.argv[1], 'resolve', 'Chinook'])\n"
+        f"print(sorted(set({cli.HEAVY_MODULES!r}) & set(sys.modules)))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code, str(tmp_path)], cwd=RESEARCH_DIR,
+        capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.splitlines()[-1] == "[]"
+
+
+def test_measure_startup():
+    results = cli.measure_startup(["resolve", "merge"], repeat=1)
+    assert list(results) == ["resolve", "merge"]
+    for command, m in results.items():
+        assert m["module"] == cli.COMMANDS[command][0]
+        assert m["import_ms"] > 0
+        assert m["heavy"] == []
+    assert "resolve" in cli.format_startup(results)
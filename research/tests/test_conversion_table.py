@@ -0,0 +1,186 @@
+import gc
+import tracemalloc
+
+import pytest
+
+from conversion_table import ConversionTable, Interner
+from js_data import load_fish_data_v3
+
+# A sample of the dataset with from/to fields on every conversion
+CORRECTED_DATA = {
+    "Flathead Sole": {
+        "scientific_name": "Hippoglossoides elassodon",
+        "conversions": {
+            "Round → D/H-On": {"yield": 86, "range": [80, 94], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 67, "range": [60, 79], "from": "Round", "to": "D/H-Off"},
+            "Round → Skinless Fillet": {"yield": 27, "range": [25, 32], "from": "Round", "to": "Skinless Fillet"},
+        }
+    },
+    "Pink Salmon": {
+        "scientific_name": "Oncorhynchus gorbuscha",
+        "conversions": {
+            "Round → D/H-On": {"yield": 91, "range": [84, 94], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 73, "range": [68, 80], "from": "Round", "to": "D/H-Off"},
+            "Round → Canned": {"yield": 65, "range": [58, 67], "from": "Round", "to": "Canned"},
+            "Round → Skin-On Fillet (Hand)": {"yield": 52, "range": [47, 58], "from": "Round", "to": "Skin-On Fillet (Hand)"},
+            "Round → Skin-On Fillet (Machine)": {"yield": 50, "range": [45, 55], "from": "Round", "to": "Skin-On Fillet (Machine)"},
+            "Round → Skinless Fillet": {"yield": 42, "range": [41, 46], "from": "Round", "to": "Skinless Fillet"},
+            "Round → SIB Fillet (Hand-V-Cut)": {"yield": 33, "range": [30, 36], "from": "Round", "to": "SIB Fillet (Hand-V-Cut)"},
+            "Round → SIB Fillet (Pinboning)": {"yield": 41, "range": [40, 44], "from": "Round", "to": "SIB Fillet (Pinboning)"},
+            "Round → SIB Trim": {"yield": 14, "range": [12, 16], "from": "Round", "to": "SIB Trim"},
+            "Round → Steaks": {"yield": 58, "range": [53, 65], "from": "Round", "to": "Steaks"},
+            "Round → Roe": {"yield": 6, "range": [3, 10], "from": "Round", "to": "Roe"},
+            "D/H-On → D/H-Off": {"yield": 81, "range": [72, 90], "from": "D/H-On", "to": "D/H-Off"},
+            "D/H-On → Skin-On Fillet (Hand)": {"yield": 57, "range": [50, 64], "from": "D/H-On", "to": "Skin-On Fillet (Hand)"},
+            "D/H-On → Skin-On Fillet (Machine)": {"yield": 55, "range": [48, 61], "from": "D/H-On", "to": "Skin-On Fillet (Machine)"},
+        }
+    },
+    "Chum Salmon": {
+        "scientific_name": "Oncorhynchus keta",
+        "conversions": {
+            "Round → D/H-On": {"yield": 89, "range": [79, 91], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 74, "range": [71, 77], "from": "Round", "to": "D/H-Off"},
+            "Round → Canned": {"yield": 67, "range": [60, 70], "from": "Round", "to": "Canned"},
+            "Round → Skin-On Fillet (Hand)": {"yield": 60, "range": [55, 63], "from": "Round", "to": "Skin-On Fillet (Hand)"},
+            "Round → Skinless Fillet": {"yield": 50, "range": [45, 53], "from": "Round", "to": "Skinless Fillet"},
+            "Round → Roe": {"yield": 8, "range": [4, 10], "from": "Round", "to": "Roe"},
+        }
+    },
+    "Sockeye Salmon": {
+        "scientific_name": "Oncorhynchus nerka",
+        "conversions": {
+            "Round → D/H-On": {"yield": 92, "range": [85, 94], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 74, "range": [66, 82], "from": "Round", "to": "D/H-Off"},
+            "Round → Canned": {"yield": 67, "range": [60, 70], "from": "Round", "to": "Canned"},
+            "Round → Skin-On Fillet (Hand)": {"yield": 53, "range": [50, 59], "from": "Round", "to": "Skin-On Fillet (Hand)"},
+            "Round → Skinless Fillet": {"yield": 46, "range": [41, 49], "from": "Round", "to": "Skinless Fillet"},
+            "Round → Roe": {"yield": 4, "range": [3, 6], "from": "Round", "to": "Roe"},
+        }
+    },
+    "Coho Salmon": {
+        "scientific_name": "Oncorhynchus kisutch",
+        "conversions": {
+            "Round → D/H-On": {"yield": 92, "range": [87, 94], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 75, "range": [70, 83], "from": "Round", "to": "D/H-Off"},
+            "Round → Canned": {"yield": 67, "range": [60, 70], "from": "Round", "to": "Canned"},
+            "Round → Skin-On Fillet (Hand)": {"yield": 57, "range": [52, 60], "from": "Round", "to": "Skin-On Fillet (Hand)"},
+            "Round → Skinless Fillet": {"yield": 51, "range": [46, 56], "from": "Round", "to": "Skinless Fillet"},
+            "Round → Roe": {"yield": 7, "range": [5, 10], "from": "Round", "to": "Roe"},
+        }
+    },
+    "Chinook Salmon": {
+        "scientific_name": "Oncorhynchus tshawytscha",
+        "conversions": {
+            "Round → D/H-On": {"yield": 88, "range": [82, 94], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 72, "range": [68, 74], "from": "Round", "to": "D/H-Off"},
+            "Round → Skin-On Fillet (Hand)": {"yield": 55, "range": [52, 60], "from": "Round", "to": "Skin-On Fillet (Hand)"},
+            "Round → Skinless Fillet": {"yield": 46, "range": [41, 49], "from": "Round", "to": "Skinless Fillet"},
+            "Round → Roe": {"yield": 6, "range": [3, 10], "from": "Round", "to": "Roe"},
+        }
+    },
+    "Pacific Cod": {
+        "scientific_name": "Gadus macrocephalus",
+        "conversions": {
+            "Round → D/H-On": {"yield": 81, "range": [72, 90], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 63, "range": [56, 75], "from": "Round", "to": "D/H-Off"},
+            "Round → Skin-On Fillets (V-cut)": {"yield": 45, "range": [38, 48], "from": "Round", "to": "Skin-On Fillets (V-cut)"},
+            "Round → Skinless Fillets (V-cut)": {"yield": 39, "range": [22, 45], "from": "Round", "to": "Skinless Fillets (V-cut)"},
+            "Round → SIB Fillets (V-cut)": {"yield": 33, "range": [18, 39], "from": "Round", "to": "SIB Fillets (V-cut)"},
+            "Round → Steaks": {"yield": 62, "range": None, "from": "Round", "to": "Steaks"},
+            "D/H-Off → Smoked": {"yield": 58, "range": [50, 65], "from": "D/H-Off", "to": "Smoked"},
+        }
+    },
+    "Pacific Halibut": {
+        "scientific_name": "Hippoglossus stenolepis",
+        "conversions": {
+            "Round → D/H-On": {"yield": 88, "range": [85, 92], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 72, "range": [68, 80], "from": "Round", "to": "D/H-Off"},
+            "Round → Steaks": {"yield": 62, "range": [60, 75], "from": "Round", "to": "Steaks"},
+            "Round → Skin-On Fillet": {"yield": 49, "range": [45, 56], "from": "Round", "to": "Skin-On Fillet"},
+            "Round → Skinless Fillet (Fletch)": {"yield": 41, "range": [34, 44], "from": "Round", "to": "Skinless Fillet (Fletch)"},
+            "D/H-On → D/H-Off": {"yield": 83, "range": [73, 94], "from": "D/H-On", "to": "D/H-Off"},
+            "D/H-On → Steaks": {"yield": 76, "range": [71, 88], "from": "D/H-On", "to": "Steaks"},
+            "D/H-Off → Steaks": {"yield": 79, "range": [70, 94], "from": "D/H-Off", "to": "Steaks"},
+        }
+    },
+    "Dungeness Crab": {
+        "scientific_name": "Cancer magister",
+        "conversions": {
+            "Raw Whole → Raw Sections": {"yield": 60, "range": None, "from": "Raw Whole", "to": "Raw Sections"},
+            "Raw Whole → Cooked Whole": {"yield": 90, "range": None, "from": "Raw Whole", "to": "Cooked Whole"},
+            "Raw Whole → Cooked Sections": {"yield": 52, "range": None, "from": "Raw Whole", "to": "Cooked Sections"},
+            "Raw Whole → Cooked Meat": {"yield": 24, "range": [22, 25], "from": "Raw Whole", "to": "Cooked Meat"},
+        }
+    },
+    "Sablefish": {
+        "scientific_name": "Anoplopoma fimbria",
+        "conversions": {
+            "Round → D/H-On": {"yield": 89, "range": [86, 94], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 68, "range": [67, 71], "from": "Round", "to": "D/H-Off"},
+            "Round → Skin-On Fillet": {"yield": 40, "range": [38, 46], "from": "Round", "to": "Skin-On Fillet"},
+            "Round → Skinless Fillet": {"yield": 35, "range": None, "from": "Round", "to": "Skinless Fillet"},
+            "Round → Steaks": {"yield": 62, "range": [60, 65], "from": "Round", "to": "Steaks"},
+            "D/H-Off → Smoked Sides": {"yield": 45, "range": [40, 49], "from": "D/H-Off", "to": "Smoked Sides"},
+        }
+    },
+    "Lingcod": {
+        "scientific_name": "Ophiodon elongatus",
+        "conversions": {
+            "Round → D/H-On": {"yield": 90, "range": [83, 93], "from": "Round", "to": "D/H-On"},
+            "Round → D/H-Off": {"yield": 70, "range": [62, 74], "from": "Round", "to": "D/H-Off"},
+            "Round → Skinless Fillet": {"yield": 35, "range": [29, 38], "from": "Round", "to": "Skinless Fillet"},
+            "Round → Steaks": {"yield": 62, "range": None, "from": "Round", "to": "Steaks"},
+            "D/H-On → D/H-Off": {"yield": 80, "range": [67, 89], "from": "D/H-On", "to": "D/H-Off"},
+        }
+    },
+}
+
+
+def test_round_trips_the_app_dataset():
+    data = load_fish_data_v3()
+    table = ConversionTable.from_v3(data)
+    assert len(table) == sum(len(d["conversions"]) for d in data.values())
+    assert table.to_v3() == data
+
+
+def test_round_trips_conversions_with_endpoints():
+    table = ConversionTable.from_v3(CORRECTED_DATA)
+    assert table.to_v3(with_endpoints=True) == CORRECTED_DATA
+
+
+def test_lookup():
+    table = ConversionTable.from_js()
+    assert table.lookup("Pink Salmon", "Round", "D/H-On") == {"yield": 91, "range": [84, 94]}
+    assert table.lookup("Pink Salmon", "Round", "Smoked Sides") == {"yield": 30, "range": None}
+    assert table.lookup("Pink Salmon", "Round", "Nope") is None
+    assert table.lookup("Nope", "Round", "D/H-On") is None
+
+
+def test_versions_share_interned_ids():
+    species, forms = Interner(), Interner()
+    v1 = ConversionTable.from_v3(CORRECTED_DATA, species, forms)
+    v2 = ConversionTable.from_js(species=species, forms=forms)
+    assert v1.forms is v2.forms
+    assert forms.ids["Round"] == v1.from_ids[0] == v2.from_ids[0]
+
+
+def test_uses_a_fraction_of_the_dict_memory():
+    def allocated(build):
+        gc.collect()
+        tracemalloc.start()
+        obj = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return obj, size
+
+    data, dict_size = allocated(load_fish_data_v3)
+    table, table_size = allocated(lambda: ConversionTable.from_v3(data))
+    assert table_size < dict_size / 3
+
+
+def test_numpy_views():
+    np = pytest.importorskip("numpy")
+    table = ConversionTable.from_js()
+    columns = table.columns_as_numpy()
+    assert columns["yield"].shape == (len(table),)
+    assert np.isnan(columns["range_low"]).sum() == sum(1 for row in table.rows() if row[4] is None)
@@ -0,0 +1,95 @@
+import json
+import os
+import sqlite3
+
+import delta_export
+from js_data import load_fish_data_v3
+
+FISH_DATA = load_fish_data_v3()
+
+
+def changed_dataset():
+    data = json.loads(json.dumps(FISH_DATA))
+    first, second, third = list(data)[:3]
+    data[first]["conversions"]["Round → D/H-On"]["yield"] += 1
+    data[second]["conversions"]["Round → Brand New Form"] = {"yield": 42.5, "range": None}
+    removed = next(iter(data[third]["conversions"]))
+    del data[third]["conversions"][removed]
+    data[first]["scientific_name"] = "Changedus nameus"
+    dropped = list(data)[-1]
+    del data[dropped]
+    data["Test Fish"] = {"scientific_name": "", "category": "Other", "conversions": {
+        "Round → Fillet": {"yield": 40, "range": [35, 45.5]}}}
+    return data, (first, second, third, removed, dropped)
+
+
+def published(tmp_path, fish_data=FISH_DATA):
+    path = str(tmp_path / "snapshot.json")
+    delta_export.write_snapshot(delta_export.dataset_rows(fish_data), path)
+    return path
+
+
+def test_diff_against_published_snapshot(tmp_path):
+    data, (first, second, third, removed, dropped) = changed_dataset()
+    delta = delta_export.export(data, published(tmp_path), str(tmp_path / "out"))
+
+    species, yields = delta["species"], delta["fish_yields"]
+    assert [row[0] for row in species.inserted] == ["Test Fish"]
+    assert [row[0] for row in species.updated] == [first]
+    assert species.deleted == [dropped]
+    assert [row[:3] for row in yields.updated] == [(first, "Round", "D/H-On")]
+    assert {row[:3] for row in yields.inserted} == {
+        (second, "Round", "Brand New Form"), ("Test Fish", "Round", "Fillet")}
+    deleted = set(yields.deleted)
+    assert (third, *removed.split(" → ")) in deleted
+    assert {key for key in deleted if key[0] != dropped} == {(third, *removed.split(" → "))}
+
+    with open(tmp_path / "out" / "delta.json", encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["species"]["deleted"] == [[dropped]]
+    assert len(summary["fish_yields"]["deleted"]) == len(deleted)
+
+
+def test_delta_applied_to_sqlite_matches_full_load(tmp_path):
+    data, _ = changed_dataset()
+    snapshot = published(tmp_path)
+    out = str(tmp_path / "out")
+    delta_export.export(data, snapshot, out)
+    assert delta_export.verify_sqlite(snapshot, out)
+
+    conn = sqlite3.connect(":memory:")
+    delta_export.apply_sqlite(conn, out, full=True)
+    species, yields = delta_export.table_contents(conn)
+    assert len(species) == len(data)
+    assert ("Test Fish", "Round", "Fillet", 40, 35, 45.5) in yields
+
+
+def test_empty_values_are_null(tmp_path):
+    data, _ = changed_dataset()
+    out = tmp_path / "out"
+    delta_export.export(data, str(tmp_path / "missing.json"), str(out))
+    lines = (out / "species.csv").read_text(encoding="utf-8").splitlines()
+    assert "Test Fish,,Other" in lines
+    assert '""' not in (out / "fish_yields.csv").read_text(encoding="utf-8")
+
+
+def test_nothing_changed_after_publishing(tmp_path):
+    snapshot = str(tmp_path / "snapshot.json")
+    first = delta_export.export(FISH_DATA, snapshot, str(tmp_path / "a"))
+    assert len(first["fish_yields"].inserted) == len(delta_export.dataset_rows(FISH_DATA).yields)
+
+    delta_export.write_snapshot(delta_export.dataset_rows(FISH_DATA), snapshot)
+    second = delta_export.export(FISH_DATA, snapshot, str(tmp_path / "b"))
+    assert all(not any(d) for d in second.values())
+    assert os.path.getsize(tmp_path / "b" / "fish_yields_upsert.csv") == len(
+        ",".join(delta_export.YIELD_COLUMNS)) + 1
+    assert (tmp_path / "a" / "fish_yields.csv").read_bytes() == (tmp_path / "b" / "fish_yields.csv").read_bytes()
+
+
+def test_keys_the_importer_skips_are_left_out():
+    rows = delta_export.dataset_rows({"Test Fish": {"conversions": {
+        "Round → Fillet": {"yield": 40, "range": None},
+        "Round → Fillet → Smoked": {"yield": 20, "range": None},
+        "Round": {"yield": 100, "range": None},
+    }}})
+    assert list(rows.yields) == [("Test Fish", "Round", "Fillet")]
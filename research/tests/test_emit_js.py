@@ -0,0 +1,82 @@
+import gzip
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import emit_js
+from js_data import load_fish_data_v3
+
+FISH_DATA = load_fish_data_v3()
+
+
+def read_dir(path):
+    result = {}
+    for name in sorted(os.listdir(path)):
+        with open(os.path.join(path, name), "rb") as f:
+            result[name] = f.read()
+    return result
+
+
+def test_output_is_deterministic(tmp_path):
+    emit_js.emit(FISH_DATA, str(tmp_path / "a"))
+    emit_js.emit(dict(FISH_DATA), str(tmp_path / "b"))
+    a, b = read_dir(tmp_path / "a"), read_dir(tmp_path / "b")
+    assert a == b
+    for name, content in a.items():
+        if name.endswith(".gz"):
+            assert gzip.decompress(content) == a[name[:-3]]
+
+
+def test_search_index():
+    modules = emit_js.render_modules(FISH_DATA)
+    index_source = modules[emit_js.INDEX_NAME]
+    categories = json.loads(index_source.split("export const CATEGORIES=")[1].split(";\n")[0])
+    index = json.loads(index_source.split("export const SEARCH_INDEX=")[1].rstrip(";\n"))
+
+    assert set(categories.values()) | {emit_js.INDEX_NAME} == set(modules)
+    assert index["categories"] == list(categories)
+    assert [entry[0] for entry in index["species"]] == list(FISH_DATA)
+    name, scientific_name, category, forms = index["species"][0]
+    assert scientific_name == FISH_DATA[name]["scientific_name"]
+    assert index["categories"][category] == FISH_DATA[name]["category"]
+    assert {"Round", "D/H-On", "Canned"} <= {index["forms"][i] for i in forms}
+
+
+def test_rewrites_only_changes_and_removes_stale_chunks(tmp_path):
+    out = str(tmp_path)
+    (tmp_path / "README").write_text("not ours")
+    first = {f.name for f in emit_js.emit(FISH_DATA, out)}
+    mtimes = {name: os.stat(os.path.join(out, name)).st_mtime_ns for name in os.listdir(out)}
+
+    changed = json.loads(json.dumps(FISH_DATA))
+    salmon = next(name for name, data in changed.items() if data["category"] == "Salmon")
+    changed[salmon]["conversions"]["Round → D/H-On"]["yield"] += 1
+    second = {f.name for f in emit_js.emit(changed, out, compress=False)}
+
+    replaced = first - second
+    assert len(replaced) == 1 and replaced.pop().startswith("salmon.")
+    names = set(os.listdir(out))
+    assert names == second | {"README"}
+    for name in second - {emit_js.INDEX_NAME} - {n for n in second if n.startswith("salmon.")}:
+        assert os.stat(os.path.join(out, name)).st_mtime_ns == mtimes[name]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_modules_load_in_node(tmp_path):
+    emit_js.emit(FISH_DATA, str(tmp_path), compress=False)
+    script = tmp_path / "load.mjs"
+    script.write_text(
+        "import { CATEGORIES, SEARCH_INDEX } from './index.js';\n"
+        "const data = {};\n"
+        "for (const file of Object.values(CATEGORIES)) {\n"
+        "  Object.assign(data, (await import('./' + file)).default);\n"
+        "}\n"
+        "console.log(JSON.stringify({ data, species: SEARCH_INDEX.species.length }));\n"
+    )
+    out = subprocess.run(["node", str(script)], capture_output=True, text=True, check=True)
+    loaded = json.loads(out.stdout)
+    assert loaded["data"] == FISH_DATA
+    assert loaded["species"] == len(FISH_DATA)
@@ -0,0 +1,119 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import excel_ingest
+import synthetic_corpus
+from excel_ingest import load_sheet, load_workbook, read_workbook
+from update_fish_data import normalize_yields
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    book = Workbook()
+    sheet = book.active
+    sheet.title = "Sheet1"
+    for row in [
+        [" Common  name ", "% Yield", None, "Notes", "Packed"],
+        ["Cod", 0.8, None, "fillet", datetime.datetime(2020, 1, 2)],
+        ["Hake", "80-85%", None, None, datetime.datetime(2021, 3, 4, 5, 6)],
+        [None, None, None, None, None],
+        ["Pollock", "n/a", None, "", None],
+        ["Sole", 80.0, None, datetime.time(3, 4), datetime.datetime(2022, 1, 1)],
+        ["Tuna", True, None, 12.5, datetime.datetime(2023, 1, 1)],
+    ]:
+        sheet.append(row)
+    book.create_sheet("Empty")
+    numbers = book.create_sheet("Numbers")
+    for row in [["code", "count"], ["80", 1], ["7", None]]:
+        numbers.append(row)
+    path = str(tmp_path / "yields.xlsx")
+    book.save(path)
+    return path
+
+
+def assert_same_frames(actual, expected):
+    assert list(actual) == list(expected)
+    for sheet in expected:
+        pd.testing.assert_frame_equal(actual[sheet], expected[sheet])
+        assert [type(v) for v in actual[sheet].to_numpy().ravel()] == \
+            [type(v) for v in expected[sheet].to_numpy().ravel()]
+
+
+def test_matches_read_excel(workbook):
+    expected = pd.read_excel(workbook, sheet_name=None)
+    expected["Sheet1"].columns = ["Common name", "% Yield", "Unnamed: 2", "Notes", "Packed"]
+    assert_same_frames(read_workbook(workbook), expected)
+
+
+def test_cache_round_trip(workbook, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    fresh = load_workbook(workbook, cache_dir)
+    assert os.listdir(cache_dir) == [excel_ingest.file_hash(workbook) + ".npz"]
+    assert_same_frames(load_workbook(workbook, cache_dir), fresh)
+
+
+def test_cache_hit_skips_the_workbook(workbook, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    load_workbook(workbook, cache_dir)
+
+    def unexpected(path):
+        raise AssertionError("workbook parsed again")
+
+    monkeypatch.setattr(excel_ingest, "read_workbook", unexpected)
+    assert load_sheet(workbook, "Numbers", cache_dir)["code"].tolist() == [80, 7]
+    with pytest.raises(ValueError):
+        load_sheet(workbook, "Sheet2", cache_dir)
+
+
+def test_changed_workbook_is_parsed_again(tmp_path):
+    path = str(tmp_path / "yields.xlsx")
+    cache_dir = str(tmp_path / "cache")
+    synthetic_corpus.write_nhcs_workbook(path, seed=0)
+    first = load_sheet(path, cache_dir=cache_dir)
+    synthetic_corpus.write_nhcs_workbook(path, seed=1)
+    second = load_sheet(path, cache_dir=cache_dir)
+    assert not first.equals(second)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_normalized_yields_unchanged(tmp_path):
+    path = str(tmp_path / "yields.xlsx")
+    synthetic_corpus.write_nhcs_workbook(path, factor=2)
+    cache_dir = str(tmp_path / "cache")
+    expected = normalize_yields(pd.read_excel(path, sheet_name="Sheet1"))
+    for _ in range(2):
+        yields, rejects = normalize_yields(load_sheet(path, cache_dir=cache_dir))
+        pd.testing.assert_frame_equal(yields, expected[0])
+        pd.testing.assert_frame_equal(rejects, expected[1])
+
+
+def test_all_text_yields_normalize_from_the_workbook(tmp_path):
+    # Read as the str dtype on pandas 3, both from the workbook and the cache
+    path = str(tmp_path / "yields.xlsx")
+    book = Workbook()
+    sheet = book.active
+    sheet.title = "Sheet1"
+    for row in [["Common name", "% Yield", "Notes"], ["Cod", "80-85%", "fillet"], ["Hake", "70%", None],
+                ["Scup", "65%", None], ["Skate", "0.5", None]]:
+        sheet.append(row)
+    book.save(path)
+
+    cache_dir = str(tmp_path / "cache")
+    for _ in range(2):
+        yields, rejects = normalize_yields(load_sheet(path, cache_dir=cache_dir))
+        assert rejects.empty
+        assert list(zip(yields["name"], yields["yield"], yields["range"])) == [
+            ("Cod", 82, "80-85"), ("Hake", 70, "65-75"), ("Scup", 65, "60-70"), ("Skate", 0, "-5-5"),
+        ]
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_uncacheable_cells_are_read_but_not_cached(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    frames = {"Sheet1": pd.DataFrame({"a": [datetime.date(2020, 1, 1), "x"]})}
+    assert not excel_ingest.write_cache(os.path.join(cache_dir, "x.npz"), frames)
+    assert not os.path.exists(cache_dir)
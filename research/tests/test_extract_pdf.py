@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+import extract_pdf
+
+PDF_PATH = os.path.join(extract_pdf.__file__.rsplit(os.sep, 1)[0], "MAB-37PDF-Recoveries and Yields fro.pdf")
+
+
+@pytest.mark.parametrize("spec, expected", [
+    (None, [0, 1, 2, 3, 4]),
+    ("2", [1]),
+    ("1-3", [0, 1, 2]),
+    ("4-", [3, 4]),
+    ("-2,5", [0, 1, 4]),
+    ("1-2,2-3", [0, 1, 2]),
+])
+def test_parse_page_range(spec, expected):
+    assert extract_pdf.parse_page_range(spec, 5) == expected
+
+
+@pytest.mark.parametrize("spec", ["0", "6", "4-2", "3-9"])
+def test_parse_page_range_rejects_out_of_bounds(spec):
+    with pytest.raises(ValueError):
+        extract_pdf.parse_page_range(spec, 5)
+
+
+def test_parallel_extraction_reuses_cache(tmp_path):
+    out = tmp_path / "out.txt"
+    cache = tmp_path / "cache"
+
+    first = extract_pdf.extract_text_parallel(PDF_PATH, str(out), pages="5-6", workers=2, cache_dir=str(cache))
+    assert first.startswith("--- Page 5 ---\n")
+    assert "--- Page 6 ---\n" in first
+    assert len(os.listdir(cache)) == 2
+
+    mtime = os.stat(out).st_mtime_ns
+    second = extract_pdf.extract_text_parallel(PDF_PATH, str(out), pages="5-6", workers=2, cache_dir=str(cache))
+    assert second == first
+    assert os.stat(out).st_mtime_ns == mtime
+
+
+def test_page_fingerprint_covers_fonts():
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import NameObject
+
+    page = PdfReader(PDF_PATH).pages[4]
+    key = extract_pdf.page_fingerprint("pdf-a", page)
+    # Stable across readers and independent of the rest of the file
+    assert extract_pdf.page_fingerprint("pdf-b", PdfReader(PDF_PATH).pages[4]) == key
+
+    # Same content stream, different font: not the same text
+    fonts = page["/Resources"]["/Font"]
+    font = fonts[sorted(fonts)[0]]
+    font[NameObject("/BaseFont")] = NameObject("/SomeOtherFont")
+    assert page.get_contents().get_data() == PdfReader(PDF_PATH).pages[4].get_contents().get_data()
+    assert extract_pdf.page_fingerprint("pdf-a", page) != key
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+
+from fish_store import FishStore, open_store, render_js, split_legacy_js
+
+LEGACY_JS = (
+    'const FISH_DATA = {\n'
+    '    "Cod, Pacific": {"Round D/H-On": {"yield": "81", "range": "72-90"}},\n'
+    '    "Salmon": {"Steaks": {"yield": "58", "range": null}}\n'
+    '};\n'
+    'const PROFILES_DATA = {"Lingcod": {"description": "Firm"}};\n'
+)
+
+
+def test_seeds_from_legacy_js_and_round_trips(tmp_path):
+    js_path = tmp_path / "fish_data.js"
+    js_path.write_text(LEGACY_JS)
+
+    with open_store(str(tmp_path / "store.sqlite"), str(js_path)) as store:
+        fish_data, profiles_js = split_legacy_js(LEGACY_JS)
+        assert store.fish_data() == fish_data
+        assert store.profiles_js == profiles_js
+        # Freshly seeded store matches the file, so nothing is rewritten
+        assert store.export_js(str(js_path)) is False
+
+
+def test_upserts_only_count_real_changes(tmp_path):
+    with FishStore(str(tmp_path / "store.sqlite")) as store:
+        assert store.upsert_products([("Cod", "Round", "81", "72-90"), ("Cod", "Steaks", "62", None)]) == 2
+        revision = store.revision
+        assert store.upsert_products([("Cod", "Round", "81", "72-90")]) == 0
+        assert store.revision == revision
+        assert store.upsert_products([("Cod", "Round", "80", "72-90"), ("Hake", "Round", "50", None)]) == 2
+
+        # Updated rows keep their original position
+        assert list(store.fish_data()["Cod"]) == ["Round", "Steaks"]
+        assert store.fish_data()["Cod"]["Round"] == {"yield": "80", "range": "72-90"}
+
+
+def test_export_only_when_changed(tmp_path):
+    js_path = str(tmp_path / "out" / "fish_data.js")
+    with FishStore(str(tmp_path / "store.sqlite")) as store:
+        store.upsert_products([("Cod", "Round", "81", "72-90")])
+        assert store.export_js(js_path) is True
+        mtime = os.stat(js_path).st_mtime_ns
+
+        assert store.export_js(js_path) is False
+        store.upsert_products([("Cod", "Round", "81", "72-90")])
+        assert store.export_js(js_path) is False
+        assert os.stat(js_path).st_mtime_ns == mtime
+
+        store.set_profiles_js("const PROFILES_DATA = {};\n")
+        assert store.export_js(js_path) is True
+        with open(js_path) as f:
+            assert f.read() == render_js(store.fish_data(), "const PROFILES_DATA = {};\n")
+
+
+def test_replace_source_drops_rows_missing_from_the_new_run(tmp_path):
+    with FishStore(str(tmp_path / "store.sqlite")) as store:
+        store.upsert_products([("Cod", "Skin", "40", None)])  # legacy row, no source
+        store.replace_source("pdf", [("Cod", "Round", "81", None), ("Cod", "Steaks", "62", None)])
+        store.replace_source("nhcs", [("Scup", "Fillet", "35", None)])
+        revision = store.revision
+        assert store.replace_source("pdf", [("Cod", "Round", "81", None), ("Cod", "Steaks", "62", None)]) == 0
+        assert store.revision == revision
+
+        # Steaks dropped out of the re-parse; other sources' and legacy rows stay
+        assert store.replace_source("pdf", [("Cod", "Round", "80", None)]) == 2
+        assert store.fish_data() == {
+            "Cod": {"Skin": {"yield": "40", "range": None}, "Round": {"yield": "80", "range": None}},
+            "Scup": {"Fillet": {"yield": "35", "range": None}},
+        }
+        # A source that writes a legacy row takes it over
+        store.replace_source("nhcs", [("Scup", "Fillet", "35", None), ("Cod", "Skin", "40", None)])
+        assert store.replace_source("nhcs", []) == 2
+        assert list(store.fish_data()) == ["Cod"]
+
+
+def test_adds_source_column_to_an_existing_store(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE products (species TEXT NOT NULL, product TEXT NOT NULL, yield TEXT, range TEXT, "
+                 "PRIMARY KEY (species, product))")
+    conn.execute("INSERT INTO products VALUES ('Cod', 'Round', '81', NULL)")
+    conn.commit()
+    conn.close()
+
+    with FishStore(path) as store:
+        assert store.replace_source("pdf", [("Cod", "Steaks", "62", None)]) == 1
+        assert store.fish_data() == {"Cod": {"Round": {"yield": "81", "range": None},
+                                             "Steaks": {"yield": "62", "range": None}}}
@@ -0,0 +1,127 @@
+import pytest
+
+pytest.importorskip("requests")
+
+import scrape_profiles
+from http_cache import CacheMiss, HttpCache
+
+
+def scrape(site, tmp_path, **kwargs):
+    return scrape_profiles.scrape_profiles(
+        site.url + "/seafood-profiles",
+        output_path=None, concurrency=4, rate=0, backoff=0.01,
+        cache_path=str(tmp_path / "cache.sqlite"), **kwargs,
+    )
+
+
+def test_unchanged_pages_revalidate_with_304(profile_site, tmp_path, monkeypatch):
+    first = scrape(profile_site, tmp_path)
+    assert len(first) == 24
+
+    profile_site.requests.clear()
+    parsed = set()
+
+    class CountingParser(scrape_profiles.ProfileSectionParser):
+        def feed_chunk(self, chunk):
+            parsed.add(id(self))
+            return super().feed_chunk(chunk)
+
+    monkeypatch.setattr(scrape_profiles, "ProfileSectionParser", CountingParser)
+
+    # Change one page; the rest answer 304 and aren't re-parsed
+    profile_site.pages["/seafood-profiles/fish-05"] = profile_site.pages["/seafood-profiles/fish-05"].replace("mild", "sweet")
+    second = scrape(profile_site, tmp_path)
+
+    assert len(parsed) == 1
+    assert second["Fish 05"]["description"] == "Fish 05 meat is firm and sweet."
+    assert {k: v for k, v in second.items() if k != "Fish 05"} == {k: v for k, v in first.items() if k != "Fish 05"}
+    assert all("If-None-Match" in headers for _, headers in profile_site.requests)
+
+
+def test_offline_mode_serves_only_from_cache(profile_site, tmp_path):
+    first = scrape(profile_site, tmp_path)
+    profile_site.requests.clear()
+
+    assert scrape(profile_site, tmp_path, offline=True) == first
+    assert profile_site.requests == []
+
+    with HttpCache(str(tmp_path / "cache.sqlite"), offline=True) as cache:
+        with pytest.raises(CacheMiss):
+            cache.get(None, profile_site.url + "/seafood-profiles/unknown")
+
+
+def test_eviction_by_size_and_age(profile_site, tmp_path):
+    scrape(profile_site, tmp_path)
+    path = str(tmp_path / "cache.sqlite")
+
+    with HttpCache(path, max_bytes=2000) as cache:
+        assert cache.evict() > 0
+        total = cache.conn.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+        assert total <= 2000
+
+    with HttpCache(path, max_age=-1) as cache:
+        cache.evict()
+        assert cache.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+
+
+class FakeResponse:
+    status_code = 200
+    encoding = "utf-8"
+    headers = {"ETag": '"v1"'}
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_content(self, chunk_size):
+        return iter(self.chunks)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        return FakeResponse(self.chunks)
+
+
+def test_stream_stopped_early_still_caches_the_whole_body(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    chunks = [b"<h2>Description</h2>", b"<p>firm</p>", b"<h2>Rest</h2>"]
+    fed = []
+
+    def consume(chunk):
+        fed.append(chunk)
+        return True
+
+    with HttpCache(path) as cache:
+        response = cache.get(FakeSession(chunks), "http://x/fish", consume=consume)
+        assert fed == ["<h2>Description</h2>"]
+        assert response.text == "<h2>Description</h2><p>firm</p><h2>Rest</h2>"
+    with HttpCache(path, offline=True) as cache:
+        assert cache.get(None, "http://x/fish").text == response.text
+
+
+def test_hits_and_misses_are_counted_across_threads(tmp_path):
+    import threading
+
+    path = str(tmp_path / "cache.sqlite")
+    with HttpCache(path) as cache:
+        cache.get(FakeSession([b"page"]), "http://x/fish", consume=lambda chunk: False)
+        assert (cache.hits, cache.misses) == (0, 1)
+    with HttpCache(path, offline=True) as cache:
+        def fetch():
+            for _ in range(200):
+                cache.get(None, "http://x/fish")
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert cache.hits == 1600
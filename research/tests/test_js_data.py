@@ -0,0 +1,41 @@
+from js_data import load_fish_data_v3, load_js_exports, parse_js_literal, split_conversion_key
+
+
+def test_parses_js_object_literals():
+    text = """{
+      // species block
+      "Pink Salmon": {
+        scientific_name: 'Oncorhynchus "pink"',  /* inline */
+        conversions: {
+          "Round → D/H-On": { yield: 91, range: [84, 94], },
+          "Round → Roe": { yield: 6.5, range: null },
+        },
+        flags: [true, false, -1e2],
+      },
+    }"""
+    assert parse_js_literal(text) == {
+        "Pink Salmon": {
+            "scientific_name": 'Oncorhynchus "pink"',
+            "conversions": {
+                "Round → D/H-On": {"yield": 91, "range": [84, 94]},
+                "Round → Roe": {"yield": 6.5, "range": None},
+            },
+            "flags": [True, False, -100.0],
+        }
+    }
+
+
+def test_skips_exports_built_by_code(tmp_path):
+    path = tmp_path / "data.js"
+    path.write_text(
+        "export const A = { x: 1 };\n"
+        "export const B = Object.keys(A);\n"
+        "export const C = ['it\\'s'];\n"
+    )
+    assert load_js_exports(str(path)) == {"A": {"x": 1}, "C": ["it's"]}
+
+
+def test_loads_the_app_dataset():
+    data = load_fish_data_v3()
+    assert data["Pink Salmon"]["conversions"]["Round → D/H-On"] == {"yield": 91, "range": [84, 94]}
+    assert split_conversion_key("D/H-On → D/H-Off") == ("D/H-On", "D/H-Off")
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import threading
+import tracemalloc
+
+import metrics
+import scrape_profiles
+from metrics import DISABLED, Metrics, active, collect, metrics_from_args
+from parse_data import iter_records
+
+PDF_CONTENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdf_content.txt")
+
+
+def test_disabled_by_default():
+    assert active() is DISABLED
+    with DISABLED.stage("parse"):
+        DISABLED.incr("parse.lines_read")
+    assert DISABLED.as_dict() == {"counters": {}, "observations": {}, "stages": {}}
+
+
+def test_parse_counters_are_consistent():
+    plain = list(iter_records(PDF_CONTENT))
+    with collect() as m:
+        counted = list(iter_records(PDF_CONTENT))
+    assert counted == plain
+    assert active() is DISABLED
+
+    c = m.counters
+    assert c["parse.records"] == len(plain)
+    assert c["parse.lines_read"] == c["parse.body_lines"] + c["parse.page_markers"]
+    assert c["parse.body_lines"] == c["parse.lines_kept"] + c["parse.lines_dropped"]
+    kinds = c["parse.two_column"] + c["parse.header"] + c["parse.one_column"] + c["parse.other"]
+    assert kinds == c["parse.lines_kept"]
+    assert c["parse.cells.left"] == c["parse.cells.right"] == c["parse.two_column"]
+    assert c["parse.one_column"] == c["parse.cells.left_only"] + c["parse.one_column_dropped"]
+    assert c["ocr.dressed_head"] > 0
+
+
+def test_stages_profile_and_trace_memory():
+    with collect(Metrics(profile=True, trace_memory=True)) as m:
+        with m.stage("outer"):
+            with m.stage("inner"):
+                data = [str(i) for i in range(10000)]
+        del data
+    stages = m.as_dict()["stages"]
+    assert stages["outer"]["calls"] == stages["inner"]["calls"] == 1
+    assert stages["outer"]["seconds"] >= stages["inner"]["seconds"]
+    # Only the outermost stage is profiled
+    assert stages["outer"]["profile"] and "profile" not in stages["inner"]
+    assert stages["inner"]["peak_bytes"] > 10000 * 40
+    assert stages["inner"]["top_allocations"]
+    # The inner stage opening and closing doesn't lose the outer stage's peak
+    assert stages["outer"]["peak_bytes"] >= stages["inner"]["peak_bytes"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_trace_memory_with_overlapping_threads():
+    # a starts tracing and finishes while b is still allocating
+    a_open, b_open, a_closed = threading.Event(), threading.Event(), threading.Event()
+    errors = []
+
+    def run_a(m):
+        with m.stage("a"):
+            a_open.set()
+            b_open.wait(10)
+        a_closed.set()
+
+    def run_b(m):
+        try:
+            a_open.wait(10)
+            with m.stage("b"):
+                b_open.set()
+                a_closed.wait(10)
+                data = [str(i) for i in range(20000)]
+                del data
+        except Exception as e:
+            errors.append(e)
+
+    m = Metrics(trace_memory=True)
+    threads = [threading.Thread(target=run_a, args=(m,)), threading.Thread(target=run_b, args=(m,))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert set(m.stages) == {"a", "b"}
+    assert m.stages["b"]["peak_bytes"] > 20000 * 40
+    assert m.stages["b"]["top_allocations"]
+    assert m.stages["a"]["peak_bytes"] < m.stages["b"]["peak_bytes"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_staged_decorator_and_observations():
+    @metrics.staged("work")
+    def work(x):
+        active().observe("work.size", x)
+        return x * 2
+
+    with collect() as m:
+        assert work(2) == 4
+        work(4)
+    result = m.as_dict()
+    assert result["stages"]["work"]["calls"] == 2
+    assert result["observations"]["work.size"] == {"count": 2, "total": 6, "min": 2, "max": 4, "mean": 3}
+
+
+def test_http_requests_are_counted(profile_site):
+    with collect() as m:
+        profiles = scrape_profiles.scrape_profiles(
+            profile_site.url + "/seafood-profiles", output_path=None, rate=0, cache_path=None,
+        )
+    assert m.counters["http.requests"] == len(profiles) + 1
+    assert m.counters["http.bytes"] > 0
+    assert m.observations["http.latency"]["count"] == len(profiles) + 1
+    assert m.stages["scrape"]["calls"] == 1
+
+
+def test_metrics_from_args_writes_json(tmp_path):
+    parser = argparse.ArgumentParser()
+    metrics.add_metrics_arguments(parser)
+    path = tmp_path / "metrics.json"
+    args = parser.parse_args(["--metrics", str(path)])
+    with metrics_from_args(args) as m:
+        m.incr("parse.lines_read", 3)
+    assert json.loads(path.read_text())["counters"] == {"parse.lines_read": 3}
+
+    with metrics_from_args(parser.parse_args([])) as m:
+        assert m is DISABLED
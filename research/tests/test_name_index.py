@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import name_index
+from js_data import FISH_DATA_V3_PATH, load_fish_data_v3
+from name_index import NameIndex, load_index, normalize_name
+
+FISH_DATA = load_fish_data_v3()
+
+
+@pytest.fixture(scope="module")
+def index():
+    return NameIndex.from_dataset(FISH_DATA)
+
+
+def test_normalize_name():
+    assert normalize_name("Cod, Pacific") == "pacific cod"
+    assert normalize_name("  PACIFIC\tcod. ") == "pacific cod"
+    assert normalize_name("King Crab (Red/Brown/Golden)") == "king crab red brown golden"
+    assert normalize_name("Saumon rosé") == "saumon rose"
+    assert normalize_name(" -- ") == ""
+
+
+def test_exact_scientific_alias_and_reordered_names(index):
+    for name in FISH_DATA:
+        assert index.resolve(name) == (name, 1.0, name, "name")
+    assert index.resolve("Halibut, Pacific").name == "Pacific Halibut"
+    assert index.resolve("gadus macrocephalus") == ("Pacific Cod", 1.0, "Gadus macrocephalus", "scientific")
+    assert index.resolve("Black Cod") == ("Sablefish", 1.0, "Black Cod", "alias")
+    assert index.resolve("Red Sea Urchin") == ("Sea Urchin (Red)", name_index.TOKEN_ORDER_CONFIDENCE,
+                                               "Sea Urchin (Red)", "name")
+    assert index.resolve("") is None
+
+
+def test_trigram_matches_are_only_suggestions(index):
+    for name, expected in [
+        ("Perch", "Pacific Ocean Perch"),
+        ("Pacfic Cod", "Pacific Cod"),
+        ("Petrale", "Petrale Sole"),
+    ]:
+        match = index.resolve(name)
+        assert match.name == expected
+        assert name_index.DEFAULT_MIN_CONFIDENCE <= match.confidence < 1
+        assert index.resolve(name, fuzzy=False) is None
+        assert index.canonical(name) == name
+        assert index.suggest(name) == match
+    # Shared by many species: not even a suggestion
+    for name in ("Salmon", "Rockfish", "Flounders", "King"):
+        assert index.resolve(name).confidence < name_index.DEFAULT_MIN_CONFIDENCE
+        assert index.suggest(name) is None
+    assert index.resolve("zzz") is None
+    assert index.suggest("Cod, Pacific") is None
+    assert index.canonical("Cod, Pacific") == "Pacific Cod"
+    assert index.canonical("Chinook") == "Chinook Salmon"
+
+
+def test_different_species_with_similar_names_are_not_merged(index, capsys):
+    # Different fish that score above the suggestion threshold
+    for name, near in [("Atlantic Mackerel", "Atka Mackerel"), ("Sea Scallop", "Scallops"), ("Skate", "Skates")]:
+        assert index.canonical(name) == name
+        assert index.suggest(name).name == near
+
+    found = name_index.report_suggestions(index, ["Atlantic Mackerel", "Atlantic Mackerel", "Lingcod", "zzz"])
+    assert list(found) == ["Atlantic Mackerel"]
+    assert "Atlantic Mackerel -> Atka Mackerel?" in capsys.readouterr().out
+
+
+def test_pdf_headers_resolve_to_dataset_species(index):
+    from parse_data import SPECIES_LIST
+
+    resolved = {name: index.canonical(name) for name in SPECIES_LIST}
+    assert resolved["Cod, Pacific"] == "Pacific Cod"
+    assert resolved["Herring, Pacific"] == "Pacific Herring"
+    assert resolved["Lingcod"] == "Lingcod"
+    assert resolved["Salmon"] == "Salmon"
+    assert all(name in FISH_DATA for raw, name in resolved.items() if name != raw)
+
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    fresh = load_index(FISH_DATA_V3_PATH, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    def unexpected(path):
+        raise AssertionError("dataset parsed again")
+
+    monkeypatch.setattr(name_index, "load_fish_data_v3", unexpected)
+    cached = load_index(FISH_DATA_V3_PATH, cache_dir=cache_dir)
+    for name in ["Cod, Pacific", "Chinook", "Salmon", "Black Cod", "Sea Urchin Red", "Oncorhynchus"]:
+        assert cached.resolve(name) == fresh.resolve(name)
+
+    # Different aliases are a different index
+    monkeypatch.undo()
+    load_index(FISH_DATA_V3_PATH, {"Tyee": "Chinook Salmon"}, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
@@ -0,0 +1,52 @@
+import pytest
+
+from ocr_normalize import OCR_RULES, OcrNormalizer, clean_ocr
+
+
+def chained_replace(text):
+    # The four str.replace passes the parsers used before the shared table
+    return text.replace("O/H", "D/H").replace("0/", "D/").replace("Ofi", "Off").replace("SI B", "S/B")
+
+
+@pytest.mark.parametrize("line", [
+    "Round O/H-On 81 72-90",
+    "Meat 25 O/H-Ofi 63 56-75",
+    "0/H-On 0/H-Off",
+    "SI B Fillets 33 18-39",
+    "Steaks 62",
+])
+def test_covers_original_replacements(line):
+    assert clean_ocr(line) == chained_replace(line)
+
+
+def test_applies_extended_rules_in_one_pass():
+    assert clean_ocr("DJH-Gn DJH-QfI Skin·On O/H·Ofi") == "D/H-Gn D/H-Off Skin-On D/H-Off"
+
+
+def test_leaves_misreads_of_printed_products_alone():
+    # Correcting these would merge rows the bulletin prints separately
+    assert clean_ocr("Round DIH-On Round OIH-On D/H-Ofl") == "Round DIH-On Round OIH-On D/H-Ofl"
+
+
+def test_counts_corrections_by_kind_including_cached_lines():
+    normalizer = OcrNormalizer(OCR_RULES)
+    for _ in range(3):
+        assert normalizer.normalize("O/H-On O/H-Ofi") == "D/H-On D/H-Off"
+    assert normalizer.stats == {"dressed_head": 6, "head_off": 3}
+
+    normalizer.reset_stats()
+    normalizer.normalize("nothing to fix")
+    assert not normalizer.stats
+
+
+def test_prefers_longest_rule_at_a_position():
+    normalizer = OcrNormalizer([("ab", "X", "short"), ("abc", "Y", "long")])
+    assert normalizer.normalize("abcab") == "YX"
+
+
+def test_variants_substitute_one_rule_at_a_time():
+    variants = OcrNormalizer().variants("D/H-Off")
+    assert "O/H-Off" in variants
+    assert "DJH-Off" in variants
+    assert "D/H-Ofi" in variants
+    assert "D/H-Off" not in variants
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import page_index
+import synthetic_corpus
+from page_index import PageIndex, get_species, open_index, parse_toc
+from parse_data import SPECIES_LIST, iter_records
+
+PDF_CONTENT = page_index.PDF_CONTENT_PATH
+
+
+@pytest.mark.parametrize("scale", [1, 3])
+def test_matches_full_parse_for_every_species(tmp_path, scale):
+    path = str(tmp_path / "pdf_content.txt")
+    synthetic_corpus.write_pdf_content(path, scale)
+    full = list(iter_records(path))
+    with PageIndex(path) as index:
+        for name in SPECIES_LIST:
+            assert index.get_species(name) == tuple(r for r in full if r.species == name), name
+
+
+def test_pages_cover_the_file():
+    with PageIndex(PDF_CONTENT) as index:
+        assert [page.number for page in index.pages] == list(range(1, 21))
+        assert index.pages[0].start == 0
+        assert index.pages[-1].end == os.path.getsize(PDF_CONTENT)
+        assert all(a.end == b.start for a, b in zip(index.pages, index.pages[1:]))
+        assert index.page_text(4).startswith("--- Page 5 ---")
+
+
+def test_parses_only_the_species_pages(monkeypatch):
+    with PageIndex(PDF_CONTENT) as index:
+        read = []
+        page_lines = index.page_lines
+        monkeypatch.setattr(index, "page_lines", lambda slot: read.append(slot) or page_lines(slot))
+        records = index.get_species("Lingcod")
+        assert {record.page for record in records} == {8}
+        # The TOC page mentions it; page 9 is read because the left column
+        # still belongs to Lingcod at the end of page 8
+        assert read == [2, 7, 8]
+
+        index.get_species("Lingcod")
+        assert read == [2, 7, 8]
+        assert index.cache_info().hits == 1
+
+
+def test_preamble_before_the_first_marker(tmp_path):
+    path = tmp_path / "pdf_content.txt"
+    path.write_text("Lingcod Rockfish\nRound D/H-On 90 83-93 Round D/H-On 89 86-94\n--- Page 7 ---\nSteaks 62 60-65\n")
+    with PageIndex(str(path)) as index:
+        assert [page.number for page in index.pages] == [0, 7]
+        full = list(iter_records(str(path)))
+        assert [r.page for r in index.get_species("Lingcod")] == [0, 7]
+        assert index.get_species("Lingcod") == tuple(r for r in full if r.species == "Lingcod")
+        assert index.get_species("Rockfish") == tuple(r for r in full if r.species == "Rockfish")
+
+
+def test_shared_index_is_rebuilt_when_the_file_changes(tmp_path):
+    path = tmp_path / "pdf_content.txt"
+    path.write_text("--- Page 1 ---\nLingcod Rockfish\nRound D/H-On 90 83-93 Round D/H-On 89 86-94\n")
+    assert get_species("Lingcod", str(path))[0].average == "90"
+    index = open_index(str(path))
+
+    path.write_text("--- Page 1 ---\nLingcod Rockfish\nRound D/H-On 91 83-93 Round D/H-On 89 86-94\n")
+    os.utime(path, ns=(0, index.signature[1] + 1))
+    assert get_species("Lingcod", str(path))[0].average == "91"
+    assert open_index(str(path)) is not index
+
+
+def test_toc():
+    toc = parse_toc("Pollock, Walleye 9\nSablefish 11 5 Salmon 11 6 Pink 11-12 6\nCapelin---\n")
+    assert toc == {"Pollock, Walleye": (9, 9), "Sablefish": (11, 11), "Salmon": (11, 11), "Pink": (11, 12)}
+    with PageIndex(PDF_CONTENT) as index:
+        assert index.toc["Chum"] == (12, 13)
+        assert index.toc["Sea Urchin"] == (19, 19)
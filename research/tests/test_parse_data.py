@@ -0,0 +1,113 @@
+import itertools
+import os
+
+import parse_data
+
+PDF_CONTENT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pdf_content.txt")
+
+SAMPLE = [
+    "--- Page 5 ---\n",
+    "Recoveries and Yields from Pacific Fish\n",
+    "Abalone, Pinto Haliotus kamtschatkana Cod, Pacific Gadus macrocephalus\n",
+    "Whole Edible Muscle 42 40-45 Round O/H-On 81 72-90\n",
+    "Meat 25 20-30 O/H-Ofi 63 56-75\n",
+    "Trimming 16 12-18\n",
+    "\n",
+    "--- Page 6 ---\n",
+    "Dried Muscle 10 8-12\n",
+]
+
+
+def test_stages_attribute_columns_to_headers():
+    records = list(parse_data.iter_records_from_lines(iter(SAMPLE)))
+    assert records == [
+        parse_data.Record(5, "Abalone", "Whole Edible Muscle", "42", "40-45"),
+        parse_data.Record(5, "Cod, Pacific", "Round D/H-On", "81", "72-90"),
+        parse_data.Record(5, "Abalone", "Meat", "25", "20-30"),
+        parse_data.Record(5, "Cod, Pacific", "D/H-Off", "63", "56-75"),
+        parse_data.Record(5, "Abalone", "Trimming", "16", "12-18"),
+        parse_data.Record(6, "Abalone", "Dried Muscle", "10", "8-12"),
+    ]
+
+
+def test_records_stream_lazily():
+    # An endless page of data lines only works if no stage materializes its input
+    endless = itertools.chain(["--- Page 1 ---\n"], itertools.cycle(["Round 81 72-90 Steaks 62 60-65\n"]))
+    records = parse_data.iter_records_from_lines(endless)
+    first = list(itertools.islice(records, 4))
+    assert [r.product for r in first] == ["Round", "Steaks", "Round", "Steaks"]
+    assert {r.species for r in first} == {"Unknown"}
+
+
+def test_parse_pdf_content_matches_record_stream(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    parse_data.parse_pdf_content(PDF_CONTENT)
+    content = (tmp_path / "data" / "fish_data.js").read_text()
+    assert content.startswith("const FISH_DATA = {")
+    # Bulletin headers are stored under the dataset's species names
+    assert '"Pacific Cod"' in content and '"Cod, Pacific"' not in content
+
+    records = list(parse_data.iter_records(PDF_CONTENT))
+    assert records
+    for record in records[-5:]:
+        assert f'"{record.product}"' in content
+
+
+def test_reparse_drops_products_no_longer_in_the_text(tmp_path, monkeypatch):
+    from fish_store import split_legacy_js
+
+    with open(PDF_CONTENT, encoding="utf-8") as f:
+        lines = f.readlines()
+    shorter = tmp_path / "shorter.txt"
+    shorter.write_text("".join(lines[:len(lines) // 2]), encoding="utf-8")
+
+    def parse(directory, path):
+        (directory / "data").mkdir(parents=True, exist_ok=True)
+        monkeypatch.chdir(directory)
+        parse_data.parse_pdf_content(str(path))
+        return split_legacy_js((directory / "data" / "fish_data.js").read_text())[0]
+
+    full = parse(tmp_path / "store", PDF_CONTENT)
+    reparsed = parse(tmp_path / "store", shorter)
+    assert reparsed == parse(tmp_path / "fresh", shorter)
+    assert sum(map(len, reparsed.values())) < sum(map(len, full.values()))
+
+
+def stored_products(species):
+    # One row per (species, product), the later print winning, as in the store
+    stored = {}
+    for record in parse_data.iter_records(PDF_CONTENT):
+        if record.species in species:
+            stored[record.species, record.product] = (record.average, record.range)
+    return stored
+
+
+def test_ocr_corrections_keep_printed_rows_apart():
+    stored = stored_products({"Lingcod", "Perch", "Salmon", "Abalone"})
+    assert stored["Lingcod", "D/H-Off"] == ("68", "60-72")
+    assert stored["Lingcod", "DIH-Off"] == ("68", "62-74")
+    assert stored["Perch", "Round D/H-On"] == ("88", "82-94")
+    assert stored["Perch", "Round DIH-On"] == ("79", "72-86")
+    assert stored["Salmon", "D/H-On D/H-Ofl"] == ("83", "79-91")
+    assert stored["Salmon", "DIH-On D/H-Off"] == ("82", "76-92")
+    assert stored["Salmon", "D/H-On D/H-Off"] == ("82", "73-90")
+    assert stored["Salmon", "Round OIH-On"] == ("80", "75-87")
+    assert stored["Abalone", "D/H-Off"] == ("78", "73-81")
+
+
+def test_no_ocr_rule_folds_two_printed_rows_together(monkeypatch):
+    # Beyond the four the parsers always applied: O/H, 0/, Ofi and SI B do
+    # merge repeated prints, and the published data is built that way
+    from ocr_normalize import OCR_RULES, OcrNormalizer
+
+    def repeated_keys(rules):
+        monkeypatch.setattr(parse_data, "clean_ocr", OcrNormalizer(rules).normalize)
+        records = list(parse_data.iter_records(PDF_CONTENT))
+        return len(records) - len({(r.species, r.product) for r in records})
+
+    everything = repeated_keys(OCR_RULES)
+    for rule in OCR_RULES:
+        if rule[0] in ("O/H", "0/", "Ofi", "SI B"):
+            continue
+        assert repeated_keys([r for r in OCR_RULES if r != rule]) == everything, rule
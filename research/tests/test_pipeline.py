@@ -0,0 +1,171 @@
+import os
+import threading
+
+import pytest
+
+from pipeline import STAGES, Pipeline, PipelineError, Stage
+
+
+def copy_stage(name, source, target, calls, barrier=None):
+    def run(paths):
+        calls.append(name)
+        if barrier:
+            barrier.wait(timeout=5)
+        with open(paths[source]) as f:
+            text = f.read()
+        with open(paths[target], "w") as f:
+            f.write(text.upper())
+
+    return Stage(name, [source], [target], [], run)
+
+
+@pytest.fixture
+def layout(tmp_path):
+    paths = {key: str(tmp_path / f"{key}.txt") for key in ("a", "b", "c", "d", "e")}
+    for key in ("a", "c"):
+        with open(paths[key], "w") as f:
+            f.write(key)
+    return paths, str(tmp_path / "state.json")
+
+
+def make_pipeline(layout, calls, barrier=None):
+    paths, state_path = layout
+    stages = [
+        copy_stage("ab", "a", "b", calls, barrier),
+        copy_stage("cd", "c", "d", calls, barrier),
+        copy_stage("be", "b", "e", calls),
+    ]
+    return Pipeline(stages, paths=paths, state_path=state_path, code_dir=os.path.dirname(state_path))
+
+
+def statuses(results):
+    return {name: status for name, (status, _, _) in results.items()}
+
+
+def test_skips_unchanged_stages_across_runs(layout):
+    calls = []
+    assert statuses(make_pipeline(layout, calls).run()) == {"ab": "ran", "cd": "ran", "be": "ran"}
+
+    calls.clear()
+    assert statuses(make_pipeline(layout, calls).run()) == {"ab": "skipped", "cd": "skipped", "be": "skipped"}
+    assert calls == []
+
+
+def test_reruns_only_what_an_input_change_reaches(layout):
+    paths, _ = layout
+    make_pipeline(layout, []).run()
+    with open(paths["a"], "w") as f:
+        f.write("changed")
+
+    calls = []
+    results = make_pipeline(layout, calls).run()
+    assert statuses(results) == {"ab": "ran", "cd": "skipped", "be": "ran"}
+    with open(paths["e"]) as f:
+        assert f.read() == "CHANGED"
+
+
+def test_unchanged_intermediate_output_stops_propagation(layout):
+    paths, _ = layout
+    make_pipeline(layout, []).run()
+    # Same content once upper-cased, so b doesn't change and be is skipped
+    with open(paths["a"], "w") as f:
+        f.write("A")
+    assert statuses(make_pipeline(layout, []).run()) == {"ab": "ran", "cd": "skipped", "be": "skipped"}
+
+
+def test_reruns_when_an_output_is_modified_or_missing(layout):
+    paths, _ = layout
+    make_pipeline(layout, []).run()
+    with open(paths["d"], "w") as f:
+        f.write("tampered")
+    assert statuses(make_pipeline(layout, []).run())["cd"] == "ran"
+
+
+def test_independent_branches_run_in_parallel(layout):
+    # Both branch stages must be inside run() at once to pass the barrier
+    barrier = threading.Barrier(2)
+    results = make_pipeline(layout, [], barrier).run()
+    assert statuses(results) == {"ab": "ran", "cd": "ran", "be": "ran"}
+
+
+def test_failure_blocks_downstream_only(layout):
+    paths, _ = layout
+    calls = []
+    pipeline = make_pipeline(layout, calls)
+
+    def broken(paths):
+        raise ValueError("boom")
+
+    pipeline.stages["ab"] = pipeline.stages["ab"]._replace(run=broken)
+    results = pipeline.run()
+    assert statuses(results) == {"ab": "failed", "cd": "ran", "be": "blocked"}
+    assert "boom" in results["ab"][2]
+
+
+def test_targets_force_and_dry_run(layout):
+    calls = []
+    pipeline = make_pipeline(layout, calls)
+    assert list(pipeline.plan(["be"])) == ["ab", "be"]
+    assert statuses(pipeline.run(["be"], dry_run=True)) == {"ab": "stale", "be": "stale"}
+    assert calls == []
+
+    pipeline.run()
+    calls.clear()
+    assert statuses(pipeline.run(["be"], force=["ab"])) == {"ab": "ran", "be": "skipped"}
+    assert calls == ["ab"]
+
+
+def test_rejects_duplicate_producers(layout):
+    paths, state_path = layout
+    stages = [copy_stage("x", "a", "b", []), copy_stage("y", "c", "b", [])]
+    with pytest.raises(PipelineError):
+        Pipeline(stages, paths=paths, state_path=state_path)
+
+
+def test_default_branches_are_independent():
+    pipeline = Pipeline(state_path=None)
+    assert pipeline.deps["merge"] == ["parse_pdf", "read_excel"]
+    assert pipeline.deps["parse_pdf"] == ["extract_pdf"]
+    for branch in ("extract_pdf", "read_excel", "scrape"):
+        assert pipeline.deps[branch] == []
+    assert [stage.name for stage in STAGES] == pipeline.plan()
+
+
+def _imported_modules(source):
+    import ast
+
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+        elif isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+    return names
+
+
+def test_stage_code_covers_what_the_stage_imports():
+    # Every research module a stage reaches, at any depth, must be in its code
+    # list, or editing it (an alias, an OCR rule) leaves a stale output "up to
+    # date". metrics only instruments the run.
+    import inspect
+
+    from js_data import RESEARCH_DIR
+
+    def closure(modules):
+        seen, todo = set(), list(modules)
+        while todo:
+            module = todo.pop()
+            path = os.path.join(RESEARCH_DIR, module + ".py")
+            if module in seen or module == "metrics" or not os.path.exists(path):
+                continue
+            seen.add(module)
+            with open(path, encoding="utf-8") as f:
+                todo.extend(_imported_modules(f.read()))
+        return seen
+
+    for stage in STAGES:
+        if stage.name == "scrape":
+            continue
+        reached = closure(_imported_modules(inspect.getsource(stage.run)))
+        missing = {module + ".py" for module in reached} - set(stage.code)
+        assert not missing, (stage.name, sorted(missing))
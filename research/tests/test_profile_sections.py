@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from conftest import PROFILE_PAGE
+from profile_sections import ProfileSectionParser, extract_sections
+
+PAGE = PROFILE_PAGE.format(title="Lingcod")
+
+
+def regex_sections(p_text):
+    # The per-section regexes scrape_profiles used before
+    def clean_html(t):
+        return re.sub(r'<[^>]+>', '', t).strip() if t else ""
+
+    found = {}
+    for key, title in [("description", "Description of meat"), ("culinary_uses", "Culinary uses"),
+                       ("edible_portions", "Edible portions")]:
+        m = re.search(title + r'</h3>(.*?)<h3', p_text, re.DOTALL)
+        found[key] = clean_html(m.group(1)) if m else ""
+    return found
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, len(PAGE)])
+def test_chunked_feed_matches_regex_extraction(size):
+    chunks = [PAGE[i:i + size] for i in range(0, len(PAGE), size)]
+    assert extract_sections(chunks) == regex_sections(PAGE)
+
+
+def test_stops_reading_once_all_sections_are_found():
+    consumed = []
+
+    def chunks():
+        for line in PAGE.splitlines(keepends=True):
+            consumed.append(line)
+            yield line
+        raise AssertionError("read past the last section")
+
+    sections = extract_sections(chunks())
+    assert sections["edible_portions"] == "Fillets."
+    assert "</body>" not in "".join(consumed)
+
+
+def test_tolerates_markup_changes():
+    page = (
+        "<h2 class='x'> Description of meat: </h2><div>Mild &amp; <em>flaky</em>"
+        "<script>var x = '<h3>';</script></div>"
+        "<h4>Culinary uses</h4><p>Bake.</p>"
+    )
+    parser = ProfileSectionParser()
+    parser.feed_chunk(page)
+    assert parser.result() == {"description": "Mild & flaky", "culinary_uses": "Bake.", "edible_portions": ""}
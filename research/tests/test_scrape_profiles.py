@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+import scrape_profiles
+
+
+def test_scrapes_every_profile_concurrently(profile_site, tmp_path):
+    profile_site.failures["/seafood-profiles/fish-03"] = 2
+
+    profiles = scrape_profiles.scrape_profiles(
+        profile_site.url + "/seafood-profiles",
+        output_path=str(tmp_path / "profiles.json"),
+        concurrency=4, rate=0, backoff=0.01, cache_path=None,
+    )
+
+    # No artificial cap: all 24 fixture profiles, including the one that
+    # needed retries.
+    assert len(profiles) == 24
+    assert profiles["Fish 03"]["description"] == "Fish 03 meat is firm and mild."
+    assert profiles["Fish 03"]["culinary_uses"] == "Grill or bake Fish 03."
+    assert profiles["Fish 03"]["url"] == profile_site.url + "/seafood-profiles/fish-03"
+    assert (tmp_path / "profiles.json").exists()
+
+
+def test_find_profile_links_skips_pagination_and_index():
+    html = (
+        '<a href="/seafood-profiles/lingcod">'
+        '<a href="https://caseagrant.ucsd.edu/seafood-profiles/pacific-halibut">'
+        '<a href="/seafood-profiles?page=2"><a href="/seafood-profiles/lingcod">'
+    )
+    assert scrape_profiles.find_profile_links(html) == [
+        ("https://caseagrant.ucsd.edu/seafood-profiles/lingcod", "Lingcod"),
+        ("https://caseagrant.ucsd.edu/seafood-profiles/pacific-halibut", "Pacific Halibut"),
+    ]
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    limiter = scrape_profiles.HostRateLimiter(rate=50)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait("http://a.example/x")
+    limiter.wait("http://b.example/x")
+    elapsed = time.monotonic() - start
+    # Four waits of 20ms on host a; host b isn't held back by host a
+    assert 0.07 <= elapsed < 0.5
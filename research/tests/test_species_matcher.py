@@ -0,0 +1,39 @@
+import os
+import re
+
+from parse_data import SPECIES_LIST, SPECIES_MATCHER
+from species_matcher import SpeciesMatcher
+
+PDF_CONTENT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pdf_content.txt")
+
+
+def naive_find_all(names, line):
+    hits = []
+    for name in names:
+        for m in re.finditer(re.escape(name), line):
+            hits.append((m.start(), name))
+    return sorted(hits)
+
+
+def test_matches_naive_scan_on_bulletin_text():
+    with open(PDF_CONTENT) as f:
+        for line in f:
+            assert SPECIES_MATCHER.find_all(line) == naive_find_all(SPECIES_LIST, line)
+
+
+def test_reports_overlapping_names_and_offsets():
+    matcher = SpeciesMatcher(["Salmon", "Pink", "Pink Salmon", "Sole", "Flathead Sole"])
+    line = "Pink Salmon Flathead Sole"
+    assert matcher.find_all(line) == [
+        (0, "Pink"),
+        (0, "Pink Salmon"),
+        (5, "Salmon"),
+        (12, "Flathead Sole"),
+        (21, "Sole"),
+    ]
+    assert matcher.names_in("no fish here") == set()
+
+
+def test_same_name_hits_do_not_overlap():
+    matcher = SpeciesMatcher(["aa"])
+    assert matcher.find_all("aaaa") == naive_find_all(["aa"], "aaaa")
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+import synthetic_corpus
+from ocr_normalize import clean_ocr
+from parse_data import PAGE_MARKER, SPECIES_MATCHER, iter_records_from_lines
+from profile_sections import extract_sections
+
+
+@pytest.fixture(scope="module")
+def bulletin():
+    with open(synthetic_corpus.PDF_CONTENT_PATH) as f:
+        return f.read()
+
+
+def records(text):
+    return list(iter_records_from_lines(text.splitlines(keepends=True), SPECIES_MATCHER))
+
+
+def test_first_copy_is_the_real_text(bulletin):
+    assert synthetic_corpus.scale_pdf_content(bulletin, 1) == bulletin
+
+
+def test_scales_pages_and_records(bulletin):
+    scaled = synthetic_corpus.scale_pdf_content(bulletin, 3, seed=1)
+    pages = [int(n) for n in PAGE_MARKER.findall(scaled)]
+    assert pages == list(range(1, 3 * len(PAGE_MARKER.findall(bulletin)) + 1))
+    assert len(records(scaled)) == 3 * len(records(bulletin))
+
+
+def test_is_deterministic(bulletin):
+    assert synthetic_corpus.scale_pdf_content(bulletin, 2, seed=5) == synthetic_corpus.scale_pdf_content(bulletin, 2, seed=5)
+    assert synthetic_corpus.scale_pdf_content(bulletin, 2, seed=5) != synthetic_corpus.scale_pdf_content(bulletin, 2, seed=6)
+
+
+def test_ocr_noise_is_what_clean_ocr_undoes():
+    line = "D/H-On D/H-Off 82 76-92 S/B Fillet 40 35-45"
+    noisy = synthetic_corpus.add_ocr_noise(line, random.Random(0), rate=1.0)
+    assert noisy != line
+    assert clean_ocr(noisy) == line
+
+
+def test_nhcs_sheet_has_the_workbook_columns():
+    pd = pytest.importorskip("pandas")
+    sheet = synthetic_corpus.synthetic_nhcs_sheet(factor=2, base_rows=50)
+    assert list(sheet.columns) == ["Common name", "% Yield", "Notes"]
+    assert len(sheet) == 100
+    assert sheet["Common name"].dropna().is_unique
+    assert sheet.equals(synthetic_corpus.synthetic_nhcs_sheet(factor=2, base_rows=50))
+    assert isinstance(sheet, pd.DataFrame)
+
+
+def test_profile_pages_have_the_sections():
+    page = synthetic_corpus.synthetic_profile_pages(1, base_pages=1)[0]
+    sections = extract_sections([page])
+    assert all(sections.values())
@@ -0,0 +1,107 @@
+import math
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import excel_ingest
+import update_fish_data
+from update_fish_data import normalize_yields
+
+
+def row_by_row(name, yield_val, notes):
+    # The per-row parser update_data used before normalize_yields
+    final_yield = 0
+    final_range = ""
+    if isinstance(yield_val, (int, float)):
+        final_yield = int(yield_val * 100) if yield_val < 1 else int(yield_val)
+    elif isinstance(yield_val, str):
+        yield_val = yield_val.replace("%", "").strip()
+        if "-" in yield_val:
+            r_parts = yield_val.split("-")
+            final_yield = int((float(r_parts[0]) + float(r_parts[1])) / 2)
+            final_range = yield_val
+        else:
+            final_yield = int(float(yield_val))
+    label = "Average Yield"
+    if notes:
+        label += f" ({notes.strip()})"
+    return label, str(final_yield), final_range or f"{final_yield-5}-{final_yield+5}"
+
+
+SHEET = pd.DataFrame({
+    "Common name": ["Cod", "Haddock", None, "Pollock", "Hake", "Scup", "Skate", "Monkfish", "Cusk", "Redfish"],
+    "% Yield": [0.29, "80-85%", 0.5, 42, "35%", "bad", float("nan"), "30-", " 40 - 44 % ", 0.455],
+    "Notes": ["fillet", None, None, "  skin on ", None, None, None, None, "", None],
+})
+
+
+def test_matches_row_by_row_parser():
+    yields, rejects = normalize_yields(SHEET)
+
+    expected = {}
+    for name, yield_val, notes in zip(SHEET["Common name"], SHEET["% Yield"], SHEET["Notes"]):
+        if pd.isna(name):
+            continue
+        try:
+            expected[name] = row_by_row(name, yield_val, None if pd.isna(notes) else notes)
+        except ValueError:
+            pass
+
+    actual = {
+        name: (label, str(y), rng)
+        for name, label, y, rng in zip(yields["name"], yields["label"], yields["yield"], yields["range"])
+    }
+    assert actual == expected
+    assert sorted(rejects["name"]) == ["Monkfish", "Scup", "Skate"]
+    assert list(rejects.loc[rejects["name"] == "Skate", "reason"]) == ["missing yield"]
+
+
+def test_low_and_high_columns():
+    yields, _ = normalize_yields(SHEET)
+    by_name = yields.set_index("name")
+    assert (by_name.loc["Haddock", "low"], by_name.loc["Haddock", "high"]) == (80, 85)
+    assert (by_name.loc["Cod", "low"], by_name.loc["Cod", "high"]) == (23, 33)
+    assert math.isclose(by_name.loc["Cusk", "low"], 40)
+
+
+def test_all_numeric_column():
+    sheet = pd.DataFrame({"Common name": ["A", "B"], "% Yield": [0.8, 90.0], "Notes": [None, None]})
+    yields, rejects = normalize_yields(sheet)
+    assert list(yields["yield"]) == [80, 90]
+    assert rejects.empty
+
+
+def test_all_string_column():
+    # pandas 3 reads an all-text column as the str dtype, not object
+    sheet = pd.DataFrame({"Common name": ["A", "B", "C", "D"], "% Yield": ["80-85%", "70%", "65%", "0.5"],
+                          "Notes": ["fillet", None, None, None]})
+    yields, rejects = normalize_yields(sheet)
+    assert rejects.empty
+    actual = {name: (label, str(y), rng)
+              for name, label, y, rng in zip(yields["name"], yields["label"], yields["yield"], yields["range"])}
+    assert actual == {
+        name: row_by_row(name, value, notes)
+        for name, value, notes in [("A", "80-85%", "fillet"), ("B", "70%", None), ("C", "65%", None), ("D", "0.5", None)]
+    }
+    assert actual["D"][1] == "0"
+
+
+def test_store_is_closed_when_the_workbook_fails(monkeypatch):
+    closed = []
+
+    class Store:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            closed.append(exc[0])
+
+    def unreadable(path, sheet):
+        raise OSError("no workbook")
+
+    monkeypatch.setattr(update_fish_data, "open_store", Store)
+    monkeypatch.setattr(excel_ingest, "load_sheet", unreadable)
+    with pytest.raises(OSError):
+        update_fish_data.update_data()
+    assert closed == [OSError]
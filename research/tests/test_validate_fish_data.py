@@ -0,0 +1,95 @@
+import json
+import subprocess
+import sys
+
+import parse_data
+import validate_fish_data as v
+
+DATASET = {
+    "Pacific Cod": {
+        "scientific_name": "Gadus macrocephalus",
+        "category": "Groundfish",
+        "conversions": {
+            "Round → D/H-On": {"yield": 81, "range": [72, 90]},
+            "Round → D/H-Off": {"yield": 95, "range": [56, 75]},
+            "D/H-On → D/H-Off": {"yield": 78, "range": None},
+            "Round → Steaks": {"yield": 62, "range": None},
+        },
+    },
+}
+
+RECORDS = [
+    parse_data.Record(5, "Cod, Pacific", "Round D/H-On", "80", "72-90"),
+    parse_data.Record(5, "Cod, Pacific", "D/H-Off", "95", "56-75"),
+    parse_data.Record(5, "Cod, Pacific", "Roe", "4", "1-7"),
+    parse_data.Record(5, "Abalone", "Whole Meat", "42", None),
+    parse_data.Record(6, "Rockfish", "Round D/H-On", "60", "55-65"),
+    parse_data.Record(6, "Rockfish", "Fillets", "30", None),
+]
+
+
+def checks(report):
+    return sorted((i["check"], i["from"], i["to"]) for i in report["issues"])
+
+
+def test_reports_every_check():
+    report = v.validate(DATASET, iter(RECORDS))
+    assert checks(report) == [
+        ("chain_exceeds_parent", "Round", "D/H-Off"),
+        ("missing_in_dataset", "Round", "Roe"),
+        ("missing_in_pdf", "D/H-On", "D/H-Off"),
+        ("missing_in_pdf", "Round", "Steaks"),
+        ("unmatched_pdf_species", None, None),
+        ("yield_mismatch", "Round", "D/H-On"),
+        ("yield_out_of_range", "Round", "D/H-Off"),
+    ]
+    summary = report["summary"]
+    assert (summary["errors"], summary["warnings"]) == (2, 5)
+    assert summary["pdf_conversions"] == 5
+    assert (summary["pdf_conversions_resolved"], summary["pdf_conversions_unresolved"]) == (3, 2)
+    assert summary["cross_checked"] == 4
+    unmatched = [i for i in report["issues"] if i["check"] == "unmatched_pdf_species"]
+    assert unmatched[0]["species"] == "Rockfish" and unmatched[0]["detail"].startswith("2 PDF conversions")
+
+
+def test_pdf_species_resolve_through_name_index():
+    dataset = {
+        "Chinook Salmon": {"conversions": {"Round → D/H-On": {"yield": 88, "range": [82, 94]}}},
+        "Atka Mackerel": {"conversions": {"Round → D/H-On": {"yield": 70, "range": None}}},
+    }
+    records = [
+        parse_data.Record(9, "Chinook", "Round D/H-On", "87", "82-94"),
+        parse_data.Record(9, "Atlantic Mackerel", "Round D/H-On", "70", None),
+    ]
+    report = v.validate(dataset, iter(records))
+    assert [(i["check"], i["species"]) for i in report["issues"]] == [
+        ("yield_mismatch", "Chinook Salmon"),
+        ("unmatched_pdf_species", "Atlantic Mackerel"),
+    ]
+    assert "(possibly Atka Mackerel)" in report["issues"][1]["detail"]
+
+
+def test_normalizes_species_names():
+    assert v.normalize_species("Cod, Pacific") == v.normalize_species("Pacific  Cod") == "pacific cod"
+
+
+def test_full_dataset_passes_and_cli_gates(tmp_path):
+    report_path = tmp_path / "report.json"
+    result = subprocess.run(
+        [sys.executable, v.__file__, "--report", str(report_path)],
+        capture_output=True, text=True, cwd=tmp_path,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    report = json.loads(report_path.read_text())
+    assert report["summary"]["species"] == len(v.load_fish_data_v3())
+    assert report["summary"]["errors"] == 0
+
+
+def test_single_species_matches_full_run():
+    full = v.validate_data()
+    for species in ("Pacific Cod", "Sablefish", "Lingcod", "Pink Salmon", "Chinook Salmon"):
+        report = v.validate_data(species=species)
+        assert report["species"] == species
+        assert report["summary"]["species"] == 1
+        expected = [i for i in full["issues"] if v.normalize_species(i["species"]) == v.normalize_species(species)]
+        assert report["issues"] == expected
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+
+import pytest
+
+import yield_db
+from js_data import FISH_DATA_V3_PATH, load_js_exports, split_conversion_key
+from yield_db import YieldDB, build
+
+EXPORTS = load_js_exports(FISH_DATA_V3_PATH, {"FISH_DATA_V3", "PROFILES_DATA", "ACRONYMS"})
+FISH_DATA = EXPORTS["FISH_DATA_V3"]
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "fish_yields.sqlite")
+    build(FISH_DATA, path, EXPORTS["PROFILES_DATA"], EXPORTS["ACRONYMS"])
+    with YieldDB(path) as db:
+        yield db
+
+
+def test_every_conversion_round_trips(db):
+    for name, data in FISH_DATA.items():
+        assert db.species(name) == (name, data["scientific_name"] or None, data["category"] or None)
+        conversions = {(y.from_state, y.to_state): y for y in db.conversions(name)}
+        assert len(conversions) == len(data["conversions"])
+        for key, conversion in data["conversions"].items():
+            from_state, to_state = split_conversion_key(key)
+            found = db.yield_for(name, from_state, to_state)
+            assert found == conversions[from_state, to_state]
+            assert found.yield_percent == conversion["yield"]
+            assert [found.range_min, found.range_max] == (conversion["range"] or [None, None])
+    assert db.yield_for("Pink Salmon", "Round", "No Such Form") is None
+    assert db.species("No Such Fish") is None
+
+
+def test_category_and_form_queries(db):
+    categories = {data["category"] for data in FISH_DATA.values()}
+    assert db.categories() == sorted(categories)
+    assert db.species_in_category("Salmon") == sorted(
+        name for name, data in FISH_DATA.items() if data["category"] == "Salmon")
+    expected = sorted(name for name, data in FISH_DATA.items() if "Round → D/H-On" in data["conversions"])
+    assert [row.species for row in db.species_with_conversion("Round", "D/H-On")] == expected
+    assert db.forms()["Round"] == EXPORTS["ACRONYMS"]["Round"]
+
+
+def test_lookups_use_covering_indexes(db):
+    def plan(sql, args):
+        return " | ".join(row[-1] for row in db.conn.execute("EXPLAIN QUERY PLAN " + sql, args))
+
+    assert "fish_yields USING PRIMARY KEY" in plan(yield_db.YIELD_SQL, ("a", "b", "c"))
+    assert "COVERING INDEX species_by_category" in plan(yield_db.CATEGORY_SQL, ("Salmon",))
+    assert "COVERING INDEX fish_yields_by_form" in plan(yield_db.SPECIES_WITH_CONVERSION_SQL, ("a", "b"))
+
+
+@pytest.mark.skipif(not yield_db.has_fts5(sqlite3.connect(":memory:")), reason="sqlite3 lacks FTS5")
+def test_search(db):
+    assert db.has_fts
+    names = [hit.name for hit in db.search("rockfish", limit=100)]
+    assert names and all("Rockfish" in name or FISH_DATA[name]["category"] == "Rockfish" for name in names)
+    assert db.search("Ophiodon")[0].name == "Lingcod"
+    # Profile text only
+    assert [hit.name for hit in db.search("blue-green tint")] == ["Lingcod"]
+    assert db.search("  ") == []
+    assert db.search('"unbalanced (quote') == []
+
+
+def test_rebuild_replaces_database_and_is_read_only(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    build(FISH_DATA, path)
+    build({"Test Fish": {"scientific_name": "", "category": "Other", "conversions": {
+        "Round → Fillet": {"yield": 40, "range": None}}}}, path)
+    assert not os.path.exists(path + ".tmp")
+    with YieldDB(path) as db:
+        assert db.categories() == ["Other"]
+        assert db.yield_for("Test Fish", "Round", "Fillet").yield_percent == 40
+        with pytest.raises(sqlite3.OperationalError):
+            db.conn.execute("DELETE FROM species")
@@ -0,0 +1,104 @@
+import math
+
+import pytest
+
+from conversion_table import ConversionTable
+from yield_graph import YieldGraph
+
+DATA = {
+    "Cod": {
+        "conversions": {
+            "Round → D/H-On": {"yield": 80, "range": [70, 90]},
+            "Round → D/H-Off": {"yield": 60, "range": None},
+            "D/H-On → D/H-Off": {"yield": 80, "range": [75, 85]},
+            "D/H-Off → Smoked": {"yield": 50, "range": [40, 60]},
+        },
+    },
+}
+
+
+@pytest.fixture
+def graph():
+    return YieldGraph(ConversionTable.from_v3(DATA))
+
+
+def test_composes_chains_with_best_and_worst_paths(graph):
+    chained = graph.query("Cod", "Round", "Smoked")
+    # Round → D/H-On → D/H-Off → Smoked = 80% * 80% * 50% = 32%
+    # Round → D/H-Off → Smoked = 60% * 50% = 30%
+    assert math.isclose(chained.best, 32)
+    assert chained.best_path == ("Round", "D/H-On", "D/H-Off", "Smoked")
+    assert math.isclose(chained.worst, 30)
+    assert chained.worst_path == ("Round", "D/H-Off", "Smoked")
+    assert chained.direct is None
+
+
+def test_propagates_ranges(graph):
+    chained = graph.query("Cod", "Round", "Smoked")
+    # lows: min(0.70 * 0.75 * 0.40, 0.60 * 0.40); highs: max(0.90 * 0.85 * 0.60, 0.60 * 0.60)
+    assert math.isclose(chained.range_low, 21)
+    assert math.isclose(chained.range_high, 45.9)
+
+
+def test_direct_edges_and_batch_queries(graph):
+    results = graph.query_batch([
+        ("Cod", "Round", "D/H-On"),
+        ("Cod", "Smoked", "Round"),
+        ("Hake", "Round", "D/H-On"),
+    ])
+    assert results[0].direct == 80 and results[0].best == 80
+    assert results[1] is None
+    assert results[2] is None
+
+
+def test_exports_only_implied_pairs(graph, tmp_path):
+    export = graph.to_export()
+    assert set(export["Cod"]) == {"Round → Smoked", "D/H-On → Smoked"}
+    path = graph.export_js(str(tmp_path / "chained.js"))
+    with open(path) as f:
+        assert f.read().startswith("/**")
+
+
+def test_app_dataset_chains():
+    graph = YieldGraph.from_js()
+    chained = graph.query("Pacific Cod", "Round", "Smoked")
+    assert chained is not None and chained.direct is None
+    assert chained.best <= graph.query("Pacific Cod", "Round", "D/H-Off").best
+
+
+def test_cycles_are_not_walked():
+    data = {"Cod": {"conversions": {
+        "Round → D/H-On": {"yield": 80, "range": None},
+        "D/H-On → Round": {"yield": 90, "range": None},
+        "D/H-On → Smoked": {"yield": 50, "range": None},
+    }}}
+    graph = YieldGraph(ConversionTable.from_v3(data))
+    assert graph.query("Cod", "Round", "Round") is None
+    chained = graph.query("Cod", "Round", "Smoked")
+    assert math.isclose(chained.best, 40) and math.isclose(chained.worst, 40)
+    assert chained.best_path == chained.worst_path == ("Round", "D/H-On", "Smoked")
+
+
+def test_dense_graphs_stay_polynomial():
+    # Every form converts to every later one: 2^38 simple paths from first to last
+    forms = [f"F{i}" for i in range(40)]
+    conversions = {
+        f"{a} → {b}": {"yield": 99 if j == i + 1 else 50, "range": None}
+        for i, a in enumerate(forms) for j, b in enumerate(forms) if i < j
+    }
+    graph = YieldGraph(ConversionTable.from_v3({"Cod": {"conversions": conversions}}))
+    chained = graph.query("Cod", "F0", "F39")
+    # Best goes form by form; worst takes as many 50% jumps as fit (19 and a step)
+    assert chained.best_path == tuple(forms)
+    assert math.isclose(chained.best, 100 * 0.99 ** 39)
+    assert math.isclose(chained.worst, 100 * 0.5 ** 19 * 0.99)
+    assert len(chained.worst_path) == 21
+
+
+def test_main_writes_the_module(tmp_path, capsys):
+    import yield_graph
+
+    output = tmp_path / "chained.js"
+    yield_graph.main(["--output", str(output)], prog="cli.py chain")
+    assert output.read_text(encoding="utf-8").startswith("/**")
+    assert "implied chained yields" in capsys.readouterr().out
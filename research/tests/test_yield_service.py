@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+import pytest
+
+import yield_load
+import yield_service
+from batch_calc import evaluate_inputs
+from js_data import load_fish_data_v3
+from yield_service import YieldService, start_server
+
+FISH_DATA = load_fish_data_v3()
+
+
+@pytest.fixture(scope="module")
+def service():
+    return YieldService(FISH_DATA)
+
+
+def get(service, target):
+    status, body = service.respond("GET", target)
+    return status, json.loads(body)
+
+
+def test_lookups(service):
+    assert get(service, "/health") == (200, {"status": "ok", "species": len(FISH_DATA), "conversions": 655})
+    assert get(service, "/yield?species=Pink+Salmon&from=Round&to=D%2FH-On") == (
+        200, {"species": "Pink Salmon", "from": "Round", "to": "D/H-On", "yield": 91, "range": [84, 94]})
+    # Names are resolved like every other ingestion path
+    status, cod = get(service, "/species/Cod,%20Pacific")
+    assert status == 200 and cod["name"] == "Pacific Cod"
+    assert len(cod["conversions"]) == len(FISH_DATA["Pacific Cod"]["conversions"])
+    status, salmon = get(service, "/species?category=Salmon")
+    assert [s["name"] for s in salmon] == [n for n, d in FISH_DATA.items() if d["category"] == "Salmon"]
+
+    assert get(service, "/yield?species=Salmon&from=Round&to=Fillet")[0] == 404
+    assert get(service, "/yield?species=Lingcod&from=Round&to=Nothing")[0] == 404
+    assert get(service, "/yield?species=Lingcod")[0] == 400
+    assert get(service, "/nowhere")[0] == 404
+    assert service.respond("POST", "/yield")[0] == 405
+
+
+def test_calc_matches_batch_calc(service):
+    inputs = [
+        {"mode": "cost", "yieldPercent": 45, "cost": 3.5, "processingCost": 0.4, "weightType": "outgoing"},
+        {"mode": "weight", "targetWeight": 100, "species": "Pink Salmon", "from": "Round", "to": "D/H-On"},
+        {"mode": "cost", "cost": 2, "species": "Nothing Fish", "from": "Round", "to": "D/H-On"},
+        {"mode": "cost", "yieldPercent": 0, "cost": 10, "showEconomyOfScale": True, "quantity": 500,
+         "priceBreaks": [{"minQty": 100, "discount": 5}, {"minQty": 400, "discount": 10}]},
+    ]
+    status, body = service.respond("POST", "/calc", json.dumps({"inputs": inputs}).encode())
+    results = json.loads(body)["results"]
+    assert status == 200
+
+    expected_inputs = [inputs[0], {**inputs[1], "yieldPercent": 91}, inputs[3]]
+    expected = evaluate_inputs(expected_inputs)
+    for result, value, applied in zip([results[0], results[1], results[3]],
+                                      expected.result.tolist(), expected.applied_discount.tolist()):
+        assert result["result"] == value and result["appliedDiscount"] == applied
+    assert results[1]["yieldPercent"] == 91
+    assert "error" in results[2]
+    assert service.respond("POST", "/calc", b"{")[0] == 400
+
+
+def test_malformed_calc_inputs_get_a_response(service, monkeypatch, capsys):
+    for bad in ({"processingSteps": [1]}, {"priceBreaks": "x"}, {"priceBreaks": [{"minQty": 1}, None]}):
+        body = json.dumps({"inputs": [{"mode": "cost", "yieldPercent": 50, "cost": 2}, {"mode": "cost", **bad}]})
+        status, response = service.respond("POST", "/calc", body.encode())
+        assert status == 400
+        assert json.loads(response)["error"].startswith("inputs[1].")
+
+    def broken(scenarios):
+        raise AttributeError("boom")
+
+    monkeypatch.setattr("batch_calc.evaluate_inputs", broken)
+    status, response = service.respond("POST", "/calc", b'{"inputs": [{"mode": "cost", "cost": 1.25}]}')
+    assert (status, json.loads(response)) == (500, {"error": "internal error"})
+    assert "AttributeError: boom" in capsys.readouterr().err
+
+
+def test_large_bodies_are_not_cached():
+    service = YieldService(FISH_DATA, cache_size=16)
+    item = {"mode": "cost", "yieldPercent": 50, "cost": 2, "note": "x" * 100}
+    small = json.dumps({"inputs": [item]}).encode()
+    large = json.dumps({"inputs": [item] * 100}).encode()
+    assert len(small) <= yield_service.MAX_CACHED_BODY_BYTES < len(large)
+    for body in (small, small, large, large):
+        assert service.respond("POST", "/calc", body)[0] == 200
+    info = service._cached.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_bad_content_length_gets_a_400():
+    service = YieldService(FISH_DATA, cache_size=16)
+
+    async def send(head):
+        server = await start_server(service, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(head)
+        await writer.drain()
+        response = await yield_load.read_response(reader)
+        assert await reader.read() == b""
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    for length in (b"-5", b"ten"):
+        status, body = asyncio.run(send(b"POST /calc HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n"))
+        assert (status, json.loads(body)) == (400, {"error": "bad Content-Length"})
+
+
+def test_pipelined_requests_are_answered_in_order():
+    service = YieldService(FISH_DATA, cache_size=16)
+
+    async def run():
+        server = await start_server(service, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        targets = ["/health", "/yield?species=Lingcod&from=Round&to=D%2FH-On", "/missing", "/health"]
+        writer.write(b"".join(f"GET {t} HTTP/1.1\r\nHost: x\r\n\r\n".encode() for t in targets))
+        writer.write(b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        responses = [await yield_load.read_response(reader) for _ in range(len(targets) + 1)]
+        assert await reader.read() == b""
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    responses = asyncio.run(run())
+    assert [status for status, _ in responses] == [200, 200, 404, 200, 200]
+    assert json.loads(responses[1][1])["yield"] == 90
+    stats = json.loads(responses[-1][1])
+    assert stats["requests"] == 5
+    assert stats["cache"]["hits"] == 1
+
+
+def test_load_generator():
+    service = YieldService(FISH_DATA)
+    requests = yield_load.build_requests(FISH_DATA, 300, calc_fraction=0.3, batch_size=5)
+
+    async def run():
+        server = await start_server(service, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await yield_load.run_load(requests, "127.0.0.1", port, connections=4, pipeline=8)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    result = asyncio.run(run())
+    assert result.requests == 300
+    assert result.statuses == {200: 300}
+    assert len(result.latencies) == 300
+    assert "req/s" in yield_load.format_result(result)
@@ -0,0 +1,109 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import yield_uncertainty
+from batch_calc import evaluate
+from conversion_table import ConversionTable
+from yield_uncertainty import cached_simulation, dataset_hash, propagate, report, simulate_yields
+
+DATA = {
+    "Cod": {
+        "conversions": {
+            "Round → D/H-On": {"yield": 80, "range": [70, 90]},
+            "Round → D/H-Off": {"yield": 60, "range": None},
+        },
+    },
+    "Pollock": {
+        "conversions": {
+            "Round → Fillet": {"yield": 40, "range": [30, 42]},
+        },
+    },
+}
+
+
+@pytest.fixture
+def table():
+    return ConversionTable.from_v3(DATA)
+
+
+def test_uniform_percentiles_match_the_range(table):
+    sim = simulate_yields(table, "uniform", draws=200_000, percentiles=(5, 50, 95))
+    assert sim.percentiles == (5, 50, 95)
+    np.testing.assert_allclose(sim.yields[0], [71, 80, 89], atol=0.1)
+    np.testing.assert_allclose(sim.yields[2], [30.6, 36, 41.4], atol=0.1)
+    assert sim.mean_yield[0] == pytest.approx(80, abs=0.05)
+
+
+def test_conversions_without_a_range_keep_their_point_yield(table):
+    sim = simulate_yields(table, "pert", draws=1000)
+    assert (sim.yields[1] == 60).all()
+    assert sim.mean_inverse[1] == pytest.approx(100 / 60)
+
+
+def test_percentiles_are_completed_with_their_complements(table):
+    assert simulate_yields(table, "uniform", draws=10, percentiles=(10, 50)).percentiles == (10, 50, 90)
+
+
+def test_pert_peaks_at_the_point_yield(table):
+    sim = simulate_yields(table, "pert", draws=100_000, percentiles=(50,))
+    # Mode 40 in [30, 42]: skewed towards the top of the range
+    assert sim.mean_yield[2] == pytest.approx((30 + 4 * 40 + 42) / 6, abs=0.05)
+
+
+def test_chunking_does_not_change_the_result(table):
+    whole = simulate_yields(table, "uniform", draws=5000, seed=3)
+    chunked = simulate_yields(table, "uniform", draws=5000, seed=3, chunk_elements=64)
+    np.testing.assert_array_equal(whole.yields, chunked.yields)
+    np.testing.assert_allclose(whole.mean_inverse, chunked.mean_inverse)
+
+
+def test_rejects_unknown_distribution(table):
+    with pytest.raises(ValueError):
+        simulate_yields(table, "lognormal")
+
+
+def test_propagate_maps_percentiles_through_calc_engine(table):
+    sim = simulate_yields(table, "triangular", draws=20_000, percentiles=(5, 50, 95))
+    inputs = {"mode": "cost", "cost": 2, "processing_cost": 0.25, "shipping": 0.1}
+    values, mean = propagate(sim, **inputs)
+    # Cost falls as the yield rises, so the 5th cost percentile is the 95th yield percentile
+    expected = evaluate(yield_percent=sim.yields[:, ::-1], **inputs).result
+    np.testing.assert_allclose(values, expected)
+    np.testing.assert_allclose(mean, 2.25 * sim.mean_inverse + 0.1)
+
+
+def test_report_has_cost_and_weight(table):
+    sim = simulate_yields(table, "uniform", draws=1000)
+    result = report(table, sim, cost_inputs={"cost": 2}, weight_inputs={"target_weight": 100})
+    entry = result["Cod"]["Round → D/H-Off"]
+    assert entry["cost"]["p50"] == pytest.approx(2 / 0.6, abs=1e-4)
+    assert entry["weight"]["mean"] == pytest.approx(100 / 0.6, abs=1e-4)
+    assert set(entry["simulated_yield"]) == {"p5", "p25", "p50", "p75", "p95"}
+
+
+def test_cached_by_dataset_hash(table, tmp_path, monkeypatch):
+    first = cached_simulation(table, "uniform", draws=1000, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("re-simulated")
+
+    monkeypatch.setattr(yield_uncertainty, "simulate_yields", fail)
+    again = cached_simulation(ConversionTable.from_v3(DATA), "uniform", draws=1000, cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(first.yields, again.yields)
+
+    changed = {**DATA, "Pollock": {"conversions": {"Round → Fillet": {"yield": 41, "range": [30, 42]}}}}
+    assert dataset_hash(ConversionTable.from_v3(changed)) != dataset_hash(table)
+    with pytest.raises(AssertionError):
+        cached_simulation(ConversionTable.from_v3(changed), "uniform", draws=1000, cache_dir=str(tmp_path))
+
+
+def test_main_writes_the_report(tmp_path):
+    import json
+
+    output = tmp_path / "report.json"
+    yield_uncertainty.main(
+        ["--draws", "1000", "--no-cache", "--cost", "4", "--output", str(output)], prog="cli.py uncertainty",
+    )
+    assert json.loads(output.read_text(encoding="utf-8"))
@@ -1,96 +1,140 @@
-import pandas as pd
-import json
-import re
+from fish_store import open_store
+from metrics import active, add_metrics_arguments, metrics_from_args
+from name_index import default_index, report_suggestions
+
+# The workbook's rows in the fish data store; each merge replaces them all
+SOURCE = "nhcs"
+
+# "80-85" style ranges; only the first two fields count, like str.split("-")[:2]
+RANGE_PATTERN = r'^([^-]*)-([^-]*)'
+
+def _text_cells(col):
+    import numpy as np
+
+    # String cells as-is, everything else NaN. Decided per cell: pandas 3
+    # reads an all-text column as the str dtype, older versions as object,
+    # and a mixed column is object either way.
+    return col.map(lambda v: v if isinstance(v, str) else np.nan).astype(object)
+
+def normalize_yields(df, name_col="Common name", yield_col="% Yield", notes_col="Notes"):
+    """
+    Normalize a whole NHCS sheet's "% Yield" column at once.
+
+    Returns (yields, rejects). yields has name, label, yield, low, high and
+    range columns; rejects holds the named rows whose yield couldn't be
+    parsed, with the raw value and the reason.
+
+    Cell rules:
+      - numbers below 1 are fractions and are scaled by 100
+      - "80-85%" strings are ranges and the yield is their average
+      - other strings are plain percentages
+      - rows without a published range get a synthetic +/-5 range
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = df[df[name_col].notna()]
+    raw = df[yield_col]
+
+    text = _text_cells(raw).str.replace("%", "", regex=False).str.strip()
+    is_text = text.notna()
+    is_range = is_text & text.str.contains("-", regex=False, na=False)
+
+    # Numeric cells (ints and floats straight from the sheet)
+    numeric = pd.to_numeric(raw.where(~is_text), errors="coerce")
+    numeric = numeric.where(numeric >= 1, numeric * 100)
+
+    # Range cells
+    bounds = text.where(is_range).str.extract(RANGE_PATTERN)
+    low = pd.to_numeric(bounds[0].str.strip(), errors="coerce")
+    high = pd.to_numeric(bounds[1].str.strip(), errors="coerce")
+
+    # Plain percentage strings
+    plain = pd.to_numeric(text.where(is_text & ~is_range).str.strip(), errors="coerce")
+
+    value = numeric.where(~is_text, plain.where(~is_range, (low + high) / 2))
+    value = value.astype(float)
+    ok = np.isfinite(value)
+
+    rejects = pd.DataFrame({
+        "name": df.loc[~ok, name_col],
+        "raw_yield": raw[~ok],
+        "reason": np.where(raw[~ok].isna(), "missing yield", "unparseable yield"),
+    })
+
+    df, value, text = df[ok], value[ok], text[ok]
+    is_range, low, high = is_range[ok], low[ok], high[ok]
+
+    # int() truncation, as the per-row parser did
+    final_yield = np.trunc(value).astype(int)
+    low = low.where(is_range, final_yield - 5)
+    high = high.where(is_range, final_yield + 5)
+    synthetic = (final_yield - 5).astype(str) + "-" + (final_yield + 5).astype(str)
+
+    notes = df[notes_col].fillna("").astype(str) if notes_col in df else pd.Series("", index=df.index)
+    label = ("Average Yield (" + notes.str.strip() + ")").where(notes != "", "Average Yield")
+
+    yields = pd.DataFrame({
+        "name": df[name_col],
+        "label": label,
+        "yield": final_yield,
+        "low": low,
+        "high": high,
+        "range": text.where(is_range, synthetic),
+    })
+    return yields, rejects
 
 def update_data():
-    # Read existing JS file
-    with open("data/fish_data.js", "r") as f:
-        content = f.read()
-
-    # Extract FISH_DATA JSON
-    # Pattern: generic match for the first object
-    # const FISH_DATA = { ... };
-    # We can split by ";\nconst PROFILES_DATA" maybe?
-    
-    parts = content.split(";\nconst PROFILES_DATA")
-    fish_data_js = parts[0]
-    profiles_data_js = "const PROFILES_DATA" + parts[1] if len(parts) > 1 else ""
-    
-    # Remove "const FISH_DATA = "
-    json_str = fish_data_js.replace("const FISH_DATA = ", "").strip()
-    # It might end with a semicolon
-    if json_str.endswith(";"): json_str = json_str[:-1]
-    
+    from excel_ingest import NHCS_WORKBOOK, load_sheet
+
+    # Existing data lives in the canonical store; it's seeded from
+    # data/fish_data.js the first time the store is opened.
     try:
-        fish_data = json.loads(json_str)
+        store = open_store()
     except Exception as e:
-        print("Failed to parse existing JSON:", e)
+        print("Failed to open fish data store:", e)
         return
 
-    # Read Excel
-    df = pd.read_excel("datasets/% Yields NHCS.xlsx", sheet_name="Sheet1")
-    
-    for index, row in df.iterrows():
-        name = row["Common name"]
-        if pd.isna(name): continue
-        
-        yield_val = row["% Yield"]
-        notes = row["Notes"] if not pd.isna(row["Notes"]) else ""
-        
-        # Clean Yield
-        # If float < 1, multiply by 100
-        # If string "80-85%", extract range?
-        
-        final_yield = 0
-        final_range = ""
-        
-        try:
-            if isinstance(yield_val, (int, float)):
-                if yield_val < 1:
-                    final_yield = int(yield_val * 100)
-                else:
-                    final_yield = int(yield_val)
-            elif isinstance(yield_val, str):
-                # Check for range "80-85%"
-                yield_val = yield_val.replace("%", "").strip()
-                if "-" in yield_val:
-                    r_parts = yield_val.split("-")
-                    low = float(r_parts[0])
-                    high = float(r_parts[1])
-                    avg = (low + high) / 2
-                    final_yield = int(avg)
-                    final_range = yield_val
-                else:
-                    final_yield = int(float(yield_val))
-        except:
-            print(f"Skipping {name} due to invalid yield: {yield_val}")
-            continue
-            
+    # The store is closed however the merge ends, load_sheet() failing included
+    with store:
+        # Read Excel
+        metrics = active()
+        with metrics.stage("merge.read_excel"):
+            df = load_sheet(NHCS_WORKBOOK, "Sheet1")
+            yields, rejects = normalize_yields(df)
+        metrics.add("merge", {"rows_read": len(df), "rows_valid": len(yields), "rows_rejected": len(rejects)})
+
+        if len(rejects):
+            print(f"Skipping {len(rejects)} rows with invalid yields:")
+            print(rejects.to_string())
+
         # Add to fish_data
         # Use "East Coast" prefix or just merge? User said "East coast species info".
-        # I'll add them as top level keys.
-        
-        if name not in fish_data:
-            fish_data[name] = {}
-        
-        # Since we don't know the product form, we'll label it "General Yield"
-        # or append info from Notes if useful.
-        product_label = "Average Yield"
-        if notes:
-            product_label += f" ({notes.strip()})"
-            
-        fish_data[name][product_label] = {
-            "yield": str(final_yield),
-            "range": final_range if final_range else f"{final_yield-5}-{final_yield+5}" # synthetic range?
-        }
-        
-    # Reconstruct file
-    new_content = "const FISH_DATA = " + json.dumps(fish_data, indent=4) + ";\n" + profiles_data_js
-    
-    with open("data/fish_data.js", "w") as f:
-        f.write(new_content)
-        
-    print("Successfully updated fish_data.js with East Coast species.")
+        # I'll add them as top level keys, under the dataset's name for species it
+        # already has. Rows dropped from the workbook since the last merge go.
+        names = default_index()
+        with metrics.stage("merge.upsert"):
+            changed = store.replace_source(SOURCE, zip(
+                yields["name"].map(names.canonical), yields["label"], yields["yield"].astype(str), yields["range"]
+            ))
+            written = store.export_js()
+    metrics.incr("merge.rows_changed", changed)
+    report_suggestions(names, yields["name"])
+
+    if written:
+        print(f"Successfully updated fish_data.js with East Coast species ({changed} rows changed).")
+    else:
+        print("fish_data.js is already up to date.")
+    return rejects
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Merge the NHCS yields workbook into the fish data store")
+    add_metrics_arguments(parser)
+    with metrics_from_args(parser.parse_args(argv)):
+        update_data()
+
 
 if __name__ == "__main__":
-    update_data()
+    main()
@@ -1,11 +1,26 @@
 #!/usr/bin/env python3
 """
-Validation script to compare fish_data.js against the PDF source (MAB-37).
-This script parses the pdf_content.txt and validates/corrects entries.
+Validation script to compare fish_data_v3.js against the PDF source (MAB-37).
+
+Loads the complete app dataset and the records parsed from pdf_content.txt,
+indexes both by normalized (species, from, to) keys and cross-checks every
+conversion in one pass over each index. PDF species are put under the
+dataset's names by name_index, like every other ingestion path; a PDF
+species that isn't in the dataset ("Salmon", "Rockfish") is reported rather
+than silently left out of the cross-check. The result is a JSON report; the
+exit status is non-zero when errors are found so it can gate data updates
+in CI.
 """
 
+import argparse
+import os
 import re
 import json
+import sys
+from js_data import FISH_DATA_V3_PATH, RESEARCH_DIR, load_fish_data_v3, split_conversion_key
+from metrics import active, add_metrics_arguments, metrics_from_args, staged
+from name_index import NameIndex
+from ocr_normalize import ocr_variants
 
 # Acronym definitions for tooltips
 ACRONYMS = {
@@ -14,160 +29,292 @@ ACRONYMS = {
     "S/B": "Skinless/Boneless",
     "SIB": "Skinless/Boneless",
     "sp.": "species",
-    "O/H-On": "Dressed/Head-On",  # OCR variant
-    "O/H-Off": "Dressed/Head-Off",  # OCR variant
-    "DIH-On": "Dressed/Head-On",  # OCR variant
-    "DIH-Off": "Dressed/Head-Off",  # OCR variant
 }
 
-# Properly structured data from PDF - Sample of corrected entries
-CORRECTED_DATA = {
-    "Flathead Sole": {
-        "scientific_name": "Hippoglossoides elassodon",
-        "conversions": {
-            "Round → D/H-On": {"yield": 86, "range": [80, 94], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 67, "range": [60, 79], "from": "Round", "to": "D/H-Off"},
-            "Round → Skinless Fillet": {"yield": 27, "range": [25, 32], "from": "Round", "to": "Skinless Fillet"},
-        }
-    },
-    "Pink Salmon": {
-        "scientific_name": "Oncorhynchus gorbuscha",
-        "conversions": {
-            "Round → D/H-On": {"yield": 91, "range": [84, 94], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 73, "range": [68, 80], "from": "Round", "to": "D/H-Off"},
-            "Round → Canned": {"yield": 65, "range": [58, 67], "from": "Round", "to": "Canned"},
-            "Round → Skin-On Fillet (Hand)": {"yield": 52, "range": [47, 58], "from": "Round", "to": "Skin-On Fillet (Hand)"},
-            "Round → Skin-On Fillet (Machine)": {"yield": 50, "range": [45, 55], "from": "Round", "to": "Skin-On Fillet (Machine)"},
-            "Round → Skinless Fillet": {"yield": 42, "range": [41, 46], "from": "Round", "to": "Skinless Fillet"},
-            "Round → SIB Fillet (Hand-V-Cut)": {"yield": 33, "range": [30, 36], "from": "Round", "to": "SIB Fillet (Hand-V-Cut)"},
-            "Round → SIB Fillet (Pinboning)": {"yield": 41, "range": [40, 44], "from": "Round", "to": "SIB Fillet (Pinboning)"},
-            "Round → SIB Trim": {"yield": 14, "range": [12, 16], "from": "Round", "to": "SIB Trim"},
-            "Round → Steaks": {"yield": 58, "range": [53, 65], "from": "Round", "to": "Steaks"},
-            "Round → Roe": {"yield": 6, "range": [3, 10], "from": "Round", "to": "Roe"},
-            "D/H-On → D/H-Off": {"yield": 81, "range": [72, 90], "from": "D/H-On", "to": "D/H-Off"},
-            "D/H-On → Skin-On Fillet (Hand)": {"yield": 57, "range": [50, 64], "from": "D/H-On", "to": "Skin-On Fillet (Hand)"},
-            "D/H-On → Skin-On Fillet (Machine)": {"yield": 55, "range": [48, 61], "from": "D/H-On", "to": "Skin-On Fillet (Machine)"},
-        }
-    },
-    "Chum Salmon": {
-        "scientific_name": "Oncorhynchus keta",
-        "conversions": {
-            "Round → D/H-On": {"yield": 89, "range": [79, 91], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 74, "range": [71, 77], "from": "Round", "to": "D/H-Off"},
-            "Round → Canned": {"yield": 67, "range": [60, 70], "from": "Round", "to": "Canned"},
-            "Round → Skin-On Fillet (Hand)": {"yield": 60, "range": [55, 63], "from": "Round", "to": "Skin-On Fillet (Hand)"},
-            "Round → Skinless Fillet": {"yield": 50, "range": [45, 53], "from": "Round", "to": "Skinless Fillet"},
-            "Round → Roe": {"yield": 8, "range": [4, 10], "from": "Round", "to": "Roe"},
-        }
-    },
-    "Sockeye Salmon": {
-        "scientific_name": "Oncorhynchus nerka",
-        "conversions": {
-            "Round → D/H-On": {"yield": 92, "range": [85, 94], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 74, "range": [66, 82], "from": "Round", "to": "D/H-Off"},
-            "Round → Canned": {"yield": 67, "range": [60, 70], "from": "Round", "to": "Canned"},
-            "Round → Skin-On Fillet (Hand)": {"yield": 53, "range": [50, 59], "from": "Round", "to": "Skin-On Fillet (Hand)"},
-            "Round → Skinless Fillet": {"yield": 46, "range": [41, 49], "from": "Round", "to": "Skinless Fillet"},
-            "Round → Roe": {"yield": 4, "range": [3, 6], "from": "Round", "to": "Roe"},
-        }
-    },
-    "Coho Salmon": {
-        "scientific_name": "Oncorhynchus kisutch",
-        "conversions": {
-            "Round → D/H-On": {"yield": 92, "range": [87, 94], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 75, "range": [70, 83], "from": "Round", "to": "D/H-Off"},
-            "Round → Canned": {"yield": 67, "range": [60, 70], "from": "Round", "to": "Canned"},
-            "Round → Skin-On Fillet (Hand)": {"yield": 57, "range": [52, 60], "from": "Round", "to": "Skin-On Fillet (Hand)"},
-            "Round → Skinless Fillet": {"yield": 51, "range": [46, 56], "from": "Round", "to": "Skinless Fillet"},
-            "Round → Roe": {"yield": 7, "range": [5, 10], "from": "Round", "to": "Roe"},
-        }
-    },
-    "Chinook Salmon": {
-        "scientific_name": "Oncorhynchus tshawytscha",
-        "conversions": {
-            "Round → D/H-On": {"yield": 88, "range": [82, 94], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 72, "range": [68, 74], "from": "Round", "to": "D/H-Off"},
-            "Round → Skin-On Fillet (Hand)": {"yield": 55, "range": [52, 60], "from": "Round", "to": "Skin-On Fillet (Hand)"},
-            "Round → Skinless Fillet": {"yield": 46, "range": [41, 49], "from": "Round", "to": "Skinless Fillet"},
-            "Round → Roe": {"yield": 6, "range": [3, 10], "from": "Round", "to": "Roe"},
-        }
-    },
-    "Pacific Cod": {
-        "scientific_name": "Gadus macrocephalus",
-        "conversions": {
-            "Round → D/H-On": {"yield": 81, "range": [72, 90], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 63, "range": [56, 75], "from": "Round", "to": "D/H-Off"},
-            "Round → Skin-On Fillets (V-cut)": {"yield": 45, "range": [38, 48], "from": "Round", "to": "Skin-On Fillets (V-cut)"},
-            "Round → Skinless Fillets (V-cut)": {"yield": 39, "range": [22, 45], "from": "Round", "to": "Skinless Fillets (V-cut)"},
-            "Round → SIB Fillets (V-cut)": {"yield": 33, "range": [18, 39], "from": "Round", "to": "SIB Fillets (V-cut)"},
-            "Round → Steaks": {"yield": 62, "range": None, "from": "Round", "to": "Steaks"},
-            "D/H-Off → Smoked": {"yield": 58, "range": [50, 65], "from": "D/H-Off", "to": "Smoked"},
-        }
-    },
-    "Pacific Halibut": {
-        "scientific_name": "Hippoglossus stenolepis",
-        "conversions": {
-            "Round → D/H-On": {"yield": 88, "range": [85, 92], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 72, "range": [68, 80], "from": "Round", "to": "D/H-Off"},
-            "Round → Steaks": {"yield": 62, "range": [60, 75], "from": "Round", "to": "Steaks"},
-            "Round → Skin-On Fillet": {"yield": 49, "range": [45, 56], "from": "Round", "to": "Skin-On Fillet"},
-            "Round → Skinless Fillet (Fletch)": {"yield": 41, "range": [34, 44], "from": "Round", "to": "Skinless Fillet (Fletch)"},
-            "D/H-On → D/H-Off": {"yield": 83, "range": [73, 94], "from": "D/H-On", "to": "D/H-Off"},
-            "D/H-On → Steaks": {"yield": 76, "range": [71, 88], "from": "D/H-On", "to": "Steaks"},
-            "D/H-Off → Steaks": {"yield": 79, "range": [70, 94], "from": "D/H-Off", "to": "Steaks"},
-        }
-    },
-    "Dungeness Crab": {
-        "scientific_name": "Cancer magister",
-        "conversions": {
-            "Raw Whole → Raw Sections": {"yield": 60, "range": None, "from": "Raw Whole", "to": "Raw Sections"},
-            "Raw Whole → Cooked Whole": {"yield": 90, "range": None, "from": "Raw Whole", "to": "Cooked Whole"},
-            "Raw Whole → Cooked Sections": {"yield": 52, "range": None, "from": "Raw Whole", "to": "Cooked Sections"},
-            "Raw Whole → Cooked Meat": {"yield": 24, "range": [22, 25], "from": "Raw Whole", "to": "Cooked Meat"},
-        }
-    },
-    "Sablefish": {
-        "scientific_name": "Anoplopoma fimbria",
-        "conversions": {
-            "Round → D/H-On": {"yield": 89, "range": [86, 94], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 68, "range": [67, 71], "from": "Round", "to": "D/H-Off"},
-            "Round → Skin-On Fillet": {"yield": 40, "range": [38, 46], "from": "Round", "to": "Skin-On Fillet"},
-            "Round → Skinless Fillet": {"yield": 35, "range": None, "from": "Round", "to": "Skinless Fillet"},
-            "Round → Steaks": {"yield": 62, "range": [60, 65], "from": "Round", "to": "Steaks"},
-            "D/H-Off → Smoked Sides": {"yield": 45, "range": [40, 49], "from": "D/H-Off", "to": "Smoked Sides"},
-        }
-    },
-    "Lingcod": {
-        "scientific_name": "Ophiodon elongatus",
-        "conversions": {
-            "Round → D/H-On": {"yield": 90, "range": [83, 93], "from": "Round", "to": "D/H-On"},
-            "Round → D/H-Off": {"yield": 70, "range": [62, 74], "from": "Round", "to": "D/H-Off"},
-            "Round → Skinless Fillet": {"yield": 35, "range": [29, 38], "from": "Round", "to": "Skinless Fillet"},
-            "Round → Steaks": {"yield": 62, "range": None, "from": "Round", "to": "Steaks"},
-            "D/H-On → D/H-Off": {"yield": 80, "range": [67, 89], "from": "D/H-On", "to": "D/H-Off"},
-        }
-    },
+# OCR variants ("O/H-On", "DJH-Off", ...) come from the shared correction table
+ACRONYMS.update({
+    variant: full
+    for abbr, full in list(ACRONYMS.items())
+    for variant in ocr_variants(abbr)
+})
+
+PDF_CONTENT_PATH = os.path.join(RESEARCH_DIR, "pdf_content.txt")
+
+ERROR = "error"
+WARNING = "warning"
+
+# check name -> severity
+CHECKS = {
+    "yield_out_of_range": ERROR,
+    "chain_exceeds_parent": ERROR,
+    "missing_in_pdf": WARNING,
+    "missing_in_dataset": WARNING,
+    "yield_mismatch": WARNING,
+    "unmatched_pdf_species": WARNING,
 }
 
-def validate_data():
-    """Run validation and print report"""
-    print("=" * 60)
-    print("FISH DATA VALIDATION REPORT")
-    print("=" * 60)
-    
-    print("\n📋 ACRONYM REFERENCE:")
-    for abbr, full in ACRONYMS.items():
-        print(f"  {abbr} = {full}")
-    
-    print("\n\n📊 CORRECTED DATA SAMPLE:")
-    for species, data in list(CORRECTED_DATA.items())[:3]:
-        print(f"\n  {species} ({data['scientific_name']})")
-        for conv, info in list(data['conversions'].items())[:3]:
-            range_str = f"{info['range'][0]}-{info['range'][1]}%" if info['range'] else "N/A"
-            print(f"    {conv}: {info['yield']}% (Range: {range_str})")
-    
-    print("\n\n✅ Validation complete. See generated fish_data_corrected.js for full data.")
-    return CORRECTED_DATA
+def normalize_species(name):
+    """"Cod, Pacific" and "Pacific Cod" both become "pacific cod"."""
+    name = re.sub(r"\s+", " ", name).strip()
+    if ", " in name:
+        family, _, qualifier = name.partition(", ")
+        name = f"{qualifier} {family}"
+    return name.lower()
+
+def normalize_form(form):
+    return re.sub(r"\s+", " ", form).strip().lower()
+
+def conversion_key(species, from_state, to_state):
+    return normalize_species(species), normalize_form(from_state), normalize_form(to_state)
+
+def parse_range(value):
+    """[80, 94], "80-94" or None -> (80, 94) or None"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        m = re.match(r"^\s*(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s*$", value)
+        return (float(m.group(1)), float(m.group(2))) if m else None
+    return (value[0], value[1])
+
+def index_dataset(fish_data):
+    """{normalized key: conversion} for every conversion in FISH_DATA_V3."""
+    index = {}
+    for species, data in fish_data.items():
+        for label, conv in data["conversions"].items():
+            from_state, to_state = split_conversion_key(label)
+            index[conversion_key(species, from_state, to_state)] = {
+                "species": species,
+                "from": from_state,
+                "to": to_state,
+                "yield": conv["yield"],
+                "range": parse_range(conv.get("range")),
+            }
+    return index
+
+def pdf_conversions(records, from_forms):
+    """
+    Turn parse_data Records into conversions. The bulletin only prints the
+    "From" form on the first row of each block ("Round D/H-On 81 72-90"), so
+    later rows inherit the species' most recent "From" form.
+    """
+    forms = {normalize_form(f): f for f in from_forms}
+    prefixes = sorted(forms, key=len, reverse=True)
+    current_from = {}
+    for record in records:
+        product = re.sub(r"\s+", " ", record.product).strip()
+        lowered = product.lower()
+        for prefix in prefixes:
+            if lowered.startswith(prefix + " "):
+                current_from[record.species] = forms[prefix]
+                product = product[len(prefix) + 1:]
+                break
+        from_state = current_from.get(record.species)
+        if from_state is None or not record.average:
+            continue
+        yield {
+            "species": record.species,
+            "from": from_state,
+            "to": product,
+            "yield": int(record.average),
+            "range": parse_range(record.range),
+        }
+
+def index_pdf(conversions):
+    # First occurrence wins; later duplicates are usually the other column
+    index = {}
+    for conv in conversions:
+        index.setdefault(conversion_key(conv["species"], conv["from"], conv["to"]), conv)
+    return index
+
+def _issue(check, species, from_state, to_state, detail):
+    return {
+        "check": check,
+        "severity": CHECKS[check],
+        "species": species,
+        "from": from_state,
+        "to": to_state,
+        "detail": detail,
+    }
+
+def check_dataset(dataset_index):
+    issues = []
+    by_species = {}
+    for key, conv in dataset_index.items():
+        by_species.setdefault(key[0], {})[key[1:]] = conv
+        rng = conv["range"]
+        if rng and not (rng[0] <= conv["yield"] <= rng[1]):
+            issues.append(_issue("yield_out_of_range", conv["species"], conv["from"], conv["to"],
+                                 f"yield {conv['yield']} outside range {rng[0]:g}-{rng[1]:g}"))
+
+    # A -> Z can't yield more than A -> B when Z is made from B (B -> Z exists)
+    for edges in by_species.values():
+        outgoing = {}
+        for (from_state, to_state) in edges:
+            outgoing.setdefault(from_state, []).append(to_state)
+        for (a, b), parent in edges.items():
+            for z in outgoing.get(b, ()):
+                child = edges.get((a, z))
+                if child and child["yield"] > parent["yield"]:
+                    issues.append(_issue("chain_exceeds_parent", child["species"], child["from"], child["to"],
+                                         f"yield {child['yield']} exceeds {parent['from']} → {parent['to']} "
+                                         f"({parent['yield']}) although {parent['to']} → {z} exists"))
+    return issues
+
+def resolve_pdf_species(conversions, names, fish_data):
+    """
+    Put PDF conversions under the dataset's species names. Returns (the
+    conversions of dataset species, one unmatched_pdf_species issue for each
+    PDF species that isn't one).
+    """
+    resolved, unmatched = [], {}
+    for conv in conversions:
+        species = names.canonical(conv["species"])
+        if species in fish_data:
+            resolved.append({**conv, "species": species})
+        else:
+            unmatched[conv["species"]] = unmatched.get(conv["species"], 0) + 1
+
+    issues = []
+    for species, count in unmatched.items():
+        suggestion = names.suggest(species)
+        hint = f" (possibly {suggestion.name})" if suggestion else ""
+        issues.append(_issue("unmatched_pdf_species", species, None, None,
+                             f"{count} PDF conversions not cross-checked: no dataset species{hint}"))
+    return resolved, issues
+
+def cross_check(dataset_index, pdf_index):
+    issues = []
+    pdf_species = {key[0] for key in pdf_index}
+    dataset_species = {key[0] for key in dataset_index}
+
+    for key, conv in dataset_index.items():
+        counterpart = pdf_index.get(key)
+        if counterpart is None:
+            if key[0] in pdf_species:
+                issues.append(_issue("missing_in_pdf", conv["species"], conv["from"], conv["to"],
+                                     "no matching conversion parsed from the PDF"))
+        elif counterpart["yield"] != conv["yield"]:
+            issues.append(_issue("yield_mismatch", conv["species"], conv["from"], conv["to"],
+                                 f"dataset yield {conv['yield']}, PDF yield {counterpart['yield']}"))
+
+    for key, conv in pdf_index.items():
+        if key[0] in dataset_species and key not in dataset_index:
+            issues.append(_issue("missing_in_dataset", conv["species"], conv["from"], conv["to"],
+                                 f"PDF yield {conv['yield']} has no dataset conversion"))
+    return issues
+
+def dataset_from_forms(dataset_index):
+    return {conv["from"] for conv in dataset_index.values()}
+
+def validate(fish_data, pdf_records=None, from_forms=None, names=None):
+    """
+    Validate a FISH_DATA_V3 dict, optionally against parsed PDF records, and
+    return the report. The "From" forms recognized in the records default to
+    those used in fish_data, and PDF species are resolved with names (a
+    NameIndex of fish_data by default).
+    """
+    dataset_index = index_dataset(fish_data)
+    issues = check_dataset(dataset_index)
+
+    pdf_index = {}
+    conversions, resolved = [], []
+    if pdf_records is not None:
+        if from_forms is None:
+            from_forms = dataset_from_forms(dataset_index)
+        if names is None:
+            names = NameIndex.from_dataset(fish_data)
+        conversions = list(pdf_conversions(pdf_records, from_forms))
+        resolved, unmatched_issues = resolve_pdf_species(conversions, names, fish_data)
+        pdf_index = index_pdf(resolved)
+        issues.extend(cross_check(dataset_index, pdf_index))
+        issues.extend(unmatched_issues)
+    pdf_species = {key[0] for key in pdf_index}
+
+    by_check = {check: 0 for check in CHECKS}
+    for issue in issues:
+        by_check[issue["check"]] += 1
+
+    return {
+        "summary": {
+            "species": len(fish_data),
+            "conversions": len(dataset_index),
+            "pdf_conversions": len(conversions),
+            "pdf_conversions_resolved": len(resolved),
+            "pdf_conversions_unresolved": len(conversions) - len(resolved),
+            "cross_checked": sum(1 for key in dataset_index if key[0] in pdf_species),
+            "errors": sum(1 for i in issues if i["severity"] == ERROR),
+            "warnings": sum(1 for i in issues if i["severity"] == WARNING),
+            "by_check": by_check,
+        },
+        "issues": issues,
+    }
+
+def species_records(pdf_path, species, names):
+    """
+    The PDF records of one species, from page_index: only the pages of the
+    bulletin headers that names resolves to it are parsed. Checks are per
+    species, so its issues come out the same as in a full run.
+    """
+    from page_index import get_species
+    from parse_data import SPECIES_MATCHER
+
+    key = normalize_species(species)
+    for name in SPECIES_MATCHER.names:
+        if normalize_species(names.canonical(name)) == key:
+            yield from get_species(name, pdf_path)
+
+@staged("validate")
+def validate_data(dataset_path=FISH_DATA_V3_PATH, pdf_path=PDF_CONTENT_PATH, species=None):
+    """Run validation over the full dataset, or only `species`, and return the report"""
+    from parse_data import iter_records
+
+    fish_data = load_fish_data_v3(dataset_path)
+    from_forms = None
+    names = NameIndex.from_dataset(fish_data)
+    if species is None:
+        records = iter_records(pdf_path) if pdf_path else None
+    else:
+        # Recognize the same "From" forms and names as a full run does
+        from_forms = dataset_from_forms(index_dataset(fish_data))
+        key = normalize_species(species)
+        fish_data = {name: data for name, data in fish_data.items() if normalize_species(name) == key}
+        records = species_records(pdf_path, species, names) if pdf_path else None
+    report = validate(fish_data, records, from_forms, names)
+    report["dataset"] = os.path.relpath(dataset_path)
+    report["pdf"] = os.path.relpath(pdf_path) if pdf_path else None
+    if species is not None:
+        report["species"] = species
+    summary = report["summary"]
+    active().add("validate", {key: summary[key] for key in ("conversions", "pdf_conversions", "errors", "warnings")})
+    active().add("validate.check", summary["by_check"])
+    return report
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Validate fish_data_v3.js against the MAB-37 PDF text")
+    parser.add_argument("--dataset", default=FISH_DATA_V3_PATH)
+    parser.add_argument("--pdf", default=PDF_CONTENT_PATH, help="Extracted PDF text to cross-check against")
+    parser.add_argument("--no-pdf", action="store_true", help="Only run the dataset's internal checks")
+    parser.add_argument("--report", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--species", help='Only validate this species ("Pacific Cod" or "Cod, Pacific")')
+    parser.add_argument("--strict", action="store_true", help="Fail on warnings as well as errors")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with metrics_from_args(args):
+        report = validate_data(args.dataset, None if args.no_pdf else args.pdf, args.species)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(output + "\n")
+        summary = report["summary"]
+        print(f"{summary['conversions']} conversions checked ({summary['cross_checked']} against the PDF): "
+              f"{summary['errors']} errors, {summary['warnings']} warnings")
+    else:
+        print(output)
+
+    failed = report["summary"]["errors"] or (args.strict and report["summary"]["warnings"])
+    sys.exit(1 if failed else 0)
+
 
 if __name__ == "__main__":
-    validate_data()
+    main()
@@ -0,0 +1,303 @@
+"""
+Prebuilt, indexed SQLite database of the yield dataset.
+
+The server only sees the research data through fish_data_v3.js, which it
+has to load and parse at startup. build() writes the same data as
+normalized tables into a SQLite file that can be shipped and opened
+read-only instead:
+
+    species        id, name, scientific_name, category
+    product_forms  id, name, description (from ACRONYMS)
+    fish_yields    species_id, from_form_id, to_form_id, yield_percent, range_min, range_max
+    species_search FTS5 over species names, scientific names, categories and
+                   PROFILES_DATA text
+
+fish_yields is a WITHOUT ROWID table keyed by (species_id, from_form_id,
+to_form_id), so a single-conversion lookup is one primary key probe, and
+covering indexes serve category filters and "every species with this
+conversion" queries without touching the tables. The file is built in one
+transaction into a temporary path and moved into place, so readers never
+see a half-written database.
+
+YieldDB is the query API. Every query is a module-level SQL constant, so
+sqlite3's statement cache prepares each one once per connection and reuses
+it afterwards:
+
+    with YieldDB("data/fish_yields.sqlite") as db:
+        db.yield_for("Lingcod", "Round", "Fillet")
+        db.search("rockfish")
+
+If the sqlite3 library was built without FTS5 the database is still built
+without species_search, and search() falls back to substring matching.
+"""
+
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from urllib.parse import quote
+
+from js_data import FISH_DATA_V3_PATH, load_js_exports, split_conversion_key
+
+DEFAULT_DB_PATH = os.path.join("data", "fish_yields.sqlite")
+
+# Bumped whenever the schema changes; stored as PRAGMA user_version
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE species (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    scientific_name TEXT,
+    category TEXT
+);
+CREATE TABLE product_forms (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT
+);
+CREATE TABLE fish_yields (
+    species_id INTEGER NOT NULL REFERENCES species(id),
+    from_form_id INTEGER NOT NULL REFERENCES product_forms(id),
+    to_form_id INTEGER NOT NULL REFERENCES product_forms(id),
+    yield_percent REAL NOT NULL,
+    range_min REAL,
+    range_max REAL,
+    PRIMARY KEY (species_id, from_form_id, to_form_id)
+) WITHOUT ROWID;
+"""
+
+# Created after the rows are in, which is cheaper than maintaining them per insert
+INDEXES = [
+    "CREATE INDEX species_by_category ON species (category, name)",
+    "CREATE INDEX fish_yields_by_form ON fish_yields "
+    "(from_form_id, to_form_id, yield_percent, range_min, range_max)",
+]
+
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE species_search USING fts5("
+    "name, scientific_name, category, profile, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# bm25 column weights: name, scientific_name, category, profile
+SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+YIELD_SQL = (
+    "SELECT yield_percent, range_min, range_max FROM fish_yields "
+    "WHERE species_id = (SELECT id FROM species WHERE name = ?) "
+    "AND from_form_id = (SELECT id FROM product_forms WHERE name = ?) "
+    "AND to_form_id = (SELECT id FROM product_forms WHERE name = ?)"
+)
+CONVERSIONS_SQL = (
+    "SELECT f.name, t.name, y.yield_percent, y.range_min, y.range_max "
+    "FROM fish_yields y "
+    "JOIN product_forms f ON f.id = y.from_form_id "
+    "JOIN product_forms t ON t.id = y.to_form_id "
+    "WHERE y.species_id = (SELECT id FROM species WHERE name = ?) "
+    "ORDER BY y.from_form_id, y.to_form_id"
+)
+SPECIES_WITH_CONVERSION_SQL = (
+    "SELECT s.name, y.yield_percent, y.range_min, y.range_max "
+    "FROM fish_yields y JOIN species s ON s.id = y.species_id "
+    "WHERE y.from_form_id = (SELECT id FROM product_forms WHERE name = ?) "
+    "AND y.to_form_id = (SELECT id FROM product_forms WHERE name = ?) "
+    "ORDER BY s.name"
+)
+SPECIES_SQL = "SELECT name, scientific_name, category FROM species WHERE name = ?"
+CATEGORY_SQL = "SELECT name FROM species WHERE category = ? ORDER BY name"
+CATEGORIES_SQL = "SELECT DISTINCT category FROM species WHERE category IS NOT NULL ORDER BY category"
+FORMS_SQL = "SELECT name, description FROM product_forms ORDER BY name"
+SEARCH_SQL = (
+    "SELECT s.name, s.scientific_name, s.category FROM species_search "
+    "JOIN species s ON s.id = species_search.rowid "
+    f"WHERE species_search MATCH ? ORDER BY bm25(species_search, {', '.join(map(str, SEARCH_WEIGHTS))}) "
+    "LIMIT ?"
+)
+SEARCH_FALLBACK_SQL = (
+    "SELECT name, scientific_name, category FROM species "
+    "WHERE instr(lower(name), lower(?1)) OR instr(lower(coalesce(scientific_name, '')), lower(?1)) "
+    "ORDER BY name LIMIT ?2"
+)
+
+Species = namedtuple("Species", ["name", "scientific_name", "category"])
+Yield = namedtuple("Yield", ["from_state", "to_state", "yield_percent", "range_min", "range_max"])
+SpeciesYield = namedtuple("SpeciesYield", ["species", "yield_percent", "range_min", "range_max"])
+
+
+def profile_text(profile):
+    return " ".join(value for key, value in sorted(profile.items()) if key != "url" and value)
+
+
+def _rows(fish_data, profiles, forms):
+    form_names = sorted({
+        form
+        for data in fish_data.values()
+        for key in data.get("conversions", {})
+        for form in split_conversion_key(key)
+        if form
+    })
+    form_ids = {name: i for i, name in enumerate(form_names, 1)}
+
+    species, yields, search = [], [], []
+    for species_id, (name, data) in enumerate(fish_data.items(), 1):
+        scientific_name = data.get("scientific_name") or None
+        category = data.get("category") or None
+        species.append((species_id, name, scientific_name, category))
+        search.append((species_id, name, scientific_name, category, profile_text(profiles.get(name, {}))))
+        for key, conversion in data.get("conversions", {}).items():
+            from_state, to_state = split_conversion_key(key)
+            if not to_state:
+                continue
+            low, high = conversion.get("range") or (None, None)
+            yields.append((species_id, form_ids[from_state], form_ids[to_state], conversion["yield"], low, high))
+    product_forms = [(i, name, forms.get(name)) for name, i in form_ids.items()]
+    return species, product_forms, yields, search
+
+
+def has_fts5(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def build(fish_data, path=DEFAULT_DB_PATH, profiles=None, forms=None):
+    """
+    Write fish_data (a FISH_DATA_V3 dict) to a new SQLite database at path,
+    replacing any existing one. profiles ({species: PROFILES_DATA entry}) feed
+    the full-text index; forms ({form: description}) the product_forms table.
+    Returns {table: row count}.
+    """
+    species, product_forms, yields, search = _rows(fish_data, profiles or {}, forms or {})
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        fts = has_fts5(conn)
+        conn.execute("BEGIN")
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        conn.executemany("INSERT INTO species VALUES (?, ?, ?, ?)", species)
+        conn.executemany("INSERT INTO product_forms VALUES (?, ?, ?)", product_forms)
+        conn.executemany("INSERT INTO fish_yields VALUES (?, ?, ?, ?, ?, ?)", yields)
+        for statement in INDEXES:
+            conn.execute(statement)
+        if fts:
+            conn.execute(FTS_SCHEMA)
+            conn.executemany(
+                "INSERT INTO species_search (rowid, name, scientific_name, category, profile) "
+                "VALUES (?, ?, ?, ?, ?)",
+                search,
+            )
+            conn.execute("INSERT INTO species_search (species_search) VALUES ('optimize')")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+    counts = {"species": len(species), "product_forms": len(product_forms), "fish_yields": len(yields)}
+    if fts:
+        counts["species_search"] = len(search)
+    return counts
+
+
+def fts_query(text):
+    """An FTS5 query matching every word of text as a prefix; '' if text has no words."""
+    words = "".join(ch if ch.isalnum() else " " for ch in text).split()
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class YieldDB:
+    """Read-only query API over a database written by build()."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, cached_statements=32):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        uri = "file:" + quote(os.path.abspath(path)) + "?mode=ro"
+        self.conn = sqlite3.connect(uri, uri=True, cached_statements=cached_statements)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.conn.close()
+            raise ValueError(f"{path} has schema version {version}, expected {SCHEMA_VERSION}; rebuild it")
+        self.has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'species_search'"
+        ).fetchone() is not None
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def yield_for(self, species, from_state, to_state):
+        """The Yield for one conversion, or None if the dataset doesn't have it."""
+        row = self.conn.execute(YIELD_SQL, (species, from_state, to_state)).fetchone()
+        return Yield(from_state, to_state, *row) if row else None
+
+    def conversions(self, species):
+        return [Yield(*row) for row in self.conn.execute(CONVERSIONS_SQL, (species,))]
+
+    def species_with_conversion(self, from_state, to_state):
+        """SpeciesYield for every species that has the conversion, by name."""
+        return [SpeciesYield(*row) for row in self.conn.execute(SPECIES_WITH_CONVERSION_SQL, (from_state, to_state))]
+
+    def species(self, name):
+        row = self.conn.execute(SPECIES_SQL, (name,)).fetchone()
+        return Species(*row) if row else None
+
+    def species_in_category(self, category):
+        return [name for (name,) in self.conn.execute(CATEGORY_SQL, (category,))]
+
+    def categories(self):
+        return [category for (category,) in self.conn.execute(CATEGORIES_SQL)]
+
+    def forms(self):
+        """{form: description} for every product form, by name."""
+        return dict(self.conn.execute(FORMS_SQL).fetchall())
+
+    def search(self, text, limit=10):
+        """Species matching text, best first: names, scientific names, categories and profile text."""
+        if not self.has_fts:
+            return [Species(*row) for row in self.conn.execute(SEARCH_FALLBACK_SQL, (text.strip(), limit))]
+        query = fts_query(text)
+        if not query:
+            return []
+        return [Species(*row) for row in self.conn.execute(SEARCH_SQL, (query, limit))]
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Build the indexed SQLite database of FISH_DATA_V3")
+    parser.add_argument("--source", default=FISH_DATA_V3_PATH, help="JS module that exports FISH_DATA_V3")
+    parser.add_argument("--output", default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    exports = load_js_exports(args.source, {"FISH_DATA_V3", "PROFILES_DATA", "ACRONYMS"})
+    start = time.perf_counter()
+    counts = build(exports["FISH_DATA_V3"], args.output, exports.get("PROFILES_DATA"), exports.get("ACRONYMS"))
+    elapsed = time.perf_counter() - start
+    print(", ".join(f"{count} {table}" for table, count in counts.items()))
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.1f} KB) in {elapsed * 1000:.0f} ms")
+    if "species_search" not in counts:
+        print("sqlite3 was built without FTS5; species_search was not created")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Yield conversion graph with precomputed chained yields.
+
+Each species' conversions form a directed graph of product forms
+(Round → D/H-On → D/H-Off → Smoked ...). YieldGraph composes the edges
+multiplicatively and precomputes, for every reachable (from, to) pair, the
+best- and worst-yielding path and the range propagated along the paths
+(product of the range lows / highs, falling back to the point yield for
+edges without a published range). Queries are then plain matrix lookups,
+and the implied chains can be exported as a JS module next to
+fish_data_v3.js so the app never has to search paths at request time.
+"""
+
+import json
+import math
+import os
+from collections import namedtuple
+
+from conversion_table import ARROW, ConversionTable
+from js_data import FISH_DATA_V3_PATH, RESEARCH_DIR
+
+CHAINED_YIELDS_PATH = os.path.join(RESEARCH_DIR, "..", "app", "src", "data", "chained_yields.js")
+
+# Yields are percentages; paths are tuples of product-form names
+ChainedYield = namedtuple(
+    "ChainedYield",
+    ["best", "best_path", "worst", "worst_path", "range_low", "range_high", "direct"],
+)
+
+
+def _gt(a, b):
+    return a > b
+
+
+def _lt(a, b):
+    return a < b
+
+
+class _SpeciesGraph:
+    """Closure matrices for one species, indexed by local node number."""
+
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        n = len(nodes)
+        self.direct = [[math.nan] * n for _ in range(n)]
+        self.best = [[math.nan] * n for _ in range(n)]
+        self.worst = [[math.nan] * n for _ in range(n)]
+        self.low = [[math.nan] * n for _ in range(n)]
+        self.high = [[math.nan] * n for _ in range(n)]
+        self.best_path = [[None] * n for _ in range(n)]
+        self.worst_path = [[None] * n for _ in range(n)]
+
+        adjacency = [[] for _ in range(n)]
+        for a, b, yield_value, low, high in edges:
+            adjacency[a].append((b, yield_value / 100, low / 100, high / 100))
+            self.direct[a][b] = yield_value
+
+        for source in range(n):
+            self._walk(adjacency, source)
+
+    def _walk(self, adjacency, source):
+        # Best-path relaxation in rounds (Bellman-Ford), one label per node
+        # for each of the four quantities: the best / worst yield and the
+        # low / high range end, each with the path that reached it. Round k
+        # settles every path of k edges, so there are at most n - 1 rounds
+        # of O(edges) each rather than one visit per simple path. Products of
+        # positive factors compose monotonically, so on the acyclic graphs the
+        # data forms this matches exhaustive search; a cycle is never walked
+        # because a label is not extended to a node already on its path.
+        # Labels: [best, worst, low, high] -> {node: (fraction, path)}
+        labels = [{source: (1.0, (source,))} for _ in range(4)]
+        frontier = {source}
+        for _ in range(len(self.nodes) - 1):
+            changed = set()
+            for node in frontier:
+                for nxt, y, lo, hi in adjacency[node]:
+                    for label, factor, better in zip(labels, (y, y, lo, hi), (_gt, _lt, _lt, _gt)):
+                        if node not in label:
+                            continue
+                        fraction, path = label[node]
+                        if nxt in path:
+                            continue
+                        candidate = fraction * factor
+                        if nxt not in label or better(candidate, label[nxt][0]):
+                            label[nxt] = (candidate, path + (nxt,))
+                            changed.add(nxt)
+            if not changed:
+                break
+            frontier = changed
+
+        # Around a cycle a label can be blocked from a node the others reach;
+        # the best path then stands in for it
+        best, worst, low, high = labels
+        for nxt, reached in best.items():
+            if nxt == source:
+                continue
+            self.best[source][nxt], self.best_path[source][nxt] = reached[0] * 100, reached[1]
+            fraction, self.worst_path[source][nxt] = worst.get(nxt, reached)
+            self.worst[source][nxt] = fraction * 100
+            self.low[source][nxt] = low.get(nxt, reached)[0] * 100
+            self.high[source][nxt] = high.get(nxt, reached)[0] * 100
+
+    def query(self, from_state, to_state):
+        a, b = self.index.get(from_state), self.index.get(to_state)
+        if a is None or b is None or math.isnan(self.best[a][b]):
+            return None
+        names = self.nodes
+        direct = self.direct[a][b]
+        return ChainedYield(
+            self.best[a][b], tuple(names[i] for i in self.best_path[a][b]),
+            self.worst[a][b], tuple(names[i] for i in self.worst_path[a][b]),
+            self.low[a][b], self.high[a][b],
+            None if math.isnan(direct) else direct,
+        )
+
+    def pairs(self):
+        n = len(self.nodes)
+        for a in range(n):
+            for b in range(n):
+                if not math.isnan(self.best[a][b]):
+                    yield self.nodes[a], self.nodes[b]
+
+
+class YieldGraph:
+    def __init__(self, table):
+        self.table = table
+        per_species = {}
+        for species, from_state, to_state, yield_value, range_value in table.rows():
+            low, high = range_value if range_value else (yield_value, yield_value)
+            per_species.setdefault(species, []).append((from_state, to_state, yield_value, low, high))
+
+        self.graphs = {}
+        for species, conversions in per_species.items():
+            nodes = list(dict.fromkeys(
+                form for from_state, to_state, *_ in conversions for form in (from_state, to_state)
+            ))
+            index = {node: i for i, node in enumerate(nodes)}
+            edges = [(index[f], index[t], y, lo, hi) for f, t, y, lo, hi in conversions]
+            self.graphs[species] = _SpeciesGraph(nodes, edges)
+
+    @classmethod
+    def from_js(cls, path=FISH_DATA_V3_PATH):
+        return cls(ConversionTable.from_js(path))
+
+    def query(self, species, from_state, to_state):
+        """ChainedYield for a (species, from, to) pair, or None when no path exists."""
+        graph = self.graphs.get(species)
+        return graph.query(from_state, to_state) if graph else None
+
+    def query_batch(self, queries):
+        return [self.query(species, from_state, to_state) for species, from_state, to_state in queries]
+
+    def implied(self):
+        """Yield (species, from, to, ChainedYield) for pairs reachable only through a chain."""
+        for species, graph in self.graphs.items():
+            for from_state, to_state in graph.pairs():
+                chained = graph.query(from_state, to_state)
+                if chained.direct is None:
+                    yield species, from_state, to_state, chained
+
+    def to_export(self, include_direct=False):
+        """{species: {"From → To": {...}}} ready to be written as a JS module."""
+        export = {}
+        for species, graph in self.graphs.items():
+            for from_state, to_state in graph.pairs():
+                chained = graph.query(from_state, to_state)
+                if chained.direct is not None and not include_direct:
+                    continue
+                export.setdefault(species, {})[from_state + ARROW + to_state] = {
+                    "yield": round(chained.best, 2),
+                    "range": [round(chained.range_low, 2), round(chained.range_high, 2)],
+                    "best": {"yield": round(chained.best, 2), "path": list(chained.best_path)},
+                    "worst": {"yield": round(chained.worst, 2), "path": list(chained.worst_path)},
+                    "direct": chained.direct,
+                }
+        return export
+
+    def export_js(self, path=CHAINED_YIELDS_PATH, include_direct=False):
+        content = (
+            "/**\n"
+            " * Chained yields precomputed from fish_data_v3.js by research/yield_graph.py.\n"
+            " * Do not edit by hand; regenerate with `python research/yield_graph.py`.\n"
+            " */\n\n"
+            "export const CHAINED_YIELDS = "
+            + json.dumps(self.to_export(include_direct), indent=2, ensure_ascii=False)
+            + ";\n"
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Precompute chained yields from fish_data_v3.js")
+    parser.add_argument("--dataset", default=FISH_DATA_V3_PATH)
+    parser.add_argument("--output", default=CHAINED_YIELDS_PATH)
+    parser.add_argument("--include-direct", action="store_true", help="Also export pairs with a published yield")
+    args = parser.parse_args(argv)
+
+    graph = YieldGraph.from_js(args.dataset)
+    implied = sum(1 for _ in graph.implied())
+    graph.export_js(args.output, args.include_direct)
+    print(f"Wrote {implied} implied chained yields for {len(graph.graphs)} species to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Load generator for yield_service.py.
+
+Opens a number of keep-alive connections to the service and sends a fixed
+mix of requests over them, `--pipeline` at a time per connection (written
+back to back, then the responses read in order). Latency is measured per
+request from when its batch was sent until its response has been read.
+
+The requests are drawn (with a fixed seed) from the dataset: single
+/yield lookups of random conversions, and a --calc-fraction of POST /calc
+requests with --batch-size inputs each, giving the yield either directly
+or as a species conversion for the service to look up.
+
+    python yield_load.py --spawn                      # start a service for the run
+    python yield_load.py --port 8765 --requests 20000 --connections 16 --pipeline 8
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from js_data import FISH_DATA_V3_PATH, load_fish_data_v3, split_conversion_key
+from yield_service import DEFAULT_HOST, DEFAULT_PORT
+
+LoadResult = namedtuple("LoadResult", ["requests", "errors", "seconds", "latencies", "statuses"])
+
+
+def build_requests(fish_data, count, calc_fraction=0.2, batch_size=50, host=DEFAULT_HOST, seed=0):
+    """count raw HTTP/1.1 requests for the service, as bytes."""
+    rng = random.Random(seed)
+    conversions = [
+        (species, *split_conversion_key(key), conv["yield"])
+        for species, data in fish_data.items()
+        for key, conv in data.get("conversions", {}).items()
+    ]
+
+    def calc_input():
+        species, from_state, to_state, yield_value = rng.choice(conversions)
+        item = {
+            "mode": rng.choice(["cost", "weight"]),
+            "cost": round(rng.uniform(1, 20), 2),
+            "targetWeight": rng.randint(10, 1000),
+            "processingCost": round(rng.uniform(0, 2), 2),
+        }
+        if rng.random() < 0.5:
+            item["yieldPercent"] = yield_value
+        else:
+            item.update(species=species, **{"from": from_state, "to": to_state})
+        return item
+
+    requests = []
+    for _ in range(count):
+        if rng.random() < calc_fraction:
+            body = json.dumps({"inputs": [calc_input() for _ in range(batch_size)]}).encode("utf-8")
+            head = f"POST /calc HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n" \
+                   f"Content-Length: {len(body)}\r\n\r\n"
+            requests.append(head.encode("latin-1") + body)
+        else:
+            species, from_state, to_state, _ = rng.choice(conversions)
+            target = "/yield?" + urlencode({"species": species, "from": from_state, "to": to_state})
+            requests.append(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("utf-8"))
+    return requests
+
+
+async def read_response(reader):
+    """(status, body) of the next response on the connection."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _connection(host, port, requests, pipeline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for start in range(0, len(requests), pipeline):
+            batch = requests[start:start + pipeline]
+            sent = time.perf_counter()
+            writer.write(b"".join(batch))
+            await writer.drain()
+            for _ in batch:
+                status, _ = await read_response(reader)
+                latencies.append(time.perf_counter() - sent)
+                statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(requests, host=DEFAULT_HOST, port=DEFAULT_PORT, connections=8, pipeline=1):
+    """Send requests over `connections` connections and return a LoadResult."""
+    latencies, statuses = [], {}
+    shares = [requests[i::connections] for i in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _connection(host, port, share, max(1, pipeline), latencies, statuses)
+        for share in shares if share
+    ))
+    seconds = time.perf_counter() - start
+    errors = sum(count for status, count in statuses.items() if status >= 500)
+    return LoadResult(len(latencies), errors, seconds, sorted(latencies), statuses)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def format_result(result):
+    def ms(value):
+        return f"{value * 1000:.2f} ms"
+
+    latencies = result.latencies
+    lines = [
+        f"{result.requests} requests in {result.seconds:.2f}s: {result.requests / result.seconds:,.0f} req/s",
+        f"latency p50 {ms(percentile(latencies, 0.5))}, p90 {ms(percentile(latencies, 0.9))}, "
+        f"p99 {ms(percentile(latencies, 0.99))}, max {ms(latencies[-1] if latencies else 0)}",
+        "status " + ", ".join(f"{status}: {count}" for status, count in sorted(result.statuses.items())),
+    ]
+    if result.errors:
+        lines.append(f"{result.errors} server errors")
+    return "\n".join(lines)
+
+
+def spawn_service(dataset=FISH_DATA_V3_PATH, host=DEFAULT_HOST):
+    """Start yield_service.py on a free port; returns (process, port)."""
+    import os
+    import subprocess
+    import sys
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "yield_service.py")
+    process = subprocess.Popen(
+        [sys.executable, script, "--dataset", dataset, "--host", host, "--port", "0"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline()
+    if not line.startswith("Listening on "):
+        process.kill()
+        raise RuntimeError("yield_service.py didn't start")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Measure yield_service.py latency and throughput")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--spawn", action="store_true", help="Start a service on a free port for the run")
+    parser.add_argument("--dataset", default=FISH_DATA_V3_PATH)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--pipeline", type=int, default=1, help="Requests in flight per connection")
+    parser.add_argument("--calc-fraction", type=float, default=0.2, help="Share of POST /calc requests")
+    parser.add_argument("--batch-size", type=int, default=50, help="Inputs per /calc request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.spawn:
+        process, args.port = spawn_service(args.dataset, args.host)
+    try:
+        requests = build_requests(load_fish_data_v3(args.dataset), args.requests,
+                                  args.calc_fraction, args.batch_size, args.host, args.seed)
+        print(format_result(asyncio.run(run_load(requests, args.host, args.port, args.connections, args.pipeline))))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Local HTTP service for yield lookups and batch cost / weight calculations.
+
+Back-office jobs that need yields or calcEngine results would otherwise have
+to load fish_data_v3.js themselves or go through the Node handlers. This
+service loads the dataset once into a ConversionTable (binary-searched
+packed keys) plus per-species summaries, and answers over plain HTTP/1.1
+with JSON:
+
+    GET  /health                          dataset size
+    GET  /stats                           request count and response cache stats
+    GET  /species[?category=Salmon]       [{name, scientific_name, category}]
+    GET  /species/<name>                  species with all its conversions
+    GET  /yield?species=&from=&to=        {species, from, to, yield, range}
+    POST /calc                            {"inputs": [calcEngine input, ...]}
+
+Species names go through name_index, so "Cod, Pacific" finds "Pacific Cod";
+a near miss is a 404 that names the likely species.
+/calc evaluates the whole list in one batch_calc.evaluate_inputs() call,
+which reproduces calcEngine.calculate() exactly. An input may give
+"species", "from" and "to" instead of "yieldPercent", and the dataset yield
+is used. Each result is {"result", "appliedDiscount"}, with "yieldPercent"
+added when it came from the dataset, or {"error"} if that conversion
+doesn't exist. Non-finite results are null, as JSON.stringify writes them.
+
+Connections are kept alive and requests may be pipelined: they're read off
+the connection and answered in order. Responses are built once per distinct
+(method, target, body) and served from an LRU cache after that; requests
+with a body over MAX_CACHED_BODY_BYTES aren't cached, so the cache holds at
+most cache_size small keys rather than cache_size 4 MB bodies.
+
+    python yield_service.py --port 8765
+    python yield_load.py --port 8765       # see yield_load.py
+"""
+
+import asyncio
+import json
+import math
+import sys
+import traceback
+from collections import namedtuple
+from functools import lru_cache
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from conversion_table import ConversionTable
+from js_data import FISH_DATA_V3_PATH, load_fish_data_v3, split_conversion_key
+from name_index import NameIndex
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 4096
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 4 * 1024 * 1024
+# Larger request bodies aren't cached: the body is part of the cache key
+MAX_CACHED_BODY_BYTES = 8 * 1024
+MAX_BATCH = 10000
+# calcEngine inputs that are lists of objects
+LIST_INPUTS = ("processingSteps", "priceBreaks")
+
+Request = namedtuple("Request", ["method", "target", "body", "keep_alive"])
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _finite(value):
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class YieldService:
+    def __init__(self, fish_data, cache_size=DEFAULT_CACHE_SIZE):
+        self.table = ConversionTable.from_v3(fish_data)
+        self.names = NameIndex.from_dataset(fish_data)
+        self.species = {}
+        self.conversions = {}
+        for name, data in fish_data.items():
+            self.species[name] = {
+                "name": name,
+                "scientific_name": data.get("scientific_name"),
+                "category": data.get("category"),
+            }
+            self.conversions[name] = [
+                {"from": from_state, "to": to_state, "yield": conv["yield"], "range": conv.get("range")}
+                for from_state, to_state, conv in (
+                    (*split_conversion_key(key), conv) for key, conv in data.get("conversions", {}).items()
+                )
+            ]
+        self.requests = 0
+        self._cached = lru_cache(maxsize=cache_size)(self._respond)
+
+    @classmethod
+    def from_js(cls, path=FISH_DATA_V3_PATH, cache_size=DEFAULT_CACHE_SIZE):
+        return cls(load_fish_data_v3(path), cache_size)
+
+    # ---- routing ----
+
+    def respond(self, method, target, body=b""):
+        """(status, JSON body bytes) for one request."""
+        self.requests += 1
+        if target == "/stats":
+            info = self._cached.cache_info()
+            return 200, _json({
+                "requests": self.requests,
+                "cache": {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize},
+            })
+        respond = self._cached if len(body) <= MAX_CACHED_BODY_BYTES else self._respond
+        try:
+            return respond(method, target, body)
+        except HTTPError as e:
+            return e.status, _json({"error": e.message})
+        except Exception:
+            # Answer rather than drop the connection; the traceback is for the operator
+            traceback.print_exc(file=sys.stderr)
+            return 500, _json({"error": "internal error"})
+
+    def _respond(self, method, target, body):
+        parts = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        path = parts.path.rstrip("/") or "/"
+
+        if path == "/calc":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            return 200, _json(self.calc(body))
+        if method != "GET":
+            raise HTTPError(405, "use GET")
+        if path == "/health":
+            return 200, _json({"status": "ok", "species": len(self.species), "conversions": len(self.table)})
+        if path == "/species":
+            category = query.get("category")
+            return 200, _json([
+                species for species in self.species.values()
+                if category is None or species["category"] == category
+            ])
+        if path.startswith("/species/"):
+            name = self.resolve_species(unquote(path[len("/species/"):]))
+            return 200, _json({**self.species[name], "conversions": self.conversions[name]})
+        if path == "/yield":
+            missing = [key for key in ("species", "from", "to") if not query.get(key)]
+            if missing:
+                raise HTTPError(400, "missing " + ", ".join(missing))
+            species = self.resolve_species(query["species"])
+            found = self.table.lookup(species, query["from"], query["to"])
+            if found is None:
+                raise HTTPError(404, f"no {query['from']} → {query['to']} conversion for {species}")
+            return 200, _json({"species": species, "from": query["from"], "to": query["to"], **found})
+        raise HTTPError(404, f"no route for {path}")
+
+    # ---- handlers ----
+
+    def resolve_species(self, name):
+        if name in self.species:
+            return name
+        canonical = self.names.canonical(name)
+        if canonical not in self.species:
+            suggestion = self.names.suggest(name)
+            hint = f" (did you mean {suggestion.name!r}?)" if suggestion else ""
+            raise HTTPError(404, f"unknown species {name!r}{hint}")
+        return canonical
+
+    def calc(self, body):
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise HTTPError(400, "body is not JSON")
+        inputs = payload.get("inputs") if isinstance(payload, dict) else payload
+        if not isinstance(inputs, list) or not all(isinstance(item, dict) for item in inputs):
+            raise HTTPError(400, 'expected {"inputs": [calcEngine input objects]}')
+        if len(inputs) > MAX_BATCH:
+            raise HTTPError(413, f"at most {MAX_BATCH} inputs per request")
+        for i, item in enumerate(inputs):
+            for key in LIST_INPUTS:
+                value = item.get(key)
+                if value is not None and not (
+                    isinstance(value, list) and all(isinstance(entry, dict) for entry in value)
+                ):
+                    raise HTTPError(400, f"inputs[{i}].{key} must be a list of objects")
+
+        results = [None] * len(inputs)
+        scenarios, positions, looked_up = [], [], {}
+        for i, item in enumerate(inputs):
+            if "yieldPercent" not in item and "species" in item:
+                try:
+                    species = self.resolve_species(str(item["species"]))
+                except HTTPError as e:
+                    results[i] = {"error": e.message}
+                    continue
+                found = self.table.lookup(species, item.get("from"), item.get("to"))
+                if found is None:
+                    results[i] = {"error": f"no {item.get('from')} → {item.get('to')} conversion for {species}"}
+                    continue
+                item = {**item, "yieldPercent": found["yield"]}
+                looked_up[i] = found["yield"]
+            scenarios.append(item)
+            positions.append(i)
+
+        if scenarios:
+            # numpy, via batch_calc, is only loaded by the first /calc
+            from batch_calc import evaluate_inputs
+
+            batch = evaluate_inputs(scenarios)
+            for i, result, applied in zip(positions, batch.result.tolist(), batch.applied_discount.tolist()):
+                results[i] = {"result": _finite(result), "appliedDiscount": _finite(applied)}
+                if i in looked_up:
+                    results[i]["yieldPercent"] = looked_up[i]
+        return {"results": results}
+
+    # ---- HTTP ----
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    writer.write(encode_response(e.status, _json({"error": e.message}), keep_alive=False))
+                    break
+                if request is None:
+                    break
+                status, body = self.respond(request.method, request.target, request.body)
+                writer.write(encode_response(status, body, request.keep_alive))
+                if not request.keep_alive:
+                    break
+                # Returns at once unless the client stopped reading; pipelined
+                # requests already in the buffer are answered without waiting
+                await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def read_request(reader):
+    """The next Request on a connection, or None once the client has closed it."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HTTPError(400, "incomplete request")
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "request headers too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length")
+    if length < 0:
+        raise HTTPError(400, "bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    return Request(method, target, body, keep_alive)
+
+
+def encode_response(status, body, keep_alive=True):
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def start_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return await asyncio.start_server(service.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = await start_server(service, host, port)
+    host, port = server.sockets[0].getsockname()[:2]
+    # yield_load.py --spawn reads this line to find the port
+    print(f"Listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Serve yield lookups and batch calculations over HTTP")
+    parser.add_argument("--dataset", default=FISH_DATA_V3_PATH)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="Cached responses")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(YieldService.from_js(args.dataset, args.cache_size), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
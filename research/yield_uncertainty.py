@@ -0,0 +1,269 @@
+"""
+Monte Carlo costing over the published yield ranges.
+
+Every conversion in fish_data_v3.js has a point yield and, for most, a
+`range: [min, max]`. simulate_yields() draws yields inside each range from a
+selectable distribution (uniform, triangular or beta-PERT peaking at the
+point yield) in fixed-size chunks, and accumulates a per-conversion
+histogram plus running sums, so memory is bounded by the chunk size however
+many draws are requested. Conversions without a range are held at their
+point yield.
+
+The calcEngine cost and weight results are monotone in the yield (they are
+a / yield + b), so their percentiles are the calcEngine result at the
+matching yield percentile, and their mean follows from E[1 / yield]. The
+simulation is therefore independent of prices: it is cached on disk by
+dataset hash and simulation parameters, and report() applies any
+calcEngine inputs to the cached result without re-simulating.
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from batch_calc import evaluate
+from conversion_table import ARROW, ConversionTable
+from fish_store import atomic_write
+from js_data import FISH_DATA_V3_PATH
+
+DEFAULT_CACHE_DIR = ".simulation_cache"
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_BINS = 4096
+# Samples held in memory at once (draws per chunk x conversions)
+DEFAULT_CHUNK_ELEMENTS = 1 << 20
+
+# yields: (conversions, percentiles) yield percentiles; mean_yield and
+# mean_inverse: E[yield] and E[100 / yield] per conversion
+YieldSimulation = namedtuple(
+    "YieldSimulation", ["percentiles", "yields", "mean_yield", "mean_inverse", "draws", "distribution"]
+)
+
+
+def _uniform(rng, low, mode, high, size):
+    return low + (high - low) * rng.random(size)
+
+
+def _triangular(rng, low, mode, high, size):
+    return rng.triangular(low, mode, high, size)
+
+
+def _pert(rng, low, mode, high, size):
+    width = high - low
+    alpha = 1 + 4 * (mode - low) / width
+    beta = 1 + 4 * (high - mode) / width
+    return low + width * rng.beta(alpha, beta, size)
+
+
+DISTRIBUTIONS = {
+    "uniform": _uniform,
+    "triangular": _triangular,
+    "pert": _pert,
+}
+
+
+def dataset_hash(table):
+    """Hash of the conversions themselves, independent of how the JS file is formatted."""
+    rows = json.dumps(list(table.rows()), ensure_ascii=False)
+    return hashlib.sha256(rows.encode("utf-8")).hexdigest()
+
+
+def _histogram_percentiles(counts, low, width, percentiles):
+    # Linear interpolation inside the bin where the CDF crosses each percentile
+    bins = counts.shape[1]
+    cdf = np.cumsum(counts, axis=1) / counts.sum(axis=1, keepdims=True)
+    result = np.empty((counts.shape[0], len(percentiles)))
+    rows = np.arange(counts.shape[0])
+    for j, p in enumerate(percentiles):
+        q = p / 100
+        crossed = np.argmax(cdf >= q - 1e-12, axis=1)
+        before = np.where(crossed > 0, cdf[rows, np.maximum(crossed - 1, 0)], 0.0)
+        inside = cdf[rows, crossed] - before
+        fraction = np.clip(np.divide(q - before, inside, out=np.zeros_like(inside), where=inside > 0), 0, 1)
+        result[:, j] = low + (crossed + fraction) * width / bins
+    return result
+
+
+def simulate_yields(
+    table,
+    distribution="pert",
+    draws=100_000,
+    percentiles=DEFAULT_PERCENTILES,
+    seed=0,
+    bins=DEFAULT_BINS,
+    chunk_elements=DEFAULT_CHUNK_ELEMENTS,
+):
+    """
+    Sample every conversion's yield `draws` times and summarize the samples.
+    The percentiles are completed with their complements (5 -> 5 and 95) so
+    propagate() can map them through decreasing results too.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution {distribution!r}; expected one of {sorted(DISTRIBUTIONS)}")
+    if draws < 1:
+        raise ValueError("draws must be at least 1")
+    sample = DISTRIBUTIONS[distribution]
+    percentiles = tuple(sorted(set(percentiles) | {100 - p for p in percentiles}))
+    columns = table.columns_as_numpy()
+    point = columns["yield"]
+    low, high = columns["range_low"], columns["range_high"]
+
+    n = len(point)
+    yields = np.repeat(point[:, None], len(percentiles), axis=1).astype(np.float64)
+    mean_yield = point.astype(np.float64)
+    mean_inverse = 100 / point
+
+    uncertain = np.flatnonzero(~np.isnan(low) & (high > low))
+    if len(uncertain):
+        u_low, u_high = low[uncertain], high[uncertain]
+        u_mode = np.clip(point[uncertain], u_low, u_high)
+        width = u_high - u_low
+        m = len(uncertain)
+        counts = np.zeros(m * bins, dtype=np.int64)
+        total = np.zeros(m)
+        total_inverse = np.zeros(m)
+        offsets = np.arange(m) * bins
+        rng = np.random.default_rng(seed)
+        per_chunk = max(1, chunk_elements // m)
+
+        done = 0
+        while done < draws:
+            size = min(per_chunk, draws - done)
+            samples = sample(rng, u_low, u_mode, u_high, (size, m))
+            index = ((samples - u_low) * (bins / width)).astype(np.int64)
+            np.clip(index, 0, bins - 1, out=index)
+            index += offsets
+            counts += np.bincount(index.ravel(), minlength=m * bins)
+            total += samples.sum(axis=0)
+            total_inverse += (100 / samples).sum(axis=0)
+            done += size
+
+        yields[uncertain] = _histogram_percentiles(counts.reshape(m, bins), u_low, width, percentiles)
+        mean_yield[uncertain] = total / draws
+        mean_inverse[uncertain] = total_inverse / draws
+
+    return YieldSimulation(tuple(percentiles), yields, mean_yield, mean_inverse, draws, distribution)
+
+
+def _cache_key(table, distribution, draws, percentiles, seed, bins):
+    params = json.dumps([distribution, draws, list(percentiles), seed, bins])
+    return hashlib.sha256((dataset_hash(table) + params).encode("utf-8")).hexdigest()
+
+
+def cached_simulation(table, distribution="pert", draws=100_000, percentiles=DEFAULT_PERCENTILES,
+                      seed=0, bins=DEFAULT_BINS, cache_dir=DEFAULT_CACHE_DIR):
+    """simulate_yields(), reusing a stored result for the same dataset and parameters."""
+    path = None
+    if cache_dir:
+        key = _cache_key(table, distribution, draws, percentiles, seed, bins)
+        path = os.path.join(cache_dir, key + ".json")
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                stored = json.load(f)
+            return YieldSimulation(
+                tuple(stored["percentiles"]),
+                np.array(stored["yields"], dtype=np.float64).reshape(-1, len(stored["percentiles"])),
+                np.array(stored["mean_yield"], dtype=np.float64),
+                np.array(stored["mean_inverse"], dtype=np.float64),
+                stored["draws"],
+                stored["distribution"],
+            )
+
+    simulation = simulate_yields(table, distribution, draws, percentiles, seed, bins)
+    if path:
+        atomic_write(path, json.dumps({
+            "percentiles": list(simulation.percentiles),
+            "yields": simulation.yields.tolist(),
+            "mean_yield": simulation.mean_yield.tolist(),
+            "mean_inverse": simulation.mean_inverse.tolist(),
+            "draws": simulation.draws,
+            "distribution": simulation.distribution,
+        }))
+    return simulation
+
+
+def propagate(simulation, **calc_inputs):
+    """
+    calcEngine results at the simulated yields: (percentiles, mean) arrays,
+    shaped (conversions, percentiles) and (conversions,). calc_inputs are
+    batch_calc.evaluate() arguments other than yield_percent.
+    """
+    yields = simulation.yields
+    reversed_yields = yields[:, ::-1]
+    at_q = evaluate(yield_percent=yields, **calc_inputs).result
+    # Decreasing in the yield (the usual case): the q-th percentile of the
+    # result sits at the (100 - q)-th yield percentile
+    at_complement = evaluate(yield_percent=reversed_yields, **calc_inputs).result
+    increasing = at_q[:, -1:] >= at_q[:, :1]
+    values = np.where(increasing, at_q, at_complement)
+
+    # result = a * (100 / yield) + b
+    full = evaluate(yield_percent=100, **calc_inputs).result
+    half = evaluate(yield_percent=50, **calc_inputs).result
+    a, b = half - full, 2 * full - half
+    return values, a * simulation.mean_inverse + b
+
+
+def report(table, simulation, cost_inputs=None, weight_inputs=None):
+    """{species: {"From → To": {...}}} with yield, cost and weight percentiles."""
+    labels = [f"p{p:g}" for p in simulation.percentiles]
+    outputs = {}
+    if cost_inputs is not None:
+        outputs["cost"] = propagate(simulation, mode="cost", **cost_inputs)
+    if weight_inputs is not None:
+        outputs["weight"] = propagate(simulation, mode="weight", **weight_inputs)
+
+    result = {}
+    for row, (species, from_state, to_state, yield_value, range_value) in enumerate(table.rows()):
+        entry = {
+            "yield": yield_value,
+            "range": range_value,
+            "simulated_yield": dict(zip(labels, np.round(simulation.yields[row], 4).tolist())),
+            "mean_yield": round(float(simulation.mean_yield[row]), 4),
+        }
+        for name, (values, mean) in outputs.items():
+            entry[name] = dict(zip(labels, np.round(values[row], 4).tolist()))
+            entry[name]["mean"] = round(float(mean[row]), 4)
+        result.setdefault(species, {})[from_state + ARROW + to_state] = entry
+    return result
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Monte Carlo yield-uncertainty costing")
+    parser.add_argument("--dataset", default=FISH_DATA_V3_PATH)
+    parser.add_argument("--distribution", choices=sorted(DISTRIBUTIONS), default="pert")
+    parser.add_argument("--draws", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--percentiles", default=",".join(str(p) for p in DEFAULT_PERCENTILES))
+    parser.add_argument("--cost", type=float, help="$/lb of Round; adds cost-per-lb percentiles")
+    parser.add_argument("--processing-cost", type=float, default=0)
+    parser.add_argument("--weight-type", choices=["incoming", "outgoing"], default="incoming")
+    parser.add_argument("--target-weight", type=float, help="Finished lbs; adds required-Round-weight percentiles")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    table = ConversionTable.from_js(args.dataset)
+    simulation = cached_simulation(
+        table, args.distribution, args.draws,
+        tuple(float(p) for p in args.percentiles.split(",")), args.seed,
+        cache_dir=None if args.no_cache else args.cache_dir,
+    )
+    cost_inputs = None
+    if args.cost is not None:
+        cost_inputs = {"cost": args.cost, "processing_cost": args.processing_cost, "weight_type": args.weight_type}
+    weight_inputs = {"target_weight": args.target_weight} if args.target_weight is not None else None
+    content = json.dumps(report(table, simulation, cost_inputs, weight_inputs), indent=2, ensure_ascii=False)
+    if args.output:
+        atomic_write(args.output, content + "\n")
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    main()